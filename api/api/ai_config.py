@@ -2,6 +2,7 @@
 AI 설정 중앙 관리
 모든 AI 관련 설정을 한 곳에서 관리
 """
+import time
 
 # 1. 모델 별명 (J님 명명)
 MODEL_ALIASES = {
@@ -19,6 +20,70 @@ TEMPERATURE_SETTINGS = {
     'v2': 0.5         # v2 기본값 (균형 잡힌 분석)
 }
 
+# 3. DB 컨텍스트 랭킹 검색 설정 (chat_v2, db_focus > 0)
+RANKED_CONTEXT_SETTINGS = {
+    'top_k': 8,            # 최대 문서 수
+    'char_budget': 6000,   # 전체 DB 컨텍스트 최대 글자 수
+    'passages_per_doc': 2  # 문서당 최대 구절 수 (구절 800자, chunk_cache)
+}
+
+# 3-2. 멀티 모델 동시 호출 설정 (model='all')
+MULTI_MODEL_SETTINGS = {
+    'models': ['gemini-pro', 'gemini-flash', 'gpt', 'claude'],  # 활성화된 모델만 호출
+    'timeouts': {            # 모델별 최대 대기 시간 (초), 초과 시 해당 모델만 제외
+        'gemini-pro': 90,
+        'gemini-flash': 40,
+        'gpt': 60,
+        'claude': 60,
+    },
+    'claim_similarity': 0.6,  # 주장 비교: 글자 2-gram 자카드 유사도 기준 (같은 주장으로 묶음)
+}
+
+# 3-3. 컨텍스트 토큰 예산 (ContextManager.assemble)
+# 시스템 프롬프트(세션 학습 포함) + 현재 질문은 항상 포함, 남은 예산을 대화 이력/DB에 가중치대로 배분
+CONTEXT_BUDGET_SETTINGS = {
+    'input_tokens': {        # 모델별 입력 토큰 예산 (컨텍스트 창보다 작게: 비용/지연 제한)
+        'gemini-pro': 48000,
+        'gemini-flash': 32000,
+        'gpt': 24000,
+        'claude': 32000,
+    },
+    'default_input_tokens': 24000,
+    'max_history_messages': 50,  # 예산이 남아도 최대 메시지 수 (25턴)
+    # 모델별 토큰 근사치 (글자당 토큰: 한글 음절 / ASCII / 기타 문자)
+    'token_ratios': {
+        'gemini': {'hangul': 0.6, 'ascii': 0.25, 'other': 0.8},
+        'gpt': {'hangul': 0.7, 'ascii': 0.25, 'other': 1.0},
+        'claude': {'hangul': 1.0, 'ascii': 0.28, 'other': 1.0},
+    },
+}
+
+# 3-4. 롤링 대화 요약 (세션이 길어져도 최근 대화만 원문 전달)
+ROLLING_SUMMARY_SETTINGS = {
+    'keep_messages': 12,    # 원문으로 보낼 최근 메시지 수 (6턴), 그 이전은 요약으로
+    'refresh_after': 8,     # 요약에 아직 안 들어간 이전 메시지가 이만큼 쌓이면 백그라운드 갱신
+    'model': 'gemini-flash',  # 요약 모델 (비활성화 시 대화 모델 사용)
+    'max_chars': 1500,      # 요약 최대 길이
+}
+
+# 3-5. 모델 호출 재시도/차단/대체 (resilience.py)
+RESILIENCE_SETTINGS = {
+    'max_attempts': 3,        # 모델당 최대 시도 (일시 오류만 재시도: 429/5xx/timeout/연결 오류)
+    'backoff_base': 1.0,      # 재시도 대기 = base * 2^(시도-1) × 지터(0.5~1.0) (초)
+    'backoff_max': 8.0,
+    'retry_after_max': 20.0,  # 429 Retry-After가 이보다 길면 기다리지 않고 다음 모델로
+    'deadline': 120.0,        # 요청 전체 재시도 한도 (초), 넘으면 대기 없이 실패/대체
+    'breaker_threshold': 5,   # 모델별 연속 일시 오류 수 → 차단 (호출 없이 바로 대체 모델)
+    'breaker_cooldown': 30.0, # 차단 후 시험 호출까지 대기 (초)
+    # 대체 순서 (활성화/차단 안 된 모델만), 다른 공급자로 넘어가면 장애 중에도 응답
+    'fallbacks': {
+        'gemini-pro': ['gemini-flash', 'claude', 'gpt'],
+        'gemini-flash': ['gemini-pro', 'gpt', 'claude'],
+        'gpt': ['claude', 'gemini-pro'],
+        'claude': ['gpt', 'gemini-pro'],
+    },
+}
+
 HINOBALANCE_PROMPT_HEADER = """# JNext 스크립트 개발 프로젝트 (Phase 1: 하이노밸런스)
 
 너는 "JNext 스크립트"의 일부인 "하이노밸런스(HINOBALANCE)" 전담 분석 AI다.
@@ -31,16 +96,32 @@ HINOBALANCE_PROMPT_HEADER = """# JNext 스크립트 개발 프로젝트 (Phase 1
 **중요: 답변은 반드시 마크다운 형식으로 작성하며, JSON 형식은 절대 사용하지 않는다.**"""
 
 
+# 렌더링한 학습 섹션 메모 (project_id, limit) → (생성 시각, 섹션)
+# save_session_learning이 해당 프로젝트를 무효화, 다른 프로세스의 저장은 TTL 후 반영
+_LEARNING_SECTION_CACHE = {}
+LEARNING_SECTION_TTL = 10 * 60  # 초
+
+
+def invalidate_learning_section(project_id: str) -> None:
+   """프로젝트 학습 섹션 메모 삭제 (새 학습 저장 시)"""
+   for key in [key for key in _LEARNING_SECTION_CACHE if key[0] == project_id]:
+      _LEARNING_SECTION_CACHE.pop(key, None)
+
+
 def _build_recent_learning_section(project_id: str, limit: int = 3) -> str:
-   """세션 학습 내용을 불러와 섹션 문자열로 반환."""
+   """세션 학습 내용을 불러와 섹션 문자열로 반환 (메모 적중 시 Firestore 조회 없음)."""
    if not project_id:
       return ""
+   cached = _LEARNING_SECTION_CACHE.get((project_id, limit))
+   if cached and time.time() - cached[0] < LEARNING_SECTION_TTL:
+      return cached[1]
    try:
       from .session_learning import load_recent_learning  # 지연 임포트로 순환 방지
 
       recent_learning = load_recent_learning(project_id, limit=limit)
+      section = ""
       if recent_learning:
-         return f"""
+         section = f"""
 
 ## 📚 최근 세션에서 학습한 내용
 {recent_learning}
@@ -48,8 +129,11 @@ def _build_recent_learning_section(project_id: str, limit: int = 3) -> str:
 **위 학습 내용을 참고하여 J님의 선호도와 피드백을 반영하세요.**
 """
    except Exception as exc:
+      # 색인 누락 등 실패도 TTL 동안 캐시 (요청마다 실패하는 쿼리 반복 방지)
       print(f"[JNext] Warning: 세션 학습 내용을 불러오지 못했습니다: {exc}")
-   return ""
+      section = ""
+   _LEARNING_SECTION_CACHE[(project_id, limit)] = (time.time(), section)
+   return section
 
 
 def get_hinobalance_prompt(project_id: str = 'hinobalance') -> str:
@@ -6,9 +6,18 @@ Phase 7: JSON 스키마 검증
 """
 from django.conf import settings
 from google import genai
+import asyncio
 import json
+import math
 import re
-from . import ai_config
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from . import ai_config, clients
+from .resilience import call_with_fallback, call_with_fallback_async, stream_with_fallback
+from .response_cache import get_response_cache, make_key
+
+# 시스템 프롬프트 첫 줄 (모델 이름) 접두어
+NAME_HEADER_PREFIX = "🎯 당신의 이름: "
 
 
 def validate_ai_response(response):
@@ -176,7 +185,7 @@ def classify_intent(user_message):
     }
 
 
-def call_ai_model(model_name, user_message, system_prompt, db_context, temperature=None, mode='hybrid', conversation_history=None):
+def call_ai_model(model_name, user_message, system_prompt, db_context, temperature=None, mode='hybrid', conversation_history=None, cache=False):
     """
     AI 모델 호출 (멀티 모델 지원)
     
@@ -188,17 +197,86 @@ def call_ai_model(model_name, user_message, system_prompt, db_context, temperatu
         temperature: 창의성 수준 (None이면 mode에 따라 자동 설정)
         mode: 'organize' | 'hybrid' | 'analysis' | 'v2'
         conversation_history: 이전 대화 기록 (v2에서는 빈 리스트)
+        cache: True면 같은 요청의 응답을 디스크 캐시에서 재사용 (낮은 temperature 호출용)
     
     Returns:
-        dict: JSON 응답 (AI_RESPONSE_SCHEMA 형식)
+        dict: JSON 응답 (AI_RESPONSE_SCHEMA 형식, 캐시 적중 시 _cached=True)
     """
     # Temperature 자동 설정 (ai_config에서 가져오기)
     if temperature is None:
         temperature = ai_config.TEMPERATURE_SETTINGS.get(mode, 0.5)
     
+    messages, final_system_prompt = _build_messages(
+        model_name, user_message, system_prompt, db_context, conversation_history
+    )
+    
+    if not cache:
+        return _dispatch(model_name, messages, final_system_prompt, temperature)
+    
+    key = _cache_key(model_name, messages, final_system_prompt, temperature)
+    cached = get_response_cache().get(key)
+    if cached is not None:
+        print(f"[ResponseCache] hit ({model_name})")
+        return dict(cached, _cached=True)
+    
+    result = _dispatch(model_name, messages, final_system_prompt, temperature)
+    if _is_cacheable(result):
+        get_response_cache().put(key, result)
+    return result
+
+
+def _cache_key(model_name, messages, system_prompt, temperature):
+    """응답 캐시 키 (응답을 결정하는 요청 전체)"""
+    return make_key(
+        model=model_name,
+        model_version=settings.AI_MODELS.get(model_name, {}).get('model'),
+        system_prompt=system_prompt,
+        messages=messages,
+        temperature=temperature,
+        schema=settings.AI_RESPONSE_SCHEMA,
+    )
+
+
+def _is_cacheable(result):
+    """실패/파싱 오류/대체 모델 응답은 캐시하지 않음"""
+    return (
+        isinstance(result, dict) and 'error' not in result
+        and not result.get('_error') and not result.get('_fallback_from')
+    )
+
+
+def _resolve_model(model_name):
+    """'gemini'/빈 값 → 기본 모델, 알 수 없는 모델은 ValueError"""
+    if model_name == 'gemini' or not model_name:
+        return settings.DEFAULT_AI_MODEL
+    if model_name not in ['gemini-flash', 'gemini-pro', 'gpt', 'claude', 'all']:
+        raise ValueError(f"Unknown model: {model_name}")
+    return model_name
+
+
+def _dispatch(model_name, messages, final_system_prompt, temperature):
+    """모델별 호출 분기 (일시 오류 재시도, 장애 시 대체 모델 - resilience.py)"""
+    model_key = _resolve_model(model_name)
+    
+    if model_key == 'all':
+        # 멀티 모델: 같은 대화 이력/프롬프트로 동시 호출 후 합의
+        return _call_all_models(messages, final_system_prompt, temperature=temperature)
+    
+    def call(key):
+        return _call_single_model(key, messages, _system_prompt_for(key, final_system_prompt), temperature)
+
+    return call_with_fallback(model_key, call)
+
+
+def _build_messages(model_name, user_message, system_prompt, db_context, conversation_history=None):
+    """
+    Gemini 형식 메시지 리스트 + 최종 시스템 프롬프트 구성
+    
+    Returns:
+        tuple: (messages, final_system_prompt)
+    """
     # 모델 정보 주입 (ai_config에서 가져오기)
-    model_name_korean = ai_config.MODEL_ALIASES.get(model_name, model_name)
-    enhanced_prompt = f"🎯 당신의 이름: {model_name_korean}\n\n{system_prompt}"
+    enhanced_prompt = _name_header(model_name) + system_prompt
     
     # Gemini Native History: 메시지 리스트 구성
     messages = []
@@ -218,29 +296,295 @@ def call_ai_model(model_name, user_message, system_prompt, db_context, temperatu
     if db_context:
         final_system_prompt += f"\n\n[참고할 DB 지식]\n{db_context}"
     
-    # Gemini 계열 (Flash/Pro) - Native History 전달
-    if model_name in ['gemini-flash', 'gemini-pro']:
-        return _call_gemini(messages, final_system_prompt, model_key=model_name, temperature=temperature)
+    return messages, final_system_prompt
+
+
+def _name_header(model_name):
+    """시스템 프롬프트 첫 줄 (모델 이름, ai_config.MODEL_ALIASES)"""
+    return f"{NAME_HEADER_PREFIX}{ai_config.MODEL_ALIASES.get(model_name, model_name)}\n\n"
+
+
+def _system_prompt_for(model_key, final_system_prompt):
+    """
+    실제 호출하는 모델의 이름으로 프롬프트 첫 줄 교체
+
+    final_system_prompt는 요청한 모델 기준이라 대체 모델(resilience.py)이 다른 이름으로 답하지 않도록
+    """
+    if final_system_prompt.startswith(NAME_HEADER_PREFIX):
+        final_system_prompt = final_system_prompt.split('\n\n', 1)[-1]
+    return _name_header(model_key) + final_system_prompt
+
+
+async def call_ai_model_async(model_name, user_message, system_prompt, db_context, temperature=None, mode='hybrid', conversation_history=None, cache=False):
+    """
+    AI 모델 비동기 호출 (ASGI 뷰용, 인자/반환은 call_ai_model과 동일)
+    
+    모델 응답을 기다리는 동안 워커 스레드를 점유하지 않음
+    """
+    if temperature is None:
+        temperature = ai_config.TEMPERATURE_SETTINGS.get(mode, 0.5)
     
-    # 기본값 fallback
-    elif model_name == 'gemini' or not model_name:
-        return _call_gemini(messages, final_system_prompt, model_key=settings.DEFAULT_AI_MODEL, temperature=temperature)
+    messages, final_system_prompt = _build_messages(
+        model_name, user_message, system_prompt, db_context, conversation_history
+    )
     
-    elif model_name == 'gpt':
-        # GPT Native History 적용
-        return _call_gpt(messages, final_system_prompt, temperature=temperature)
+    if not cache:
+        return await _dispatch_async(model_name, messages, final_system_prompt, temperature)
     
-    elif model_name == 'claude':
-        # Claude Native History 적용
-        return _call_claude(messages, final_system_prompt, temperature=temperature)
+    key = _cache_key(model_name, messages, final_system_prompt, temperature)
+    cached = await asyncio.to_thread(get_response_cache().get, key)
+    if cached is not None:
+        print(f"[ResponseCache] hit ({model_name})")
+        return dict(cached, _cached=True)
     
-    elif model_name == 'all':
-        # 멀티 모델은 문자열로 변환 필요 (향후 개선)
-        full_message = messages[-1]['parts'][0]['text'] if mode == 'v2' else user_message
-        return _call_all_models(full_message, system_prompt, temperature=temperature)
+    result = await _dispatch_async(model_name, messages, final_system_prompt, temperature)
+    if _is_cacheable(result):
+        await asyncio.to_thread(get_response_cache().put, key, result)
+    return result
+
+
+async def _dispatch_async(model_name, messages, final_system_prompt, temperature):
+    """모델별 비동기 호출 분기 (재시도 대기는 asyncio.sleep - 워커 스레드 점유 없음)"""
+    model_key = _resolve_model(model_name)
     
-    else:
-        raise ValueError(f"Unknown model: {model_name}")
+    if model_key == 'all':
+        # 멀티 모델은 스레드 풀 경로를 스레드에서 실행
+        return await asyncio.to_thread(_dispatch, model_key, messages, final_system_prompt, temperature)
+    
+    def call(key):
+        return _call_single_model_async(key, messages, _system_prompt_for(key, final_system_prompt), temperature)
+
+    return await call_with_fallback_async(model_key, call)
+
+
+async def _call_single_model_async(model_key, messages, system_prompt, temperature):
+    """단일 모델 비동기 호출"""
+    if model_key in ['gemini-flash', 'gemini-pro']:
+        return await _call_gemini_async(messages, system_prompt, model_key=model_key, temperature=temperature)
+    elif model_key == 'gpt':
+        return await _call_gpt_async(messages, system_prompt, temperature=temperature)
+    elif model_key == 'claude':
+        return await _call_claude_async(messages, system_prompt, temperature=temperature)
+    raise ValueError(f"Unknown model: {model_key}")
+
+
+def stream_ai_model(model_name, user_message, system_prompt, db_context, temperature=None, mode='v2', conversation_history=None):
+    """
+    AI 모델 스트리밍 호출 (토큰이 생성되는 대로 텍스트 조각 반환)
+    
+    JSON 스키마 없이 일반 텍스트(마크다운)로 응답받음 → 첫 토큰부터 바로 표시 가능
+    
+    Args:
+        model_name: 'gemini-flash' | 'gemini-pro' | 'gpt' | 'claude' ('all'은 미지원)
+        나머지는 call_ai_model과 동일
+    
+    Yields:
+        str: 텍스트 조각
+    """
+    if temperature is None:
+        temperature = ai_config.TEMPERATURE_SETTINGS.get(mode, 0.5)
+    
+    messages, final_system_prompt = _build_messages(
+        model_name, user_message, system_prompt, db_context, conversation_history
+    )
+    
+    model_key = _resolve_model(model_name)
+    if model_key == 'all':
+        raise ValueError(f"Streaming not supported for model: {model_name}")
+    
+    # 첫 조각 전까지만 재시도/대체 모델 (resilience.py)
+    def call(key):
+        return _open_stream(key, messages, _system_prompt_for(key, final_system_prompt), temperature)
+
+    return stream_with_fallback(model_key, call)
+
+
+def _open_stream(model_key, messages, system_prompt, temperature):
+    """단일 모델 스트림"""
+    if model_key in ['gemini-flash', 'gemini-pro']:
+        return _stream_gemini(messages, system_prompt, model_key=model_key, temperature=temperature)
+    elif model_key == 'gpt':
+        return _stream_gpt(messages, system_prompt, temperature=temperature)
+    elif model_key == 'claude':
+        return _stream_claude(messages, system_prompt, temperature=temperature)
+    raise ValueError(f"Streaming not supported for model: {model_key}")
+
+
+def _stream_gemini(messages, system_prompt, model_key='gemini-pro', temperature=0.5):
+    """Gemini 스트리밍 (generate_content_stream)"""
+    if model_key not in settings.AI_MODELS:
+        model_key = 'gemini-pro'  # fallback
+    
+    if not settings.AI_MODELS[model_key]['enabled']:
+        raise Exception(f"{model_key} not initialized")
+    
+    client = settings.AI_MODELS[model_key]['client']
+    model = settings.AI_MODELS[model_key]['model']
+    
+    from google.genai import types
+    
+    print(f"[Stream] Gemini {model} (temperature={temperature}, {len(messages)} turns)")
+    
+    for chunk in client.models.generate_content_stream(
+        model=model,
+        contents=messages,
+        config=types.GenerateContentConfig(
+            systemInstruction=system_prompt,
+            temperature=temperature,
+            maxOutputTokens=32768,
+        )
+    ):
+        if chunk.text:
+            yield chunk.text
+
+
+def _stream_gpt(messages, system_prompt, temperature=0.7):
+    """GPT 스트리밍 (stream=True)"""
+    if not settings.AI_MODELS['gpt']['enabled']:
+        raise Exception("GPT not initialized")
+    
+    client = settings.GPT_CLIENT
+    model = settings.AI_MODELS['gpt']['model']
+    
+    api_messages = [{"role": "system", "content": system_prompt}] + _to_chat_messages(messages)
+    
+    print(f"[Stream] GPT {model} (temperature={temperature}, {len(messages)} turns)")
+    
+    stream = client.chat.completions.create(
+        model=model,
+        messages=api_messages,
+        temperature=temperature,
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _stream_claude(messages, system_prompt, temperature=0.7):
+    """Claude 스트리밍 (messages.stream)"""
+    if not settings.AI_MODELS['claude']['enabled']:
+        raise Exception("Claude not initialized")
+    
+    client = settings.AI_MODELS['claude']['client']
+    model = settings.AI_MODELS['claude']['model']
+    
+    api_messages = _to_chat_messages(messages)
+    
+    print(f"[Stream] Claude {model} (temperature={temperature}, {len(messages)} turns)")
+    
+    with client.messages.stream(
+        model=model,
+        max_tokens=4096,
+        temperature=temperature,
+        system=system_prompt,
+        messages=api_messages
+    ) as stream:
+        for text in stream.text_stream:
+            yield text
+
+
+def _parse_json_answer(content, model_key, model_version):
+    """JSON 응답 파싱 + 스키마 검증 (파싱 실패 시 원문을 answer로)"""
+    try:
+        result = json.loads(content)
+        result['_model'] = model_key
+        result['_model_version'] = model_version
+        return validate_ai_response(result)
+    except json.JSONDecodeError as e:
+        return {
+            'answer': content,
+            'claims': [],
+            'evidence': [],
+            'missing_info': ['JSON 응답 파싱 실패'],
+            'confidence': 0.5,
+            'actions_suggested': [],
+            '_model': model_key,
+            '_error': str(e)
+        }
+
+
+def _to_chat_messages(messages):
+    """Gemini 형식 → OpenAI/Anthropic 형식 ('model' → 'assistant')"""
+    return [
+        {"role": 'assistant' if msg['role'] == 'model' else msg['role'], "content": msg['parts'][0]['text']}
+        for msg in messages
+    ]
+
+
+def _json_instruction(system_prompt):
+    """JSON 모드가 없는 모델용: 시스템 프롬프트에 응답 스키마 추가"""
+    return f"{system_prompt}\n\n반드시 다음 JSON 형식으로만 응답하세요:\n{json.dumps(settings.AI_RESPONSE_SCHEMA, ensure_ascii=False, indent=2)}"
+
+
+async def _call_gemini_async(messages, system_prompt, model_key='gemini-pro', temperature=0.5):
+    """Gemini 비동기 호출 (client.aio, 현재 이벤트 루프 전용 클라이언트)"""
+    if model_key not in settings.AI_MODELS:
+        model_key = 'gemini-pro'  # fallback
+    
+    if not settings.AI_MODELS[model_key]['enabled']:
+        raise Exception(f"{model_key} not initialized")
+    
+    client = clients.get_gemini_async_client(settings.GEMINI_API_KEY)
+    model = settings.AI_MODELS[model_key]['model']
+    
+    from google.genai import types
+    
+    print(f"[Async] Gemini {model} (temperature={temperature}, {len(messages)} turns)")
+    
+    response = await client.models.generate_content(
+        model=model,
+        contents=messages,
+        config=types.GenerateContentConfig(
+            systemInstruction=system_prompt,
+            temperature=temperature,
+            maxOutputTokens=32768,
+            responseMimeType='application/json',
+            responseSchema=settings.AI_RESPONSE_SCHEMA,
+        )
+    )
+    return _parse_json_answer(response.text, model_key, model)
+
+
+async def _call_gpt_async(messages, system_prompt, temperature=0.7):
+    """GPT 비동기 호출 (AsyncOpenAI, 비동기 클라이언트가 없으면 스레드에서 동기 호출)"""
+    if not settings.AI_MODELS['gpt']['enabled']:
+        raise Exception("GPT not initialized")
+    
+    client = clients.get_openai_async_client(settings.OPENAI_API_KEY)
+    if client is None:
+        return await asyncio.to_thread(_call_gpt, messages, system_prompt, temperature)
+    model = settings.AI_MODELS['gpt']['model']
+    
+    # 호출 오류는 그대로 전달 (재시도/대체는 resilience.py)
+    response = await client.chat.completions.create(
+        model=model,
+        messages=[{"role": "system", "content": _json_instruction(system_prompt)}] + _to_chat_messages(messages),
+        temperature=temperature,
+        response_format={"type": "json_object"}
+    )
+    return _parse_json_answer(response.choices[0].message.content, 'gpt', model)
+
+
+async def _call_claude_async(messages, system_prompt, temperature=0.7):
+    """Claude 비동기 호출 (AsyncAnthropic, 비동기 클라이언트가 없으면 스레드에서 동기 호출)"""
+    if not settings.AI_MODELS['claude']['enabled']:
+        raise Exception("Claude not initialized")
+    
+    client = clients.get_anthropic_async_client(settings.ANTHROPIC_API_KEY)
+    if client is None:
+        return await asyncio.to_thread(_call_claude, messages, system_prompt, temperature)
+    model = settings.AI_MODELS['claude']['model']
+    
+    # 호출 오류는 그대로 전달 (재시도/대체는 resilience.py)
+    response = await client.messages.create(
+        model=model,
+        max_tokens=4096,
+        temperature=temperature,
+        system=_json_instruction(system_prompt),
+        messages=_to_chat_messages(messages)
+    )
+    return _parse_json_answer(response.content[0].text, 'claude', model)
 
 
 def _call_gemini(messages, system_prompt, model_key='gemini-pro', temperature=0.5):
@@ -357,17 +701,6 @@ def _call_gpt(messages, system_prompt, temperature=0.7):
             '_model': 'gpt',
             '_error': str(e)
         }
-    except Exception as e:
-        return {
-            'answer': f'GPT 호출 실패: {str(e)}',
-            'claims': [],
-            'evidence': [],
-            'missing_info': ['GPT API 호출 실패'],
-            'confidence': 0.0,
-            'actions_suggested': [],
-            '_model': 'gpt',
-            '_error': str(e)
-        }
 
 
 def _call_claude(messages, system_prompt, temperature=0.7):
@@ -419,44 +752,216 @@ def _call_claude(messages, system_prompt, temperature=0.7):
             '_model': 'claude',
             '_error': str(e)
         }
-    except Exception as e:
-        return {
-            'answer': f'Claude 호출 실패: {str(e)}',
-            'claims': [],
-            'evidence': [],
-            'confidence': 0.0,
-            '_model': 'claude',
-            '_error': str(e)
-        }
 
 
-def _call_all_models(full_message, system_prompt):
+def stream_all_models(user_message, system_prompt, db_context, temperature=None, mode='v2', conversation_history=None):
     """
-    3두/2두 체계: 모든 활성화된 모델 호출 후 비교
+    멀티 모델 부분 결과 스트리밍 (인자는 call_ai_model과 동일)
+    
+    Yields:
+        tuple: (model_key, result)  도착하는 순서대로
     """
-    results = {}
-    
-    for model_name, config in settings.AI_MODELS.items():
-        if config['enabled']:
-            try:
-                if model_name == 'gemini':
-                    results[model_name] = _call_gemini(full_message, system_prompt)
-                elif model_name == 'gpt':
-                    results[model_name] = _call_gpt(full_message, system_prompt)
-                elif model_name == 'claude':
-                    results[model_name] = _call_claude(full_message, system_prompt)
-            except Exception as e:
-                results[model_name] = {'error': str(e)}
-    
-    # 향후: 투표/합의 알고리즘 추가
-    # 현재는 모든 결과 반환
+    if temperature is None:
+        temperature = ai_config.TEMPERATURE_SETTINGS.get(mode, 0.5)
+    
+    messages, final_system_prompt = _build_messages(
+        'all', user_message, system_prompt, db_context, conversation_history
+    )
+    yield from iter_all_models(messages, final_system_prompt, temperature=temperature)
+
+
+def _call_single_model(model_key, messages, system_prompt, temperature):
+    """멀티 모델 실행용 단일 모델 호출"""
+    if model_key in ['gemini-flash', 'gemini-pro']:
+        return _call_gemini(messages, system_prompt, model_key=model_key, temperature=temperature)
+    elif model_key == 'gpt':
+        return _call_gpt(messages, system_prompt, temperature=temperature)
+    elif model_key == 'claude':
+        return _call_claude(messages, system_prompt, temperature=temperature)
+    raise ValueError(f"Unknown model: {model_key}")
+
+
+def _call_single_model_resilient(model_key, messages, system_prompt, temperature):
+    """멀티 모델 실행용: 재시도/차단만 적용 (대체하면 다른 모델 응답과 중복), 프롬프트 이름은 모델별로"""
+    def call(key):
+        return _call_single_model(key, messages, _system_prompt_for(key, system_prompt), temperature)
+
+    return call_with_fallback(model_key, call, fallback=False)
+
+
+def iter_all_models(messages, system_prompt, temperature=0.5):
+    """
+    활성화된 모든 모델 동시 호출, 도착하는 순서대로 결과 반환
+    
+    모델별 제한 시간(MULTI_MODEL_SETTINGS['timeouts'])을 넘기면 해당 모델만 timeout 처리
+    
+    Yields:
+        tuple: (model_key, result)  result는 AI_RESPONSE_SCHEMA 응답 또는 {'error': ...}
+    """
+    config = ai_config.MULTI_MODEL_SETTINGS
+    models = [
+        key for key in config['models']
+        if settings.AI_MODELS.get(key, {}).get('enabled')
+    ]
+    if not models:
+        return
+    
+    timeouts = {key: config['timeouts'].get(key, 60) for key in models}
+    executor = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix='multi-model')
+    start = time.monotonic()
+    futures = {
+        executor.submit(_call_single_model_resilient, key, messages, system_prompt, temperature): key
+        for key in models
+    }
+    pending = set(futures)
+    
+    try:
+        while pending:
+            elapsed = time.monotonic() - start
+            
+            # 제한 시간 지난 모델 제외 (스레드는 백그라운드에서 종료)
+            for future in list(pending):
+                key = futures[future]
+                if elapsed >= timeouts[key] and not future.done():
+                    pending.discard(future)
+                    future.cancel()
+                    print(f"[멀티 모델] {key} timeout ({timeouts[key]}s)")
+                    yield key, {'error': f'timeout ({timeouts[key]}s)', '_elapsed': round(elapsed, 2)}
+            if not pending:
+                break
+            
+            next_deadline = min(timeouts[futures[future]] for future in pending) - elapsed
+            done, _ = wait(pending, timeout=max(next_deadline, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'error': str(e)}
+                result['_elapsed'] = round(time.monotonic() - start, 2)
+                print(f"[멀티 모델] {key} 응답 ({result['_elapsed']}s)")
+                yield key, result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _is_successful(result):
+    """합의에 포함할 응답인지 (호출 실패/timeout 제외)"""
+    if 'error' in result or not result.get('answer'):
+        return False
+    return not (result.get('_error') and result.get('confidence') == 0.0)
+
+
+def _claim_ngrams(text):
+    """주장 비교용 글자 2-gram (공백/문장부호 무시)"""
+    compact = re.sub(r'[\W_]+', '', str(text).lower())
+    if len(compact) < 2:
+        return {compact} if compact else set()
+    return {compact[i:i + 2] for i in range(len(compact) - 1)}
+
+
+def merge_model_responses(results):
+    """
+    모델별 응답 합의 (claims/evidence 병합)
+    
+    - claims: 글자 2-gram 유사도로 같은 주장끼리 묶고, 과반 모델이 낸 주장만 합의로 채택
+    - evidence: (collection, doc_id, field) 기준 중복 제거, 근거를 낸 모델 목록 기록
+    - answer: 합의 주장을 가장 많이 포함한 모델의 답변
+    
+    Args:
+        results: {model_key: result}
+    
+    Returns:
+        dict: AI_RESPONSE_SCHEMA 형식 + _consensus
+    """
+    threshold = ai_config.MULTI_MODEL_SETTINGS.get('claim_similarity', 0.6)
+    successful = {key: result for key, result in results.items() if _is_successful(result)}
+    
+    if not successful:
+        errors = ', '.join(f"{key}: {result.get('error') or result.get('_error')}" for key, result in results.items())
+        raise Exception(f"모든 모델 호출 실패 ({errors})")
+    
+    # 1. 주장 묶기
+    groups = []  # [{'claim': str, 'ngrams': set, 'models': set}]
+    for key, result in successful.items():
+        for claim in result.get('claims', []):
+            if not isinstance(claim, str) or not claim.strip():
+                continue
+            ngrams = _claim_ngrams(claim)
+            best, best_score = None, 0.0
+            for group in groups:
+                union = ngrams | group['ngrams']
+                score = len(ngrams & group['ngrams']) / len(union) if union else 0.0
+                if score > best_score:
+                    best, best_score = group, score
+            if best is not None and best_score >= threshold:
+                best['models'].add(key)
+                if len(claim) > len(best['claim']):
+                    best['claim'] = claim  # 더 구체적인 표현 사용
+            else:
+                groups.append({'claim': claim, 'ngrams': ngrams, 'models': {key}})
+    
+    quorum = math.ceil(len(successful) / 2) if len(successful) > 1 else 1
+    groups.sort(key=lambda group: len(group['models']), reverse=True)
+    agreed = [group for group in groups if len(group['models']) >= quorum]
+    disputed = [group for group in groups if len(group['models']) < quorum]
+    
+    # 2. 근거 병합
+    evidence_map = {}
+    for key, result in successful.items():
+        for item in result.get('evidence', []):
+            if not isinstance(item, dict):
+                continue
+            # value는 리스트/dict일 수 있음 (키워드 배열 등) → 해시 가능한 문자열로
+            value = json.dumps(item.get('value'), sort_keys=True, ensure_ascii=False, default=str)
+            evidence_key = (item.get('collection'), item.get('doc_id'), item.get('field'), value)
+            merged = evidence_map.setdefault(evidence_key, dict(item, models=[]))
+            if key not in merged['models']:
+                merged['models'].append(key)
+    evidence = sorted(evidence_map.values(), key=lambda item: len(item['models']), reverse=True)
+    
+    # 3. 대표 답변: 합의 주장을 가장 많이 낸 모델 (동률이면 confidence)
+    def support(key):
+        return (sum(1 for group in agreed if key in group['models']), successful[key].get('confidence', 0.0))
+    best_model = max(successful, key=support)
+    
+    def unique(items):
+        seen = []
+        for item in items:
+            if item not in seen:
+                seen.append(item)
+        return seen
+    
     return {
-        'answer': '멀티 모델 응답 (아래 참조)',
-        'claims': [],
-        'evidence': [],
-        'missing_info': [],
-        'confidence': 0.0,
-        'actions_suggested': [],
-        '_model': 'all',
-        '_responses': results
+        'answer': successful[best_model].get('answer', ''),
+        'claims': [group['claim'] for group in agreed],
+        'evidence': evidence,
+        'missing_info': unique(info for result in successful.values() for info in result.get('missing_info', [])),
+        # 실패한 모델은 0으로 계산 (응답률이 낮을수록 신뢰도 하락)
+        'confidence': round(sum(result.get('confidence', 0.0) for result in successful.values()) / len(results), 3),
+        'actions_suggested': unique(
+            action for result in successful.values() for action in result.get('actions_suggested', [])
+        ),
+        '_consensus': {
+            'best_model': best_model,
+            'models_responded': list(successful),
+            'models_failed': [key for key in results if key not in successful],
+            'agreed_claims': [{'claim': group['claim'], 'models': sorted(group['models'])} for group in agreed],
+            'disputed_claims': [{'claim': group['claim'], 'models': sorted(group['models'])} for group in disputed],
+        },
     }
+
+
+def _call_all_models(messages, system_prompt, temperature=0.5):
+    """
+    3두/2두 체계: 활성화된 모든 모델 동시 호출 후 합의
+    
+    전체 소요 시간 = 가장 느린 모델 (모델별 제한 시간 내), 실패/timeout 모델은 제외하고 합의
+    """
+    results = dict(iter_all_models(messages, system_prompt, temperature=temperature))
+    
+    merged = merge_model_responses(results)
+    merged['_model'] = 'all'
+    merged['_responses'] = results
+    return merged
@@ -3,3 +3,18 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+
+def start_job_queue():
+    """
+    백그라운드 작업 큐 워커 시작 (웹 서버 진입점 config/asgi.py, config/wsgi.py에서 호출)
+
+    AppConfig.ready()는 collectstatic/shell 등 모든 manage.py 명령에서도 실행되므로 사용하지 않음
+    이전 실행에서 남은 작업부터 처리 (작업 종류별 처리 함수 등록 후 시작)
+    """
+    from django.conf import settings
+
+    if getattr(settings, 'JOB_QUEUE_AUTOSTART', False):
+        from . import raw_storage, rolling_summary, semantic_index, session_learning  # noqa: F401
+        from .job_queue import get_job_queue
+        get_job_queue().start()
@@ -4,8 +4,8 @@
 """
 from firebase_admin import firestore
 from datetime import datetime
-import google.generativeai as genai
-import os
+
+from .clients import get_legacy_gemini_model
 
 db = firestore.client()
 
@@ -14,8 +14,7 @@ class HinoAutomation:
     
     def __init__(self):
         self.db = db
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.model = get_legacy_gemini_model('gemini-2.0-flash-exp')  # configure는 프로세스당 한 번
     
     # ===== 1. 문서 통합 =====
     def integrate_documents(self, category, output_name, versions=['summary', 'medium', 'full']):
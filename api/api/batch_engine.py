@@ -0,0 +1,352 @@
+"""
+배치 작업 엔진 (전체 문서 업그레이드 등 대량 AI 처리 스크립트용)
+LLM 호출을 한 번에 하나씩 돌리면 전체 처리에 몇 시간, 중간에 죽으면 처음부터
+
+- run_parallel: 제한된 워커 풀로 동시 처리, 일시 오류(429/5xx)는 재시도
+- RateLimiter: 분당 요청/토큰 한도, 429 Retry-After 동안 풀 전체 대기
+- Checkpoint: 완료한 작업 키 + 입력 해시를 로컬 파일에 기록 → 재실행 시 바뀐 것만 처리
+- BatchWriter: Firestore 쓰기를 WriteBatch로 모아 커밋, 커밋된 작업만 체크포인트에 완료 기록
+- open_bulk_writer: 대량 업로드/마이그레이션용 BulkWriter (흐름 제어 + 일시 오류 재시도)
+
+Django 설정 없이 실행되는 배치 스크립트에서 사용
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from .resilience import backoff_delay, is_retryable, retry_after
+
+
+# 기본값
+DEFAULT_CHECKPOINT_DIR = Path(__file__).resolve().parent.parent / 'cache' / 'checkpoints'
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_ATTEMPTS = 4
+
+# Firestore WriteBatch 최대 쓰기 수
+BATCH_LIMIT = 500
+
+# 배치 재시도 대기 (요청 경로보다 길게: 분당 한도가 풀릴 때까지)
+BATCH_BACKOFF = {'backoff_base': 5.0, 'backoff_max': 120.0}
+
+# BulkWriter: 초당 최대 쓰기 수, 재시도할 gRPC 상태 (DEADLINE_EXCEEDED, RESOURCE_EXHAUSTED, ABORTED, INTERNAL, UNAVAILABLE)
+BULK_MAX_OPS = 500
+BULK_RETRYABLE_CODES = {4, 8, 10, 13, 14}
+BULK_ALREADY_EXISTS = 6
+
+
+def content_hash(*values):
+    """입력 값들의 해시 (dict 키 순서 무관, 날짜 등은 문자열로)"""
+    payload = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RateLimiter:
+    """
+    분당 요청 수 / 토큰 수 한도 (토큰 버킷)
+
+    acquire(tokens)가 한도 안에서 바로 반환, 초과 시 채워질 때까지 대기
+    pause(seconds): 429 등으로 서버가 대기를 요구하면 모든 워커가 함께 대기
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens=0):
+        """요청 1건 + tokens만큼 한도 사용 (한도보다 큰 요청은 한도 전체를 기다림)"""
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                waits = [self._paused_until - now]
+                if self.requests_per_minute and self._requests < 1:
+                    waits.append((1 - self._requests) * 60 / self.requests_per_minute)
+                if self.tokens_per_minute and self._tokens < tokens:
+                    waits.append((tokens - self._tokens) * 60 / self.tokens_per_minute)
+                wait = max(waits)
+                if wait <= 0:
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= tokens
+                    return
+            time.sleep(min(wait, 5.0))
+
+    def consume(self, tokens):
+        """실제 사용량이 추정보다 많았을 때 차이만큼 추가 차감 (음수면 돌려받음)"""
+        if not self.tokens_per_minute or not tokens:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.tokens_per_minute, self._tokens - tokens)
+
+    def pause(self, seconds):
+        """모든 워커 seconds초 대기"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class Checkpoint:
+    """
+    작업 체크포인트 (JSON 파일)
+
+    done: 작업 키 → {'hash': 입력 해시, 'at': 완료 시각, ...기록}
+    failed: 작업 키 → {'error', 'attempts', 'at'} (다음 실행 때 다시 처리)
+    """
+
+    def __init__(self, name, directory=None):
+        self.path = Path(directory or DEFAULT_CHECKPOINT_DIR) / f"{name}.json"
+        self._lock = threading.Lock()
+        self.done = {}
+        self.failed = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.done = data.get('done', {})
+            self.failed = data.get('failed', {})
+            print(f"[Checkpoint] {self.path.name}: 완료 {len(self.done)}개, 실패 {len(self.failed)}개")
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[Checkpoint] {self.path.name} 읽기 실패, 새로 시작: {e}")
+
+    def is_done(self, key, input_hash):
+        """같은 입력으로 이미 완료한 작업인지"""
+        entry = self.done.get(key)
+        return entry is not None and entry.get('hash') == input_hash
+
+    def get(self, key):
+        return self.done.get(key)
+
+    def mark_done(self, key, input_hash, **info):
+        self.mark_done_many([(key, input_hash, info)])
+
+    def mark_done_many(self, entries):
+        """여러 작업 완료 기록 (파일 저장 한 번), entries = [(key, input_hash, info dict)]"""
+        at = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            for key, input_hash, info in entries:
+                self.done[key] = dict(info, hash=input_hash, at=at)
+                self.failed.pop(key, None)
+            self._save()
+
+    def mark_failed(self, key, error):
+        with self._lock:
+            previous = self.failed.get(key, {})
+            self.failed[key] = {
+                'error': str(error)[:500],
+                'attempts': previous.get('attempts', 0) + 1,
+                'at': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._save()
+
+    def _save(self):
+        """임시 파일에 쓴 뒤 교체 (중간에 죽어도 이전 체크포인트 유지)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'done': self.done, 'failed': self.failed}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class BatchWriter:
+    """
+    Firestore 쓰기 모음 (batch_size개마다 WriteBatch 커밋)
+
+    set(ref, data, tag): tag는 커밋 결과 콜백에 전달 (체크포인트 키 등)
+    on_commit(tags) / on_error(tags, error): 커밋 성공/실패한 쓰기의 tag 목록
+    """
+
+    def __init__(self, db, batch_size=100, on_commit=None, on_error=None):
+        self.db = db
+        self.batch_size = min(batch_size, BATCH_LIMIT)
+        self.on_commit = on_commit
+        self.on_error = on_error
+        self.committed = 0
+        self.failed = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def set(self, ref, data, merge=False, tag=None):
+        with self._lock:
+            self._pending.append((ref, data, merge, tag))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """대기 중인 쓰기 커밋, 커밋한 수 반환"""
+        with self._lock:
+            items, self._pending = self._pending, []
+        if not items:
+            return 0
+
+        tags = [tag for *_, tag in items if tag is not None]
+        try:
+            batch = self.db.batch()
+            for ref, data, merge, _ in items:
+                batch.set(ref, data, merge=merge)
+            batch.commit()
+        except Exception as e:
+            self.failed += len(items)
+            print(f"[BatchWriter] 커밋 실패 ({len(items)}건): {e}")
+            if self.on_error:
+                self.on_error(tags, e)
+            return 0
+
+        self.committed += len(items)
+        print(f"[BatchWriter] {len(items)}건 커밋")
+        if self.on_commit:
+            self.on_commit(tags)
+        return len(items)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+def open_bulk_writer(db, stats, max_ops_per_second=None, max_attempts=None, on_failure=None):
+    """
+    Firestore BulkWriter (흐름 제어: 초당 쓰기 수를 점진적으로 늘림, 일시 오류는 백오프 후 재시도)
+
+    결과는 stats(BatchStats)에 집계: 성공 succeeded, create()인데 이미 있는 문서 skipped, 그 외 failed
+    on_failure(doc_id, message): 재시도 후에도 실패한 쓰기
+    flush()/close()까지 호출해야 남은 쓰기가 전송됨
+    """
+    from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions, SendMode
+
+    max_ops_per_second = max_ops_per_second or BULK_MAX_OPS
+    max_attempts = max_attempts or DEFAULT_MAX_ATTEMPTS
+    lock = threading.Lock()
+
+    def on_result(ref, result, bulk_writer):
+        with lock:
+            stats.succeeded += 1
+
+    def on_error(error, bulk_writer):
+        """True 반환 시 BulkWriter가 재시도"""
+        if error.code == BULK_ALREADY_EXISTS:
+            with lock:
+                stats.skipped += 1
+            return False
+        if error.code in BULK_RETRYABLE_CODES and error.attempts < max_attempts:
+            return True
+        with lock:
+            stats.failed += 1
+        doc_id = error.operation.reference.id
+        print(f"[BulkWriter] 쓰기 실패 ({doc_id}): {error.message}")
+        if on_failure:
+            on_failure(doc_id, error.message)
+        return False
+
+    options = BulkWriterOptions(
+        initial_ops_per_second=min(max_ops_per_second, 500),
+        max_ops_per_second=max_ops_per_second,
+        mode=SendMode.parallel,
+    )
+    bulk_writer = db.bulk_writer(options=options)
+    bulk_writer.on_write_result(on_result)
+    bulk_writer.on_write_error(on_error)
+    return bulk_writer
+
+
+class BatchStats:
+    """처리 결과 집계 + 처리량"""
+
+    def __init__(self, total=0):
+        self.total = total
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.tokens = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def report(self, label='배치'):
+        minutes = max(self.elapsed / 60, 1e-9)
+        processed = self.succeeded + self.failed
+        lines = [
+            f"[{label}] 전체 {self.total}건: 성공 {self.succeeded}, 실패 {self.failed}, 건너뜀(변경 없음) {self.skipped}",
+            f"[{label}] 소요 {self.elapsed:.1f}s, 처리량 {processed / minutes:.1f}건/분",
+        ]
+        if self.tokens:
+            lines.append(f"[{label}] 토큰 약 {self.tokens:,}개 ({self.tokens / minutes:,.0f}/분)")
+        return '\n'.join(lines)
+
+
+def _call_with_retry(worker, key, payload, limiter, tokens, max_attempts):
+    attempt = 0
+    while True:
+        attempt += 1
+        if limiter:
+            limiter.acquire(tokens)
+        try:
+            return worker(key, payload)
+        except Exception as e:
+            if attempt >= max_attempts or not is_retryable(e):
+                raise
+            delay = retry_after(e)
+            if delay is None:
+                delay = backoff_delay(attempt, BATCH_BACKOFF)
+            elif limiter:
+                limiter.pause(delay)  # 429: 다른 워커도 같이 대기
+            print(f"[BatchEngine] {key} 재시도 {attempt}/{max_attempts - 1} ({delay:.1f}s 후): {str(e)[:100]}")
+            time.sleep(delay)
+
+
+def run_parallel(items, worker, workers=None, limiter=None, max_attempts=None, estimate_tokens=None):
+    """
+    작업 동시 처리 (완료되는 순서대로 결과 반환)
+
+    Args:
+        items: [(key, payload), ...]
+        worker: worker(key, payload) → 결과 (워커 스레드에서 실행, 실패 시 예외)
+        workers: 동시 실행 수
+        limiter: RateLimiter (없으면 한도 없음)
+        max_attempts: 작업당 최대 시도 (일시 오류만 재시도)
+        estimate_tokens: estimate_tokens(payload) → 예상 토큰 수 (토큰 한도용)
+
+    Yields:
+        tuple: (key, result, error)  성공 시 error=None, 실패 시 result=None
+    """
+    workers = workers or DEFAULT_WORKERS
+    max_attempts = max_attempts or DEFAULT_MAX_ATTEMPTS
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+        futures = {
+            executor.submit(
+                _call_with_retry, worker, key, payload, limiter,
+                estimate_tokens(payload) if estimate_tokens else 0, max_attempts
+            ): key
+            for key, payload in items
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                yield key, future.result(), None
+            except Exception as e:
+                yield key, None, e
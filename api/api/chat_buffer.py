@@ -0,0 +1,316 @@
+"""
+대화 기록 쓰기 버퍼 (write-behind)
+대화 저장 시 Firestore를 기다리지 않고 로컬 저널에 기록 후 즉시 반환
+→ 백그라운드 스레드가 개수/주기 기준으로 WriteBatch 한 번에 커밋
+
+- 저널(JSON Lines, fsync)에 먼저 쓰므로 프로세스가 죽어도 재전송
+- 저널은 프로세스마다 따로 (chat_history.{pid}.journal + .lock 파일 잠금)
+  → 잠금이 풀린(프로세스가 죽은) 저널만 다른 프로세스가 넘겨받아 재전송, 살아 있는 프로세스의 저널은 건드리지 않음
+- 문서 경로가 고정이라 재전송해도 중복 없음 (set 덮어쓰기)
+- chat_history/{id}, projects/{pid}/sessions/{sid}(/messages/{id}) 모두 같은 버퍼 사용
+"""
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from firebase_admin import firestore
+
+from . import file_lock
+
+
+# 기본값 (Django 설정이 없을 때)
+DEFAULT_JOURNAL_PATH = Path(__file__).resolve().parent.parent / 'cache' / 'chat_history.journal'
+DEFAULT_FLUSH_SIZE = 20
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+# Firestore WriteBatch 최대 쓰기 수
+BATCH_LIMIT = 500
+
+# 죽은 프로세스의 저널 확인 주기 (초)
+ORPHAN_SCAN_INTERVAL = 60
+
+COLLECTION = 'chat_history'
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, firestore.Increment):
+        return {'__increment__': value.value}
+    raise TypeError(f"직렬화 불가: {type(value)}")
+
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__increment__' in obj:
+        return firestore.Increment(obj['__increment__'])
+    return obj
+
+
+def _journal_line(path, entry):
+    data, merge = entry
+    return json.dumps({'path': path, 'data': data, 'merge': merge}, ensure_ascii=False, default=_encode)
+
+
+class ChatHistoryBuffer:
+    """
+    대화 기록 쓰기 버퍼
+
+    add(doc_id, data) → chat_history/{doc_id} 저널 기록 + 대기열 추가 (네트워크 없음)
+    add_path(path, data, merge) → 임의 문서 경로 (세션 메시지/메타)
+    flush() → 대기 문서를 WriteBatch로 커밋, 성공분만 저널에서 제거
+
+    settings 경로(chat_history.journal)는 이름 기준, 실제 저널은 {stem}.{pid}.journal
+    """
+
+    def __init__(self, journal_path=None, flush_size=None, flush_interval=None):
+        if settings.configured:
+            journal_path = journal_path or getattr(settings, 'CHAT_HISTORY_JOURNAL_PATH', None)
+            flush_size = flush_size or getattr(settings, 'CHAT_HISTORY_FLUSH_SIZE', None)
+            flush_interval = flush_interval or getattr(settings, 'CHAT_HISTORY_FLUSH_INTERVAL', None)
+        base_path = Path(journal_path or DEFAULT_JOURNAL_PATH)
+        self.journal_dir = base_path.parent
+        self.journal_stem = base_path.stem
+        self.legacy_journal_path = base_path  # 프로세스별 저널 이전 형식
+        self.journal_path = None               # start()에서 결정 (pid)
+        self.flush_size = flush_size or DEFAULT_FLUSH_SIZE
+        self.flush_interval = flush_interval or DEFAULT_FLUSH_INTERVAL
+
+        self._lock = threading.Lock()          # 대기열/저널
+        self._flush_lock = threading.Lock()    # 커밋은 한 번에 하나
+        self._pending = {}                     # 문서 경로 → (data, merge) (삽입 순서 = 시간 순서)
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._owner_lock = None                # 이 프로세스 저널의 잠금 파일 (종료 시 OS가 해제)
+        self._last_orphan_scan = 0.0
+
+    def _lock_path(self, pid):
+        return self.journal_dir / f"{self.journal_stem}.{pid}.lock"
+
+    def _append_journal(self, path, entry):
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(_journal_line(path, entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_journal(self):
+        """커밋되지 않은 문서만 남기고 저널 교체 (self._lock 보유 상태에서 호출)"""
+        tmp_path = self.journal_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for path, entry in self._pending.items():
+                f.write(_journal_line(path, entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _read_journal(self, journal_path):
+        """저널 파일의 항목 → 대기열 (self._lock 보유 상태에서 호출)"""
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return 0
+
+        recovered = 0
+        for line in lines:
+            try:
+                entry = json.loads(line, object_hook=_decode)
+            except json.JSONDecodeError:
+                continue  # 기록 도중 종료된 마지막 줄
+            path = entry.get('path') or f"{COLLECTION}/{entry['id']}"
+            self._merge_pending(path, entry['data'], entry.get('merge', False))
+            recovered += 1
+        return recovered
+
+    @contextlib.contextmanager
+    def _directory_lock(self):
+        """저널 소유권 변경(내 저널 잠금, 다른 저널 넘겨받기)은 프로세스 간 한 번에 하나"""
+        with file_lock.locked(self.journal_dir / f"{self.journal_stem}.adopt.lock"):
+            yield
+
+    def _adopt_orphans(self):
+        """
+        잠금이 풀린(프로세스가 죽은) 저널을 넘겨받음 (self._lock + _directory_lock 보유 상태에서 호출)
+
+        넘겨받은 항목은 내 저널에 먼저 기록한 뒤 원래 저널 삭제 (도중에 죽어도 유실 없음)
+        """
+        self._last_orphan_scan = time.monotonic()
+        own_pid = os.getpid()
+        orphans = [(None, self.legacy_journal_path)]
+        for journal in self.journal_dir.glob(f"{self.journal_stem}.*.journal"):
+            pid = journal.name[len(self.journal_stem) + 1:-len('.journal')]
+            if pid.isdigit() and int(pid) != own_pid:
+                orphans.append((pid, journal))
+
+        recovered = 0
+        for pid, journal in orphans:
+            if not journal.exists():
+                continue
+            lock_path = self._lock_path(pid) if pid else None
+            lock_file = open(lock_path, 'a+') if lock_path else None
+            if lock_file and not file_lock.lock(lock_file):
+                lock_file.close()
+                continue  # 살아 있는 프로세스의 저널
+            try:
+                count = self._read_journal(journal)
+                if count:
+                    self._rewrite_journal()
+                journal.unlink()
+                recovered += count
+            finally:
+                if lock_file:
+                    lock_file.close()
+                    lock_path.unlink(missing_ok=True)
+        if recovered:
+            print(f"[ChatBuffer] 중단된 프로세스 저널에서 {recovered}개 복구")
+
+    def start(self):
+        """내 저널 잠금 + 죽은 프로세스 저널 복구 + 플러시 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            pid = os.getpid()
+            self.journal_path = self.journal_dir / f"{self.journal_stem}.{pid}.journal"
+            with self._directory_lock():
+                self._owner_lock = open(self._lock_path(pid), 'a+')
+                file_lock.lock(self._owner_lock, blocking=True)
+                # 같은 pid를 썼던 이전 프로세스의 저널은 그대로 이어서 사용
+                recovered = self._read_journal(self.journal_path)
+                if recovered:
+                    print(f"[ChatBuffer] 저널에서 {recovered}개 복구")
+                try:
+                    self._adopt_orphans()
+                except Exception as e:
+                    print(f"[ChatBuffer] 저널 복구 실패: {e}")
+            self._thread = threading.Thread(target=self._run, name='chat-history-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _merge_pending(self, path, data, merge):
+        """대기 중인 같은 문서와 합치기 (self._lock 보유 상태에서 호출)"""
+        previous = self._pending.pop(path, None)
+        if previous is not None and merge:
+            old_data, old_merge = previous
+            combined = dict(old_data)
+            for key, value in data.items():
+                old_value = combined.get(key)
+                if isinstance(value, firestore.Increment) and isinstance(old_value, firestore.Increment):
+                    value = firestore.Increment(old_value.value + value.value)
+                combined[key] = value
+            data, merge = combined, old_merge
+        self._pending[path] = (data, merge)
+
+    def add(self, doc_id, data):
+        """
+        chat_history 문서 추가 (저널 기록 후 즉시 반환)
+
+        Args:
+            doc_id: chat_history 문서 ID
+            data: 문서 필드 dict
+        """
+        self.add_path(f"{COLLECTION}/{doc_id}", data)
+
+    def add_path(self, path, data, merge=False):
+        """
+        문서 경로로 추가 (저널 기록 후 즉시 반환)
+
+        Args:
+            path: 문서 경로 ('collection/doc/...')
+            data: 문서 필드 dict (merge=True면 firestore.Increment 사용 가능)
+            merge: True면 기존 문서와 병합 (set merge)
+        """
+        self.start()
+        with self._lock:
+            self._append_journal(path, (data, merge))
+            self._merge_pending(path, data, merge)
+            size = len(self._pending)
+        if size >= self.flush_size:
+            self._wakeup.set()
+
+    def pending(self, prefix=COLLECTION + '/'):
+        """
+        아직 커밋되지 않은 문서 (오래된 것부터)
+
+        Args:
+            prefix: 경로 접두어 (기본 chat_history)
+
+        Returns:
+            list: [(doc_id, data), ...] (doc_id는 경로의 마지막 부분)
+        """
+        with self._lock:
+            return [
+                (path.rsplit('/', 1)[-1], data)
+                for path, (data, _) in self._pending.items()
+                if path.startswith(prefix) and '/' not in path[len(prefix):]
+            ]
+
+    def flush(self):
+        """
+        대기 문서를 WriteBatch로 커밋
+
+        Returns:
+            int: 커밋한 문서 수 (실패 시 0, 다음 주기에 재시도)
+        """
+        with self._flush_lock:
+            with self._lock:
+                items = list(self._pending.items())
+            if not items:
+                return 0
+
+            committed = []
+            try:
+                db = firestore.client()
+                for start in range(0, len(items), BATCH_LIMIT):
+                    batch = db.batch()
+                    chunk = items[start:start + BATCH_LIMIT]
+                    for path, (data, merge) in chunk:
+                        batch.set(db.document(path), data, merge=merge)
+                    batch.commit()
+                    committed.extend(chunk)
+            except Exception as e:
+                print(f"[ChatBuffer] 커밋 실패 ({len(items) - len(committed)}개 대기): {e}")
+
+            if committed:
+                with self._lock:
+                    for path, entry in committed:
+                        # 커밋 도중 같은 문서가 다시 들어왔으면 유지
+                        if self._pending.get(path) is entry:
+                            del self._pending[path]
+                    try:
+                        self._rewrite_journal()
+                    except Exception as e:
+                        print(f"[ChatBuffer] 저널 정리 실패: {e}")
+            return len(committed)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                if time.monotonic() - self._last_orphan_scan >= ORPHAN_SCAN_INTERVAL:
+                    with self._lock, self._directory_lock():
+                        self._adopt_orphans()  # 실행 중에 죽은 형제 프로세스
+                self.flush()
+            except Exception as e:
+                print(f"[ChatBuffer] 플러시 오류: {e}")
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_chat_buffer():
+    """대화 기록 쓰기 버퍼 싱글톤"""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = ChatHistoryBuffer()
+        return _buffer
@@ -0,0 +1,208 @@
+"""
+대화 세션 (프로젝트/세션 단위 대화 기록)
+projects/{project_id}/sessions/{session_id}                → 세션 정보 (제목, 시작, 마지막, 메시지수)
+projects/{project_id}/sessions/{session_id}/messages/{id}  → 메시지 (문서 ID = 저장 시각, '시간' 순서와 동일)
+
+일반 대화(프로젝트 없음)는 GENERAL_SCOPE 아래에 저장
+chat_history는 전체 로그로 유지 (RAW 분석 chat_ref 등)
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+
+from django.conf import settings
+from firebase_admin import firestore
+
+from .chat_buffer import get_chat_buffer
+
+
+KST = timezone(timedelta(hours=9))
+
+# 프로젝트 없는 일반 대화의 저장 위치 (projects/_general/sessions)
+GENERAL_SCOPE = '_general'
+
+# 마지막 메시지 후 이 시간(초)이 지나면 다음 대화는 새 세션 (기본값)
+DEFAULT_IDLE_TIMEOUT = 6 * 60 * 60
+
+# 최근 세션 조회 결과 캐시 시간(초, 기본값): 다른 워커에서 바뀐 세션은 이 시간 안에 반영
+DEFAULT_LOOKUP_TTL = 30
+
+# 시작/제목 기록 여부를 기억할 세션 수 (넘으면 오래된 것부터 잊음)
+STARTED_MAX = 1024
+
+# 세션 제목 길이 (첫 사용자 메시지 앞부분)
+TITLE_MAX_CHARS = 50
+
+
+def scope_id(project_id):
+    """세션 저장 위치의 프로젝트 ID (None이면 일반 대화)"""
+    return project_id or GENERAL_SCOPE
+
+
+def sessions_path(project_id):
+    return f"projects/{scope_id(project_id)}/sessions"
+
+
+def session_path(project_id, session_id):
+    return f"{sessions_path(project_id)}/{session_id}"
+
+
+def messages_path(project_id, session_id):
+    return f"{session_path(project_id, session_id)}/messages"
+
+
+def new_session_id():
+    """세션 ID (시작 시각 + 임의 접미어, 문자열 정렬 = 시간 순서)"""
+    return f"{datetime.now(KST).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def _idle_timeout():
+    if settings.configured:
+        return getattr(settings, 'CHAT_SESSION_IDLE_TIMEOUT', DEFAULT_IDLE_TIMEOUT)
+    return DEFAULT_IDLE_TIMEOUT
+
+
+def _lookup_ttl():
+    if settings.configured:
+        return getattr(settings, 'CHAT_SESSION_LOOKUP_TTL', DEFAULT_LOOKUP_TTL)
+    return DEFAULT_LOOKUP_TTL
+
+
+# 프로젝트별 최근 세션 조회 결과 (TTL 캐시): scope → {'id', 'last', 'checked'}
+# 현재 세션은 Firestore '마지막' 순서가 기준 (워커가 여러 개여도 같은 세션 이어감)
+_current = {}
+# 세션 정보 문서가 이미 있는 세션 ID (시작/제목은 처음 한 번만 기록, LRU)
+_started = OrderedDict()
+_lock = threading.Lock()
+
+
+def _mark_started(session_id):
+    """_started에 추가 (_lock 안에서 호출, 오래된 것부터 제거)"""
+    _started[session_id] = True
+    _started.move_to_end(session_id)
+    while len(_started) > STARTED_MAX:
+        _started.popitem(last=False)
+
+
+def _latest_session(project_id):
+    """
+    가장 최근 세션 (Firestore '마지막' 순 + 이 프로세스에서 아직 커밋 안 된 세션 정보)
+
+    Returns:
+        tuple: (세션 ID, 마지막 대화 시각), 없으면 None
+    """
+    candidates = []
+    try:
+        db = firestore.client()
+        docs = db.collection(sessions_path(project_id))\
+            .order_by('마지막', direction=firestore.Query.DESCENDING)\
+            .limit(1)\
+            .stream()
+        for doc in docs:
+            candidates.append((doc.id, doc.to_dict().get('마지막')))
+    except Exception as e:
+        print(f"[ChatSessions] 최근 세션 조회 실패 ({scope_id(project_id)}): {e}")
+
+    candidates.extend(
+        (session_id, data.get('마지막'))
+        for session_id, data in get_chat_buffer().pending(prefix=sessions_path(project_id) + '/')
+    )
+    candidates = [(session_id, last) for session_id, last in candidates if isinstance(last, datetime)]
+    return max(candidates, key=lambda candidate: candidate[1], default=None)
+
+
+def resolve_session(project_id, session_id=None, new=False):
+    """
+    이번 대화의 세션 ID 결정
+
+    - session_id 지정: 그 세션 이어가기
+    - new=True: 새 세션 시작
+    - 그 외: 최근 세션 이어가기 (마지막 대화 후 CHAT_SESSION_IDLE_TIMEOUT 지나면 새 세션)
+      최근 세션은 CHAT_SESSION_LOOKUP_TTL 동안 캐시, 지나면 Firestore 다시 조회
+
+    Returns:
+        str: 세션 ID
+    """
+    scope = scope_id(project_id)
+    checked = time.monotonic()
+
+    if not session_id and not new:
+        with _lock:
+            current = _current.get(scope)
+        if current is None or checked - current['checked'] >= _lookup_ttl():
+            latest = _latest_session(project_id)
+            current = {'id': latest[0], 'last': latest[1], 'checked': checked} if latest else None
+        else:
+            checked = current['checked']
+        if current and (datetime.now(timezone.utc) - current['last']).total_seconds() < _idle_timeout():
+            session_id = current['id']
+
+    if session_id:
+        with _lock:
+            _mark_started(session_id)
+    else:
+        session_id = new_session_id()
+        print(f"[ChatSessions] 새 세션: {scope}/{session_id}")
+
+    with _lock:
+        _current[scope] = {'id': session_id, 'last': datetime.now(timezone.utc), 'checked': checked}
+    return session_id
+
+
+def buffer_session_message(project_id, session_id, doc_id, doc_data):
+    """
+    세션 메시지 + 세션 정보 쓰기를 버퍼에 추가 (chat_history와 같은 문서 ID)
+
+    Args:
+        project_id: 프로젝트 ID (None이면 일반 대화)
+        session_id: 세션 ID
+        doc_id: 메시지 문서 ID (저장 시각)
+        doc_data: chat_history와 같은 필드 dict
+    """
+    buffer = get_chat_buffer()
+    buffer.add_path(f"{messages_path(project_id, session_id)}/{doc_id}", doc_data)
+
+    meta = {
+        'session_id': session_id,
+        'project_id': project_id,
+        '마지막': doc_data['시간'],
+        '메시지수': firestore.Increment(1),
+    }
+    with _lock:
+        first = session_id not in _started
+        _mark_started(session_id)
+    if first:
+        meta['시작'] = doc_data['시간']
+        if doc_data.get('역할') == 'user':
+            meta['제목'] = doc_data.get('내용', '')[:TITLE_MAX_CHARS]
+    buffer.add_path(session_path(project_id, session_id), meta, merge=True)
+
+
+def list_sessions(project_id, limit=20):
+    """
+    프로젝트 세션 목록 (최근 대화 순)
+
+    Returns:
+        list: [{'session_id', 'title', 'started_at', 'last_at', 'message_count'}, ...]
+    """
+    get_chat_buffer().flush()
+    db = firestore.client()
+    docs = db.collection(sessions_path(project_id))\
+        .order_by('마지막', direction=firestore.Query.DESCENDING)\
+        .limit(limit)\
+        .stream()
+
+    sessions = []
+    for doc in docs:
+        data = doc.to_dict()
+        started, last = data.get('시작'), data.get('마지막')
+        sessions.append({
+            'session_id': doc.id,
+            'title': data.get('제목', ''),
+            'started_at': started.isoformat() if isinstance(started, datetime) else None,
+            'last_at': last.isoformat() if isinstance(last, datetime) else None,
+            'message_count': data.get('메시지수', 0),
+        })
+    return sessions
@@ -0,0 +1,265 @@
+"""
+문서 구절(Passage) 분할 및 로컬 캐시
+긴 전체글을 겹치는 구절로 나누고 (문서 ID, 본문 해시, 수정 버전) 단위로 SQLite에 보관
+→ 요청마다 재분할하지 않고 질문과 가장 맞는 구절만 프롬프트에 투입
+"""
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+
+# 구절 크기/겹침 (글자 수)
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 200
+
+# 메모리에 구절을 보관할 최대 문서 수 (기본값, 나머지는 SQLite에서 읽음)
+DEFAULT_MEMORY_DOCS = 2000
+
+# 구절 끝을 맞출 경계 (문단 > 문장)
+_BOUNDARY_PATTERN = re.compile(r'\n\s*\n|\n|(?<=[.!?。])\s|(?<=다\.)\s')
+
+
+def split_passages(text, size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """
+    텍스트를 겹치는 구절로 분할 (가능하면 문단/문장 경계에서 자름)
+
+    Args:
+        text: 원본 텍스트
+        size: 구절 최대 길이
+        overlap: 이웃 구절 간 겹침 길이
+
+    Returns:
+        list: 구절 리스트
+    """
+    if not text:
+        return []
+    if len(text) <= size:
+        return [text]
+
+    passages = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+
+        # 구절 뒤쪽 1/4 안에서 마지막 경계에 맞춤
+        if end < len(text):
+            window = text[start + size * 3 // 4:end]
+            boundaries = [m.end() for m in _BOUNDARY_PATTERN.finditer(window)]
+            if boundaries:
+                end = start + size * 3 // 4 + boundaries[-1]
+
+        passage = text[start:end].strip()
+        if passage:
+            passages.append(passage)
+
+        if end >= len(text):
+            break
+
+        # 다음 구절은 겹침 구간 안의 첫 경계에서 시작
+        next_start = max(end - overlap, start + 1)
+        boundary = _BOUNDARY_PATTERN.search(text, next_start, end)
+        start = boundary.end() if boundary else next_start
+
+    return passages
+
+
+def text_hash(text):
+    """본문 해시 (같은 문서라도 본문 필드가 다르면 다른 구절)"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class ChunkCache:
+    """
+    구절 캐시 (메모리 LRU + SQLite)
+
+    키: (project_id, stage, doc_id, 본문 해시), 버전이 바뀌면 재분할
+    (호출 경로마다 본문 필드가 달라도 다른 본문에서 자른 구절을 돌려주지 않음)
+    메모리는 문서 단위 LRU (CHUNK_CACHE_MEMORY_DOCS개 초과 시 오래 안 쓴 문서부터 제거)
+    """
+
+    def __init__(self, path=None, memory_docs=None):
+        if settings.configured:
+            memory_docs = memory_docs or getattr(settings, 'CHUNK_CACHE_MEMORY_DOCS', None)
+        self.path = Path(path or settings.CHUNK_CACHE_PATH)
+        self.memory_docs = memory_docs or DEFAULT_MEMORY_DOCS
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()   # (project_id, stage, doc_id) → {text_hash: (version, passages)}
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("DROP TABLE IF EXISTS chunks")  # 본문 해시 없는 이전 키 형식
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks_v2 (
+                    project_id TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    passages TEXT NOT NULL,
+                    PRIMARY KEY (project_id, stage, doc_id, text_hash)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS chunks_v2_doc ON chunks_v2 (project_id, stage, doc_id, version)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, doc_key, digest, version, passages):
+        """메모리 캐시에 저장 (같은 문서의 이전 버전 제거, self._lock 보유 상태에서 호출)"""
+        entries = self._memory.get(doc_key)
+        if entries is None:
+            entries = self._memory[doc_key] = {}
+        for stale in [h for h, (cached_version, _) in entries.items() if cached_version != version]:
+            del entries[stale]
+        entries[digest] = (version, passages)
+        self._memory.move_to_end(doc_key)
+        while len(self._memory) > self.memory_docs:
+            self._memory.popitem(last=False)
+
+    def get_passages(self, project_id, stage, doc_id, version, text):
+        """
+        문서 구절 반환 (캐시 적중 시 재분할 없음)
+
+        Args:
+            project_id: 프로젝트 ID
+            stage: raw | draft | final
+            doc_id: 문서 ID
+            version: 문서 버전 (수정 시각 등, 바뀌면 재분할)
+            text: 본문 (캐시 미스 시 분할 대상)
+
+        Returns:
+            list: 구절 리스트
+        """
+        doc_key = (project_id, stage, doc_id)
+        digest = text_hash(text)
+
+        with self._lock:
+            cached = self._memory.get(doc_key, {}).get(digest)
+            if cached and cached[0] == version:
+                self._memory.move_to_end(doc_key)
+                return cached[1]
+
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT version, passages FROM chunks_v2 WHERE project_id=? AND stage=? AND doc_id=? AND text_hash=?",
+                    doc_key + (digest,)
+                ).fetchone()
+                if row and row[0] == version:
+                    passages = json.loads(row[1])
+                    self._remember(doc_key, digest, version, passages)
+                    return passages
+            except Exception as e:
+                print(f"[ChunkCache] 조회 실패 ({stage}/{doc_id}): {e}")
+
+            passages = split_passages(text)
+            self._remember(doc_key, digest, version, passages)
+
+            try:
+                conn = self._connect()
+                # 이전 버전 본문의 구절 정리 (문서 색인 조회, 같은 버전의 다른 본문 필드는 유지)
+                conn.execute(
+                    "DELETE FROM chunks_v2 WHERE project_id=? AND stage=? AND doc_id=? AND version!=?",
+                    doc_key + (version,)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO chunks_v2 (project_id, stage, doc_id, text_hash, version, passages) VALUES (?, ?, ?, ?, ?, ?)",
+                    doc_key + (digest, version, json.dumps(passages, ensure_ascii=False))
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"[ChunkCache] 저장 실패 ({stage}/{doc_id}): {e}")
+
+            return passages
+
+    def invalidate(self, project_id, stage, doc_id):
+        """문서 삭제 시 캐시 제거"""
+        doc_key = (project_id, stage, doc_id)
+        with self._lock:
+            self._memory.pop(doc_key, None)
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "DELETE FROM chunks_v2 WHERE project_id=? AND stage=? AND doc_id=?",
+                    doc_key
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"[ChunkCache] 삭제 실패 ({stage}/{doc_id}): {e}")
+
+
+def score_passage(passage, query_terms, avg_length=CHUNK_SIZE, k1=1.2, b=0.75):
+    """
+    구절 BM25 점수
+
+    Args:
+        passage: 구절 텍스트
+        query_terms: [(token, idf), ...] (ProjectSearchIndex.query_terms)
+
+    Returns:
+        float: 점수 (질문 토큰이 없으면 0)
+    """
+    lowered = passage.lower()
+    length_norm = 1 - b + b * len(passage) / avg_length
+    score = 0.0
+    for token, idf in query_terms:
+        tf = lowered.count(token)
+        if tf:
+            score += idf * tf * (k1 + 1) / (tf + k1 * length_norm)
+    return score
+
+
+def best_passages(passages, query_terms, limit=1, keywords=None):
+    """
+    질문과 가장 맞는 구절 선택 (원래 순서 유지)
+
+    Args:
+        passages: 구절 리스트
+        query_terms: [(token, idf), ...]
+        limit: 최대 구절 수
+        keywords: 정규화 키워드 (띄어쓰기 무시 포함 시 가산점)
+
+    Returns:
+        list: 선택된 구절 (점수가 모두 0이면 첫 구절)
+    """
+    if not passages:
+        return []
+
+    scored = []
+    for position, passage in enumerate(passages):
+        score = score_passage(passage, query_terms)
+        if keywords:
+            normalized = re.sub(r'\s+', '', passage).lower()
+            score += sum(math.log(2 + len(kw)) for kw in keywords if kw in normalized)
+        scored.append((score, position, passage))
+
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    selected = [item for item in scored[:limit] if item[0] > 0] or [(0.0, 0, passages[0])]
+    selected.sort(key=lambda item: item[1])
+    return [passage for _, _, passage in selected]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_chunk_cache():
+    """구절 캐시 싱글톤"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ChunkCache()
+        return _cache
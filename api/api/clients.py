@@ -0,0 +1,259 @@
+"""
+AI/클라우드 클라이언트 레지스트리 (프로세스당 하나씩 공유)
+요청마다 클라이언트를 만들면 TLS 핸드셰이크 + 인증 토큰 발급이 매번 반복됨
+→ 처음 사용할 때 한 번 만들고 (지연 초기화) 연결 풀(keep-alive)을 재사용
+
+- Gemini (google.genai), GPT (openai), Claude (anthropic): httpx 연결 풀 크기 지정
+- Cloud Storage: 서비스 계정 클라이언트 + 버킷
+- 이미지 다운로드 등 일반 HTTP: requests.Session (HTTPAdapter 풀 + 연결 오류 재시도)
+- 스크립트용 google.generativeai: configure 한 번 + 모델 객체 재사용
+- 비동기 클라이언트 (AsyncOpenAI, AsyncAnthropic, genai aio, Firestore AsyncClient): 이벤트 루프마다 하나
+  (연결이 만든 루프에 묶임, WSGI/runserver의 async_to_sync는 요청마다 새 루프)
+
+Django 설정 로드 전(config/settings.py)과 스크립트에서도 쓰므로 옵션은 환경 변수로 읽음
+"""
+import asyncio
+import os
+import threading
+from pathlib import Path
+
+
+# 연결 풀 옵션 (환경 변수로 조정)
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))     # requests: 호스트별 풀 개수
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '32'))             # 풀당 최대 연결 (동시 요청 수)
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '60'))   # 유휴 연결 유지 시간 (초)
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '30'))                     # 일반 HTTP 기본 타임아웃 (초)
+HTTP_CONNECT_RETRIES = 2                                                  # 연결 실패 시 재시도 (요청 본문 전송 전만)
+
+# 서비스 계정 / Storage 버킷 기본값
+SERVICE_ACCOUNT_PATH = Path(__file__).resolve().parent.parent.parent / 'jnext-service-account.json'
+STORAGE_BUCKET = os.getenv('FIREBASE_STORAGE_BUCKET', 'jnext-e3dd9.firebasestorage.app')
+
+_clients = {}  # (name, api_key) → 클라이언트
+_loop_clients = {}  # 이벤트 루프 → {(name, api_key): 비동기 클라이언트}
+_lock = threading.RLock()  # 버킷 생성 시 Storage 클라이언트 생성 (재진입)
+
+
+def _get(name, factory, api_key=None):
+    """name 클라이언트 (없으면 factory로 생성, API 키가 다르면 따로 생성, 스레드 안전)"""
+    key = (name, api_key)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+            print(f"[Clients] {name} 초기화")
+        return client
+
+
+def _get_for_loop(name, factory, api_key=None):
+    """
+    현재 이벤트 루프 전용 name 클라이언트 (async 함수 안에서 호출, API 키가 다르면 따로 생성)
+
+    ASGI 워커는 루프가 하나라 프로세스당 하나와 같음, 닫힌 루프의 클라이언트는 정리
+    """
+    loop = asyncio.get_running_loop()
+    key = (name, api_key)
+    with _lock:
+        for closed in [other for other in _loop_clients if other.is_closed()]:
+            del _loop_clients[closed]
+        loop_clients = _loop_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            client = factory()
+            loop_clients[key] = client
+        return client
+
+
+def _httpx_limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=HTTP_POOL_MAXSIZE,
+        max_keepalive_connections=HTTP_POOL_MAXSIZE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def gemini_api_key():
+    return os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
+
+
+# ===== 일반 HTTP =====
+
+def get_http_session():
+    """
+    공유 requests.Session (keep-alive 연결 풀)
+
+    이미지 다운로드처럼 SDK 밖의 HTTP 요청에 사용, timeout은 호출 시 지정
+    """
+    def factory():
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_CONNECTIONS,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            max_retries=Retry(total=HTTP_CONNECT_RETRIES, connect=HTTP_CONNECT_RETRIES, read=0,
+                              status=0, backoff_factor=0.5),
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    return _get('http', factory)
+
+
+def download(url, timeout=None):
+    """URL 내용 다운로드 (공유 세션, 실패 시 예외)"""
+    response = get_http_session().get(url, timeout=timeout or HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+# ===== AI SDK =====
+
+def _new_gemini_client(api_key):
+    from google import genai
+    from google.genai import types
+    try:
+        http_options = types.HttpOptions(
+            client_args={'limits': _httpx_limits()},
+            async_client_args={'limits': _httpx_limits()},
+        )
+        return genai.Client(api_key=api_key, http_options=http_options)
+    except Exception as e:  # client_args 미지원 버전
+        print(f"[Clients] Gemini 연결 풀 설정 실패, 기본값 사용: {e}")
+        return genai.Client(api_key=api_key)
+
+
+def get_gemini_client(api_key=None):
+    """google.genai 클라이언트 (API 키 없으면 None)"""
+    api_key = api_key or gemini_api_key()
+    if not api_key:
+        return None
+    return _get('gemini', lambda: _new_gemini_client(api_key), api_key)
+
+
+def get_gemini_async_client(api_key=None):
+    """google.genai 비동기 클라이언트 (client.aio, 이벤트 루프마다 하나)"""
+    api_key = api_key or gemini_api_key()
+    if not api_key:
+        return None
+    return _get_for_loop('gemini', lambda: _new_gemini_client(api_key), api_key).aio
+
+
+def get_openai_client(api_key=None):
+    """openai 동기 클라이언트 (API 키 없으면 None)"""
+    api_key = api_key or os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return None
+
+    def factory():
+        import openai
+        http_client = openai.DefaultHttpxClient(limits=_httpx_limits())
+        return openai.OpenAI(api_key=api_key, http_client=http_client)
+
+    return _get('openai', factory, api_key)
+
+
+def get_openai_async_client(api_key=None):
+    """openai 비동기 클라이언트 (이벤트 루프마다 하나)"""
+    api_key = api_key or os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return None
+
+    def factory():
+        import openai
+        http_client = openai.DefaultAsyncHttpxClient(limits=_httpx_limits())
+        return openai.AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+    return _get_for_loop('openai', factory, api_key)
+
+
+def get_anthropic_client(api_key=None):
+    """anthropic 동기 클라이언트 (API 키 없으면 None)"""
+    api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        return None
+
+    def factory():
+        import anthropic
+        if not hasattr(anthropic, 'Anthropic'):
+            return anthropic.Client(api_key=api_key)  # 구버전 SDK
+        http_client = anthropic.DefaultHttpxClient(limits=_httpx_limits())
+        return anthropic.Anthropic(api_key=api_key, http_client=http_client)
+
+    return _get('anthropic', factory, api_key)
+
+
+def get_anthropic_async_client(api_key=None):
+    """anthropic 비동기 클라이언트 (SDK에 없으면 None, 이벤트 루프마다 하나)"""
+    api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        return None
+
+    import anthropic
+    if not hasattr(anthropic, 'AsyncAnthropic'):
+        return None
+
+    def factory():
+        http_client = anthropic.DefaultAsyncHttpxClient(limits=_httpx_limits())
+        return anthropic.AsyncAnthropic(api_key=api_key, http_client=http_client)
+
+    return _get_for_loop('anthropic', factory, api_key)
+
+
+def get_legacy_gemini_model(model_name):
+    """
+    google.generativeai 모델 (스크립트용)
+
+    genai.configure는 프로세스당 한 번, 같은 모델 이름은 같은 객체 재사용
+    """
+    def configure():
+        import google.generativeai as legacy_genai
+        legacy_genai.configure(api_key=gemini_api_key())
+        return legacy_genai
+
+    legacy_genai = _get('generativeai', configure)
+    return _get(f"generativeai:{model_name}", lambda: legacy_genai.GenerativeModel(model_name))
+
+
+# ===== Firestore =====
+
+def get_firestore_async_client():
+    """
+    Firestore 비동기 클라이언트 (기본 Firebase 앱 인증, 이벤트 루프마다 하나)
+
+    firebase_admin.firestore_async.client()는 프로세스당 하나라 다른 루프에서 쓰면 gRPC 채널 오류
+    """
+    def factory():
+        import firebase_admin
+        from google.cloud import firestore as cloud_firestore
+        app = firebase_admin.get_app()
+        return cloud_firestore.AsyncClient(
+            credentials=app.credential.get_credential(), project=app.project_id
+        )
+
+    return _get_for_loop('firestore', factory)
+
+
+# ===== Google Cloud Storage =====
+
+def get_storage_client():
+    """Cloud Storage 클라이언트 (서비스 계정, 인증 토큰/연결 재사용)"""
+    def factory():
+        from google.cloud import storage
+        return storage.Client.from_service_account_json(str(SERVICE_ACCOUNT_PATH))
+
+    return _get('storage', factory)
+
+
+def get_storage_bucket(bucket_name=None):
+    """Firebase Storage 버킷"""
+    bucket_name = bucket_name or STORAGE_BUCKET
+    return _get(f"storage:{bucket_name}", lambda: get_storage_client().bucket(bucket_name))
@@ -4,5 +4,6 @@ JNext v2 Core Module
 """
 
 from .context_manager import ContextManager
+from .token_budget import estimate_tokens, input_budget
 
-__all__ = ['ContextManager']
+__all__ = ['ContextManager', 'estimate_tokens', 'input_budget']
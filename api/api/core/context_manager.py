@@ -1,14 +1,37 @@
 """
 Context Manager - 동적 맥락 관리 시스템
 슬라이더 값에 따라 AI 맥락을 동적으로 조절
+모델별 토큰 예산 안에서 시스템 프롬프트 / 대화 이력 / DB 맥락을 가중치대로 배분
 """
 
 from typing import Dict, List, Optional
 
+from .. import ai_config
+from .token_budget import (
+    MESSAGE_OVERHEAD, PROMPT_OVERHEAD, estimate_tokens, input_budget,
+)
+
+# 토큰 예산으로 DB 맥락을 자를 때 붙이는 안내
+DB_TRIMMED_NOTE = "[...토큰 예산 초과로 이하 DB 내용 생략]"
+
+# 롤링 요약을 시스템 프롬프트에 붙일 때 머리말
+SUMMARY_HEADER = "\n\n## 📝 이 세션의 이전 대화 요약\n"
+
 
 class ContextManager:
     """동적 맥락 관리자"""
     
+    # 일반 대화 모드 시스템 프롬프트
+    GENERAL_PROMPT = """당신은 J님의 창의적 파트너 AI입니다. J님의 아이디어를 1차 증폭하여 RAW 데이터를 생성하는 역할입니다.
+
+핵심 원칙:
+- J님을 '사용자'가 아닌 'J님'이라고 호칭하세요
+- 존댓말을 사용하고 창의적으로 대화하세요
+- 대화 맥락을 철저히 유지하세요 (이전 대화에서 언급된 프로젝트/주제를 기억)
+- 근거 없는 추측이나 거짓 정보는 절대 제공하지 마세요
+- 확실하지 않은 내용은 "확실하지 않지만..." 또는 "추측하자면..."으로 명시하세요
+- 구체적이고 실용적인 개선안을 제시하세요 (일반론 지양)"""
+    
     @staticmethod
     def build_context(
         temperature: float,
@@ -17,10 +40,14 @@ class ContextManager:
         user_message: str,
         conversation_history: List[Dict],
         project_db_context: str = "",
-        project_prompt: str = ""
+        project_prompt: str = "",
+        model_name: str = 'gemini-pro'
     ) -> Dict:
         """
-        슬라이더 2개 값에 따라 맥락 구성
+        슬라이더 2개 값에 따라 맥락 구성 (단일 메시지 방식)
+        
+        full_message에 대화 이력이 이미 들어 있으므로 네이티브 대화 이력과 함께 보내지 말 것
+        (네이티브 이력을 쓰는 호출은 assemble 사용)
         
         Args:
             temperature: AI 창의성 (0.0-1.0)
@@ -30,13 +57,15 @@ class ContextManager:
             conversation_history: 대화 기록
             project_db_context: 프로젝트 DB 컨텍스트
             project_prompt: 프로젝트 시스템 프롬프트
+            model_name: 토큰 예산 기준 모델
             
         Returns:
             {
                 'system_prompt': str,
                 'full_message': str,
                 'temperature': float,
-                'weights': dict
+                'weights': dict,
+                'token_usage': dict
             }
         """
         
@@ -44,20 +73,17 @@ class ContextManager:
         if not project_id:
             # 대화 모드도 슬라이더 적용 (DB 조절)
             weights = ContextManager._calculate_weights(db_focus)
+            system_prompt = ContextManager.GENERAL_PROMPT
+            assembled = ContextManager.assemble(
+                model_name, system_prompt, user_message, conversation_history, "", db_focus
+            )
             
             return {
-                'system_prompt': """당신은 J님의 창의적 파트너 AI입니다. J님의 아이디어를 1차 증폭하여 RAW 데이터를 생성하는 역할입니다.
-
-핵심 원칙:
-- J님을 '사용자'가 아닌 'J님'이라고 호칭하세요
-- 존댓말을 사용하고 창의적으로 대화하세요
-- 대화 맥락을 철저히 유지하세요 (이전 대화에서 언급된 프로젝트/주제를 기억)
-- 근거 없는 추측이나 거짓 정보는 절대 제공하지 마세요
-- 확실하지 않은 내용은 "확실하지 않지만..." 또는 "추측하자면..."으로 명시하세요
-- 구체적이고 실용적인 개선안을 제시하세요 (일반론 지양)""",
-                'full_message': ContextManager._build_general_message(user_message, conversation_history),
+                'system_prompt': system_prompt,
+                'full_message': ContextManager._build_general_message(user_message, assembled['conversation_history']),
                 'temperature': temperature,  # 슬라이더에서 받은 값 사용
-                'weights': weights  # DB 슬라이더로 조절
+                'weights': weights,  # DB 슬라이더로 조절
+                'token_usage': assembled['token_usage']
             }
         
         # 프로젝트 모드 - 가중치 계산
@@ -70,11 +96,16 @@ class ContextManager:
             db_focus
         )
         
+        # 토큰 예산 안으로 대화 이력/DB 맥락 조정
+        assembled = ContextManager.assemble(
+            model_name, system_prompt, user_message, conversation_history, project_db_context, db_focus
+        )
+        
         # 전체 메시지 구성
         full_message = ContextManager._build_project_message(
             user_message,
-            conversation_history,
-            project_db_context,
+            assembled['conversation_history'],
+            assembled['db_context'],
             weights
         )
         
@@ -82,9 +113,141 @@ class ContextManager:
             'system_prompt': system_prompt,
             'full_message': full_message,
             'temperature': temperature,  # 슬라이더에서 받은 값 사용
-            'weights': weights
+            'weights': weights,
+            'token_usage': assembled['token_usage']
         }
     
+    @staticmethod
+    def assemble(
+        model_name: str,
+        system_prompt: str,
+        user_message: str,
+        conversation_history: List[Dict],
+        project_db_context: str = "",
+        db_focus: int = 0,
+        conversation_summary: str = ""
+    ) -> Dict:
+        """
+        모델 토큰 예산 안에서 맥락 조립 (네이티브 대화 이력 방식, call_ai_model 입력용)
+        
+        1. 시스템 프롬프트(세션 학습, 이전 대화 요약 포함) + 현재 질문은 항상 포함
+        2. 남은 예산을 가중치(대화 vs DB)대로 나눔, 한쪽이 덜 쓰면 나머지를 다른 쪽에
+        3. 대화 이력은 최신부터 들어가는 만큼, DB 맥락은 랭킹 순서대로 앞부분만
+        
+        Args:
+            model_name: 모델 키 ('all'이면 가장 작은 예산 기준)
+            system_prompt: 시스템 프롬프트
+            user_message: 현재 질문
+            conversation_history: 대화 기록 (오래된 것부터)
+            project_db_context: DB 맥락 (DB 미사용 시 빈 문자열)
+            db_focus: DB 사용률 (0-100)
+            conversation_summary: 원문에서 빠진 이전 대화의 롤링 요약
+            
+        Returns:
+            {
+                'system_prompt': str (이전 대화 요약 포함),
+                'conversation_history': list (예산에 맞춘 최근 대화),
+                'db_context': str (예산에 맞춘 DB 맥락),
+                'token_usage': dict (영역별 추정 토큰, 예산, 잘림 여부)
+            }
+        """
+        conversation_history = list(conversation_history or [])
+        # 방금 저장한 현재 질문은 user_message로 따로 전달되므로 이력에서 제외
+        if conversation_history and conversation_history[-1].get('role') == 'user' \
+                and conversation_history[-1].get('content') == user_message:
+            conversation_history.pop()
+        weights = ContextManager._calculate_weights(db_focus)
+        budget = input_budget(model_name)
+        
+        summary_tokens = 0
+        if conversation_summary:
+            summary_tokens = estimate_tokens(SUMMARY_HEADER + conversation_summary, model_name)
+            system_prompt = system_prompt + SUMMARY_HEADER + conversation_summary
+        system_tokens = estimate_tokens(system_prompt, model_name) + PROMPT_OVERHEAD - summary_tokens
+        user_tokens = estimate_tokens(user_message, model_name) + MESSAGE_OVERHEAD
+        remaining = max(budget - system_tokens - summary_tokens - user_tokens, 0)
+        
+        # 가중치 배분 (DB가 없으면 전부 대화, 대화가 없으면 전부 DB)
+        conversation_weight = weights['conversation'] if conversation_history else 0
+        project_weight = weights['project'] if project_db_context else 0
+        total_weight = conversation_weight + project_weight
+        db_share = remaining * project_weight // total_weight if total_weight else 0
+        history_share = remaining - db_share
+        
+        history, history_tokens = ContextManager._fit_history(
+            conversation_history, history_share, model_name
+        )
+        db_context, db_tokens = ContextManager._fit_db_context(
+            project_db_context, db_share + history_share - history_tokens, model_name
+        )
+        # DB가 몫보다 적게 쓰면 그만큼 대화 이력을 더 넣기
+        if len(history) < len(conversation_history) and db_tokens < db_share:
+            history, history_tokens = ContextManager._fit_history(
+                conversation_history, remaining - db_tokens, model_name
+            )
+        
+        total = system_tokens + summary_tokens + user_tokens + history_tokens + db_tokens
+        token_usage = {
+            'model': model_name,
+            'budget': budget,
+            'system_prompt': system_tokens,
+            'summary': summary_tokens,
+            'user_message': user_tokens,
+            'history': history_tokens,
+            'db_context': db_tokens,
+            'total': total,
+            'history_messages': len(history),
+            'history_dropped': len(conversation_history) - len(history),
+            'db_trimmed': db_context != (project_db_context or ""),
+        }
+        print(f"[ContextManager] 토큰 {total}/{budget} (대화 {len(history)}개 {history_tokens}, DB {db_tokens})")
+        
+        return {
+            'system_prompt': system_prompt,
+            'conversation_history': history,
+            'db_context': db_context,
+            'token_usage': token_usage
+        }
+    
+    @staticmethod
+    def _fit_history(conversation_history: List[Dict], budget: int, model_name: str):
+        """최신 메시지부터 예산 안에 들어가는 만큼 (순서 유지, 중간을 건너뛰지 않음)"""
+        max_messages = ai_config.CONTEXT_BUDGET_SETTINGS['max_history_messages']
+        kept = []
+        used = 0
+        for msg in reversed(conversation_history[-max_messages:]):
+            tokens = estimate_tokens(msg.get('content', ''), model_name) + MESSAGE_OVERHEAD
+            if used + tokens > budget:
+                break
+            kept.append(msg)
+            used += tokens
+        kept.reverse()
+        return kept, used
+    
+    @staticmethod
+    def _fit_db_context(project_db_context: str, budget: int, model_name: str):
+        """DB 맥락을 문단 단위로 앞에서부터 (랭킹 순서) 예산 안에 들어가는 만큼"""
+        if not project_db_context:
+            return "", 0
+        
+        tokens = estimate_tokens(project_db_context, model_name)
+        if tokens <= budget:
+            return project_db_context, tokens
+        
+        note_tokens = estimate_tokens(DB_TRIMMED_NOTE, model_name)
+        kept = []
+        used = note_tokens
+        for block in project_db_context.split("\n\n"):
+            block_tokens = estimate_tokens(block, model_name) + 1
+            if used + block_tokens > budget:
+                break
+            kept.append(block)
+            used += block_tokens
+        if not kept:
+            return "", 0
+        kept.append(DB_TRIMMED_NOTE)
+        return "\n\n".join(kept), used
+    
     @staticmethod
     def _calculate_weights(focus: int) -> Dict[str, int]:
         """
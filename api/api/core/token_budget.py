@@ -0,0 +1,88 @@
+"""
+Token Budget - 모델별 토큰 수 근사
+요청마다 빠르게 계산하도록 글자 종류(한글 음절 / ASCII / 기타)별 비율로 추정
+GPT는 tiktoken이 설치되어 있으면 실제 토크나이저 사용
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Optional
+
+from .. import ai_config
+
+
+_HANGUL_PATTERN = re.compile(r'[가-힣ㄱ-ㆎ]')
+_ASCII_PATTERN = re.compile(r'[\x00-\x7f]')
+
+# 메시지 하나당 역할/구분자 토큰
+MESSAGE_OVERHEAD = 4
+
+# 시스템 프롬프트 머리말(모델 이름)과 DB 구분자 등 고정 토큰
+PROMPT_OVERHEAD = 50
+
+
+def model_family(model_name: str) -> str:
+    """모델 키 → 토크나이저 계열 (gemini | gpt | claude)"""
+    if model_name.startswith('gpt'):
+        return 'gpt'
+    if model_name.startswith('claude'):
+        return 'claude'
+    return 'gemini'
+
+
+def _models(model_name: str):
+    """'all'이면 멀티 모델 전체"""
+    if model_name == 'all':
+        return ai_config.MULTI_MODEL_SETTINGS['models']
+    return [model_name]
+
+
+@lru_cache(maxsize=1)
+def _tiktoken_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding('o200k_base')
+    except Exception:
+        return None
+
+
+def _estimate_family(text: str, family: str) -> int:
+    if family == 'gpt':
+        encoding = _tiktoken_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+
+    ratios = ai_config.CONTEXT_BUDGET_SETTINGS['token_ratios'][family]
+    hangul = len(_HANGUL_PATTERN.findall(text))
+    ascii_chars = len(_ASCII_PATTERN.findall(text))
+    other = len(text) - hangul - ascii_chars
+    return math.ceil(
+        hangul * ratios['hangul'] + ascii_chars * ratios['ascii'] + other * ratios['other']
+    )
+
+
+def estimate_tokens(text: Optional[str], model_name: str = 'gemini-pro') -> int:
+    """
+    텍스트 토큰 수 추정
+
+    Args:
+        text: 텍스트
+        model_name: 모델 키 ('all'이면 모델 중 가장 큰 값)
+
+    Returns:
+        int: 추정 토큰 수
+    """
+    if not text:
+        return 0
+    families = {model_family(name) for name in _models(model_name)}
+    return max(_estimate_family(text, family) for family in families)
+
+
+def input_budget(model_name: str) -> int:
+    """모델 입력 토큰 예산 ('all'이면 가장 작은 예산)"""
+    settings = ai_config.CONTEXT_BUDGET_SETTINGS
+    return min(
+        settings['input_tokens'].get(name, settings['default_input_tokens'])
+        for name in _models(model_name)
+    )
@@ -5,6 +5,8 @@ Firestore DB 서비스 레이어
 from firebase_admin import firestore
 from datetime import datetime
 from django.conf import settings
+from . import clients
+from .search_index import get_index
 
 
 class FirestoreService:
@@ -15,6 +17,11 @@ class FirestoreService:
         """Firestore 클라이언트 반환"""
         return firestore.client()
     
+    @staticmethod
+    def get_async_client():
+        """Firestore 비동기 클라이언트 반환 (비동기 뷰용, 현재 이벤트 루프 전용)"""
+        return clients.get_firestore_async_client()
+    
     @staticmethod
     def query_collections(collections=None, filters=None, limit=50):
         """
@@ -99,6 +106,33 @@ class FirestoreService:
         except Exception as e:
             raise Exception(f"문서 조회 실패: {str(e)}")
     
+    @staticmethod
+    def get_project_document(project_id, collection, doc_id):
+        """
+        프로젝트 문서 조회 (메모리 캐시 우선, 없으면 Firestore에서 읽어 캐시에 반영)
+        
+        Args:
+            project_id: 프로젝트 ID
+            collection: raw | draft | final
+            doc_id: 문서 ID
+            
+        Returns:
+            dict: 문서 데이터 사본 (타임스탬프 원형 유지) 또는 None
+        """
+        index = get_index(project_id)
+        data = index.get(collection, doc_id)
+        if data is not None:
+            return dict(data)
+        
+        # 캐시 미스: 색인 이후 다른 곳에서 생성된 문서일 수 있음
+        db = FirestoreService.get_client()
+        doc = db.collection('projects').document(project_id).collection(collection).document(doc_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict() or {}
+        index.upsert(collection, doc_id, data, getattr(doc, 'update_time', None))
+        return dict(data)
+    
     @staticmethod
     def create_document(collection, data):
         """
@@ -220,6 +254,39 @@ class FirestoreService:
         
         return results
     
+    @staticmethod
+    def search_project_documents(project_id, keyword, stages=None, fields=['제목', '내용'], limit=50):
+        """
+        프로젝트 문서 키워드 검색 (프로젝트 역색인 사용, 전체 스캔 없음)
+        
+        Args:
+            project_id: 프로젝트 ID (projects/{project_id}/{stage})
+            keyword: 검색 키워드
+            stages: 검색할 단계 리스트 (raw/draft/final, None이면 전체)
+            fields: 검색할 필드 리스트
+            limit: 최대 결과 수
+            
+        Returns:
+            list: 매칭된 문서 리스트 ('_id', '_collection' 포함)
+        """
+        results = []
+        
+        # n-gram 색인으로 후보 추출 → 필드별 키워드 포함 여부 검증
+        index = get_index(project_id)
+        for stage, doc_id, data in index.candidates(keyword, stages=stages):
+            for field in fields:
+                if field in data and keyword in str(data[field]):
+                    doc_data = dict(data)
+                    doc_data['_id'] = doc_id
+                    doc_data['_collection'] = stage
+                    results.append(FirestoreService._convert_timestamps(doc_data))
+                    break
+            
+            if len(results) >= limit:
+                break
+        
+        return results
+    
     @staticmethod
     def _convert_timestamps(doc_data):
         """DatetimeWithNanoseconds를 ISO 문자열로 변환"""
@@ -0,0 +1,141 @@
+"""
+문서 정규 스키마 (필드 이름 정리)
+같은 본문이 content, 내용, final_refined, 정리본, ai_응답 ... 여러 이름으로 저장되어
+읽을 때마다 긴 or 체인, 재생성 적용 때마다 본문 8벌 쓰기
+
+- 정규 필드: BaseProject.field_mapping (영문 키 → 저장 필드, 본문은 'content')
+- '스키마버전'이 SCHEMA_VERSION인 문서: 본문은 정규 필드 한 번 조회
+- 이전 문서: LEGACY_FIELDS 순서로 조회 (정제본 우선)
+- 전체글(full_text)은 본문과 다를 때만 따로 저장 (없으면 본문 사용)
+
+이전 문서 압축: scripts/utils/compact_documents.py (compact_document 변환)
+"""
+from firebase_admin import firestore
+
+
+SCHEMA_VERSION = 2
+SCHEMA_VERSION_FIELD = '스키마버전'
+
+# 정규 필드가 없는 이전 문서에서 확인할 필드 (영문 키 → 우선순위 순)
+LEGACY_FIELDS = {
+    'title': ('제목', 'title', 'exercise_name'),
+    'category': ('category', '카테고리'),
+    'content': (
+        'final_refined', 'refined', 'organized_content', 'content',
+        '정리본', 'ai_응답', '내용', '내용전체'
+    ),
+    'full_text': ('전체글', 'full_text'),
+    'original': ('J님원본', '원본', 'original_content', '원본질문'),
+}
+
+# 압축 대상 (정규 문서는 정규 필드만 조회)
+COMPACT_KEYS = ('content',)
+
+# 본문 사본 필드 (정규 문서에서는 정규 필드 하나만 남김)
+BODY_COPY_FIELDS = LEGACY_FIELDS['content']
+
+
+def _default_mapping():
+    from .projects.base import BaseProject  # 지연 임포트로 순환 방지 (base → search_index → 여기)
+    return BaseProject.field_mapping
+
+
+def field_name(key, mapping=None):
+    """영문 키의 저장 필드 이름"""
+    return (mapping or _default_mapping()).get(key, key)
+
+
+def is_canonical(data):
+    return data.get(SCHEMA_VERSION_FIELD) == SCHEMA_VERSION
+
+
+def _text(value):
+    """문자열 값만 (불리언 플래그 'refined': True 등 제외, 리스트는 이어 붙임)"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return ' '.join(item for item in value if isinstance(item, str))
+    return ''
+
+
+def read_field(data, key, mapping=None):
+    """
+    문서 필드 읽기 (정규 문서는 한 번 조회, 이전 문서는 LEGACY_FIELDS 순서)
+
+    Args:
+        data: 문서 데이터
+        key: 영문 키 ('content', 'title', 'category', 'full_text', 'original')
+        mapping: 프로젝트 field_mapping (없으면 BaseProject 기본값)
+
+    Returns:
+        str: 값 (없으면 빈 문자열)
+    """
+    name = field_name(key, mapping)
+    if key in COMPACT_KEYS and is_canonical(data):
+        return _text(data.get(name))
+    for field in LEGACY_FIELDS.get(key, (name,)):
+        text = _text(data.get(field))
+        if text:
+            return text
+    return ''
+
+
+def read_body(data, mapping=None):
+    """출판용 전체글이 있으면 전체글, 없으면 본문"""
+    return read_field(data, 'full_text', mapping) or read_field(data, 'content', mapping)
+
+
+def content_updates(text, mapping=None):
+    """
+    본문 교체용 update 데이터 (정규 필드 하나 + 사본 필드 삭제)
+
+    Firestore update()/set(merge=True)에 그대로 사용
+    """
+    name = field_name('content', mapping)
+    updates = {field: firestore.DELETE_FIELD for field in BODY_COPY_FIELDS if field != name}
+    updates[name] = text
+    updates[SCHEMA_VERSION_FIELD] = SCHEMA_VERSION
+    return updates
+
+
+def normalize_updates(updates, mapping=None):
+    """update 데이터의 본문 사본 필드(content, 정리본 ...)를 정규 필드 하나로"""
+    if not any(field in updates for field in BODY_COPY_FIELDS):
+        return updates
+    body = read_field(updates, 'content', mapping)
+    normalized = {key: value for key, value in updates.items() if key not in BODY_COPY_FIELDS}
+    normalized.update(content_updates(body, mapping))
+    return normalized
+
+
+def compact_document(data, mapping=None):
+    """
+    이전 문서 → 정규 문서 변환 (firestore_migration 변환 함수, merge=True로 적용)
+
+    본문과 같은 사본 필드만 삭제, 내용이 다른 필드는 그대로 둠 (데이터 손실 없음)
+    정규 필드에 다른 본문이 이미 있으면 변환하지 않음 (충돌: 수동 확인)
+
+    Returns:
+        dict: update 데이터, 변환할 필요 없으면 None
+    """
+    if is_canonical(data):
+        return None
+
+    body = read_field(data, 'content', mapping)
+    if not body:
+        return None
+
+    name = field_name('content', mapping)
+    current = _text(data.get(name))
+    if current and current != body:
+        print(f"[DocumentSchema] 본문 충돌, 건너뜀 ({name} ≠ 정제본)")
+        return None
+
+    updates = {field: firestore.DELETE_FIELD for field in BODY_COPY_FIELDS
+               if field != name and data.get(field) == body}
+    full_text_name = field_name('full_text', mapping)
+    if data.get(full_text_name) == body:
+        updates[full_text_name] = firestore.DELETE_FIELD
+    updates[name] = body
+    updates[SCHEMA_VERSION_FIELD] = SCHEMA_VERSION
+    return updates
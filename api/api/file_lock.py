@@ -0,0 +1,50 @@
+"""
+프로세스 간 파일 잠금 (fcntl, Windows는 msvcrt)
+
+같은 캐시 파일을 여러 워커 프로세스가 쓸 때 사용 (chat_buffer 저널, semantic_index 벡터 파일)
+"""
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock(f, blocking=False):
+    """파일 배타 잠금 (비차단이면 다른 프로세스가 잡고 있을 때 False)"""
+    try:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def unlock(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def locked(path, blocking=True):
+    """
+    잠금 파일 path를 잡은 동안 실행
+
+    Yields:
+        bool: 잠금 성공 여부 (blocking=False면 다른 프로세스가 잡고 있을 때 False)
+    """
+    with open(path, 'a+') as f:
+        acquired = lock(f, blocking)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                unlock(f)
@@ -0,0 +1,244 @@
+"""
+Firestore 마이그레이션 실행기 (컬렉션 복사 / 필드 이름 정리 / 삭제 등 스키마 변경)
+컬렉션 전체를 stream()으로 받아 한 건씩 쓰면 느리고, 중간에 끊기면 어디까지 했는지 알 수 없음
+
+- 문서 ID 순서로 page_size개씩 커서 페이지 조회 (start_after)
+- 페이지 단위 변환 → BulkWriter로 쓰기 (흐름 제어 + 일시 오류 재시도)
+- 페이지 쓰기가 끝날 때마다 마지막 문서 ID를 상태 파일에 기록 → 재실행 시 이어서 진행
+- dry_run: 쓰기 없이 대상 문서 수 / 변경 수 / 크기 보고
+
+새 마이그레이션은 transform 함수 하나만 작성:
+    def transform(doc_id, data):
+        return 새 데이터 dict / None(변경 없음) / DELETE(원본 문서 삭제)
+
+    run_migration(Migration('rename_fields', 'projects/hinobalance/raw', transform))
+
+transform은 같은 문서에 두 번 적용돼도 결과가 같아야 함 (재개 시 마지막 페이지를 다시 처리할 수 있음)
+상태 파일: cache/migrations/{name}.json
+"""
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from firebase_admin import firestore
+
+from .batch_engine import BatchStats, open_bulk_writer
+
+
+# 기본값
+DEFAULT_STATE_DIR = Path(__file__).resolve().parent.parent / 'cache' / 'migrations'
+DEFAULT_PAGE_SIZE = 300
+MAX_FAILED_IDS = 1000
+
+# transform 반환값: 원본 문서 삭제
+DELETE = object()
+
+
+class Migration:
+    """
+    마이그레이션 정의
+
+    name: 상태 파일 이름 (마이그레이션마다 고유)
+    source: 원본 컬렉션 경로 ('hino_raw', 'projects/hinobalance/raw')
+    transform: transform(doc_id, data) → 새 데이터 / None / DELETE
+    target: 대상 컬렉션 경로 (None이면 원본 문서를 제자리에서 교체)
+    merge: True면 반환한 필드만 갱신 (False면 문서 전체 교체 → 빠진 필드 삭제)
+    """
+
+    def __init__(self, name, source, transform, target=None, merge=False):
+        self.name = name
+        self.source = source
+        self.transform = transform
+        self.target = target
+        self.merge = merge
+
+
+class MigrationState:
+    """진행 상태 (마지막 처리 문서 ID + 누적 집계, JSON 파일)"""
+
+    FIELDS = ('scanned', 'written', 'deleted', 'unchanged', 'failed', 'bytes_before', 'bytes_after')
+
+    def __init__(self, name, directory=None):
+        self.path = Path(directory or DEFAULT_STATE_DIR) / f"{name}.json"
+        self.cursor = None
+        self.finished = False
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+        self.failed_ids = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.cursor = data.get('cursor')
+            self.finished = data.get('finished', False)
+            self.counts.update(data.get('counts', {}))
+            self.failed_ids = data.get('failed_ids', [])
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"[Migration] {self.path.name} 읽기 실패, 처음부터 시작: {e}")
+
+    def reset(self):
+        self.cursor = None
+        self.finished = False
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+        self.failed_ids = []
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (중간에 죽어도 이전 상태 유지)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'cursor': self.cursor,
+                'finished': self.finished,
+                'counts': self.counts,
+                'failed_ids': self.failed_ids,
+                'at': datetime.now().isoformat(timespec='seconds'),
+            }, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def value_size(value):
+    """Firestore 저장 크기 기준 값 크기 (바이트, 근사치)"""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode('utf-8')) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(value_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(len(str(key).encode('utf-8')) + 1 + value_size(item) for key, item in value.items())
+    path = getattr(value, 'path', None)  # DocumentReference
+    if path:
+        return len(path.encode('utf-8')) + 16
+    return 16  # GeoPoint 등
+
+
+def document_size(path, data):
+    """문서 크기 (문서 이름 + 필드 + 32바이트, Firestore 한도 1MiB)"""
+    name_size = sum(len(part.encode('utf-8')) + 1 for part in path.split('/')) + 16
+    return name_size + value_size(data) + 32
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def run_migration(migration, db=None, dry_run=False, page_size=None, max_ops_per_second=None, restart=False):
+    """
+    마이그레이션 실행 (이전 실행이 중간에 끊겼으면 이어서)
+
+    Args:
+        migration: Migration
+        db: Firestore 클라이언트 (없으면 기본 앱)
+        dry_run: True면 쓰기/상태 저장 없이 보고만
+        page_size: 페이지당 문서 수
+        max_ops_per_second: BulkWriter 초당 최대 쓰기 수
+        restart: True면 상태 파일 무시하고 처음부터
+
+    Returns:
+        dict: 누적 집계 (scanned, written, deleted, unchanged, failed, bytes_before, bytes_after)
+    """
+    db = db or firestore.client()
+    page_size = page_size or DEFAULT_PAGE_SIZE
+    label = f"Migration:{migration.name}"
+
+    state = MigrationState(migration.name)
+    if restart or dry_run:
+        state.reset()
+    elif state.finished:
+        print(f"[{label}] 이미 완료됨 (다시 실행: restart=True)")
+        return state.counts
+    elif state.cursor:
+        print(f"[{label}] {state.cursor} 다음부터 이어서 (처리 {state.counts['scanned']}건)")
+
+    source = db.collection(migration.source)
+    target = db.collection(migration.target) if migration.target else None
+    query = source.order_by('__name__').limit(page_size)
+
+    stats = BatchStats()
+    failed_before = state.counts['failed']
+    scanned_before = state.counts['scanned']
+
+    def on_failure(doc_id, message):
+        if len(state.failed_ids) < MAX_FAILED_IDS:
+            state.failed_ids.append(doc_id)
+
+    bulk_writer = None if dry_run else open_bulk_writer(
+        db, stats, max_ops_per_second=max_ops_per_second, on_failure=on_failure
+    )
+
+    try:
+        while True:
+            page = query
+            if state.cursor:
+                page = query.start_after({'__name__': source.document(state.cursor)})
+            docs = list(page.stream())
+            if not docs:
+                break
+
+            for doc in docs:
+                data = doc.to_dict()
+                size = document_size(doc.reference.path, data)
+                result = migration.transform(doc.id, dict(data))
+                state.counts['scanned'] += 1
+                state.counts['bytes_before'] += size
+
+                if result is None:
+                    state.counts['unchanged'] += 1
+                    if target is None:
+                        state.counts['bytes_after'] += size
+                elif result is DELETE:
+                    state.counts['deleted'] += 1
+                    if bulk_writer:
+                        bulk_writer.delete(doc.reference)
+                else:
+                    ref = target.document(doc.id) if target else doc.reference
+                    written = result
+                    if migration.merge:
+                        written = {key: value for key, value in {**data, **result}.items()
+                                   if value is not firestore.DELETE_FIELD}
+                    state.counts['written'] += 1
+                    state.counts['bytes_after'] += document_size(ref.path, written)
+                    if bulk_writer:
+                        bulk_writer.set(ref, result, merge=migration.merge)
+
+            state.cursor = docs[-1].id
+            if bulk_writer:
+                bulk_writer.flush()  # 이 페이지 쓰기가 끝난 뒤에만 커서 저장
+                state.counts['failed'] = failed_before + stats.failed
+                state.save()
+            print(f"[{label}] {state.counts['scanned']}건 처리 (마지막 {state.cursor})")
+
+            if len(docs) < page_size:
+                break
+    finally:
+        if bulk_writer:
+            bulk_writer.close()
+
+    if not dry_run:
+        state.finished = True
+        state.save()
+    _report(label, state, state.counts['scanned'] - scanned_before, stats.elapsed, dry_run)
+    return state.counts
+
+
+def _report(label, state, scanned, elapsed, dry_run):
+    counts = state.counts
+    minutes = max(elapsed / 60, 1e-9)
+    prefix = '[DRY RUN] ' if dry_run else ''
+    print(f"[{label}] {prefix}문서 {counts['scanned']}건: 쓰기 {counts['written']}, 삭제 {counts['deleted']}, "
+          f"변경 없음 {counts['unchanged']}, 실패 {counts['failed']}")
+    print(f"[{label}] {prefix}크기: 원본 {_format_bytes(counts['bytes_before'])} → "
+          f"결과 {_format_bytes(counts['bytes_after'])} (삭제된 문서 제외)")
+    print(f"[{label}] 이번 실행 {scanned}건, 소요 {elapsed:.1f}s, 처리량 {scanned / minutes:.1f}건/분")
+    if state.failed_ids:
+        print(f"[{label}] 실패 문서 {len(state.failed_ids)}개 (상태 파일 failed_ids, restart=True로 다시 실행)")
@@ -0,0 +1,197 @@
+"""
+최근 대화 기록 캐시 (프로젝트/세션별 링 버퍼)
+첫 조회 때 Firestore에서 채우고, 이후에는 save_chat_history가 바로 추가
+→ 매 턴 chat_history 재조회(최대 100개 본문 다운로드) 없이 최근 대화 반환
+
+링은 프로세스별이라 다른 워커가 저장한 대화는 모름
+→ 마지막 동기화 후 HISTORY_CACHE_REFRESH초가 지나면 최근 REFRESH_WINDOW개만 다시 읽어 합침
+
+정렬 기준은 문서 ID (저장 시각 'YYYYMMDD_HHMMSS_ffffff' = '시간' 필드와 동일 순서)
+세션 지정 시 projects/{pid}/sessions/{sid}/messages만, 아니면 chat_history에서 프로젝트 일치분
+프로젝트 ALL_PROJECTS: 프로젝트 구분 없이 chat_history 전체 (v1 채팅)
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from firebase_admin import firestore
+
+from .chat_buffer import get_chat_buffer
+from .chat_sessions import messages_path
+
+
+# 기본값 (Django 설정이 없을 때)
+DEFAULT_HISTORY_SIZE = 100
+DEFAULT_MAX_SCOPES = 32
+DEFAULT_REFRESH_INTERVAL = 10
+
+# 다른 워커의 새 대화 확인 시 읽는 최근 메시지 수 (쓰기 버퍼 때문에 늦게 커밋된 메시지 포함)
+REFRESH_WINDOW = 20
+
+COLLECTION = 'chat_history'
+
+# 프로젝트 구분 없는 범위 (chat_history 전체)
+ALL_PROJECTS = '*'
+
+
+class _Ring:
+    """범위(프로젝트/세션) 하나의 최근 메시지 (오래된 것부터)"""
+
+    def __init__(self, size):
+        self.size = size
+        self.messages = deque()   # (doc_id, {'role', 'content'})
+        self.ids = set()
+        self.synced_at = time.monotonic()  # 마지막 Firestore 동기화
+
+    def append(self, doc_id, message):
+        if doc_id in self.ids:
+            return
+        self.messages.append((doc_id, message))
+        self.ids.add(doc_id)
+        while len(self.messages) > self.size:
+            old_id, _ = self.messages.popleft()
+            self.ids.discard(old_id)
+
+    def merge(self, entries):
+        """다른 곳에서 저장된 메시지 합치기 (문서 ID 순서 유지)"""
+        new = [(doc_id, message) for doc_id, message in entries if doc_id not in self.ids]
+        if not new:
+            return
+        combined = sorted(list(self.messages) + new, key=lambda item: item[0])[-self.size:]
+        self.messages = deque(combined)
+        self.ids = {doc_id for doc_id, _ in combined}
+
+
+class HistoryCache:
+    """
+    프로젝트/세션별 최근 대화 링 버퍼
+
+    범위 키: (project_context, session_id)
+    (project_context None이면 일반 대화, ALL_PROJECTS면 전체, session_id None이면 세션 구분 없음)
+    오래 안 쓴 범위는 HISTORY_CACHE_MAX_SCOPES 초과 시 해제
+    """
+
+    def __init__(self, size=None, max_scopes=None, refresh_interval=None):
+        if settings.configured:
+            size = size or getattr(settings, 'HISTORY_CACHE_SIZE', None)
+            max_scopes = max_scopes or getattr(settings, 'HISTORY_CACHE_MAX_SCOPES', None)
+            refresh_interval = refresh_interval or getattr(settings, 'HISTORY_CACHE_REFRESH', None)
+        self.size = size or DEFAULT_HISTORY_SIZE
+        self.max_scopes = max_scopes or DEFAULT_MAX_SCOPES
+        self.refresh_interval = refresh_interval or DEFAULT_REFRESH_INTERVAL
+        self._lock = threading.Lock()
+        self._rings = OrderedDict()   # (project_context, session_id) → _Ring
+
+    def _load(self, scope, limit):
+        """Firestore 최근 메시지 limit개 + 아직 커밋 안 된 쓰기 버퍼 (문서 ID 순)"""
+        project_context, session_id = scope
+        loaded = []
+        try:
+            db = firestore.client()
+            if session_id:
+                query = db.collection(messages_path(project_context, session_id))
+            elif project_context == ALL_PROJECTS:
+                query = db.collection(COLLECTION)
+            else:
+                query = db.collection(COLLECTION).where('project_context', '==', project_context)
+            docs = query\
+                .order_by('__name__', direction=firestore.Query.DESCENDING)\
+                .limit(limit)\
+                .stream()
+            loaded = [(doc.id, doc.to_dict()) for doc in docs]
+        except Exception as e:
+            print(f"[HistoryCache] 대화 로드 실패 ({self._label(scope)}): {e}")
+
+        if session_id:
+            pending = get_chat_buffer().pending(prefix=messages_path(project_context, session_id) + '/')
+        else:
+            pending = [
+                (doc_id, data) for doc_id, data in get_chat_buffer().pending()
+                if project_context == ALL_PROJECTS or data.get('project_context') == project_context
+            ]
+        return [
+            (doc_id, {'role': data.get('역할', 'user'), 'content': data.get('내용', '')})
+            for doc_id, data in sorted(loaded + pending, key=lambda item: item[0])
+        ]
+
+    @staticmethod
+    def _label(scope):
+        project_context, session_id = scope
+        return f"{project_context or '일반 대화'}/{session_id or '전체'}"
+
+    def _ring(self, scope):
+        """범위 링 (없으면 Firestore에서 채움, 오래됐으면 최근분 합침, self._lock 보유 상태에서 호출)"""
+        ring = self._rings.get(scope)
+        if ring is None:
+            ring = _Ring(self.size)
+            ring.merge(self._load(scope, self.size))
+            print(f"[HistoryCache] {self._label(scope)}: {len(ring.messages)}개 로드")
+            self._rings[scope] = ring
+            while len(self._rings) > self.max_scopes:
+                self._rings.popitem(last=False)
+        elif time.monotonic() - ring.synced_at >= self.refresh_interval:
+            ring.merge(self._load(scope, REFRESH_WINDOW))  # 다른 워커가 저장한 대화
+            ring.synced_at = time.monotonic()
+        self._rings.move_to_end(scope)
+        return ring
+
+    def recent(self, scope, limit):
+        """
+        최근 메시지 (오래된 것부터)
+
+        Args:
+            scope: (project_context, session_id)
+            limit: 최대 메시지 수 (None이면 전체)
+
+        Returns:
+            list: [{'role': 'user', 'content': '...'}, ...]
+        """
+        with self._lock:
+            ring = self._ring(scope)
+            messages = [dict(message) for _, message in ring.messages]
+        return messages[-limit:] if limit else messages
+
+    def entries(self, scope, limit=None):
+        """
+        최근 메시지와 문서 ID (오래된 것부터, 롤링 요약 범위 계산용)
+
+        Returns:
+            list: [(doc_id, {'role', 'content'}), ...]
+        """
+        with self._lock:
+            ring = self._ring(scope)
+            entries = [(doc_id, dict(message)) for doc_id, message in ring.messages]
+        return entries[-limit:] if limit else entries
+
+    def append(self, scope, doc_id, role, content):
+        """
+        새 메시지 추가 (아직 로드 안 된 범위는 첫 조회 때 버퍼/Firestore에서 채워짐)
+
+        세션 메시지도 chat_history에 저장되므로 프로젝트 전체 / 전체 범위 링에도 추가
+        """
+        project_context, session_id = scope
+        scopes = {scope, (project_context, None), (ALL_PROJECTS, None)}
+        with self._lock:
+            for target in scopes:
+                ring = self._rings.get(target)
+                if ring is not None:
+                    ring.append(doc_id, {'role': role, 'content': content})
+
+    def invalidate(self, scope):
+        """범위 링 제거 (다음 조회 시 다시 로드)"""
+        with self._lock:
+            self._rings.pop(scope, None)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_history_cache():
+    """대화 기록 캐시 싱글톤"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HistoryCache()
+        return _cache
@@ -0,0 +1,373 @@
+"""
+백그라운드 작업 큐 (로컬 SQLite, 프로세스 재시작에도 유지)
+요청 경로에서 오래 걸리는 작업(RAW 분석 등)을 큐에 넣고 즉시 반환
+→ 워커 스레드들이 꺼내 실행, 실패 시 지수 백오프로 재시도, 한도 초과 시 dead 상태로 보관
+
+처리량은 워커 수(settings.JOB_QUEUE_WORKERS)에 비례
+여러 프로세스(gunicorn 워커)가 같은 파일을 써도 작업은 한 번만 가져감 (BEGIN IMMEDIATE)
+실행 중인 작업은 임대(lease): 가져간 프로세스가 실행하는 동안 주기적으로 연장,
+연장이 끊긴(프로세스 종료) 작업만 다른 프로세스가 다시 가져감
+"""
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+
+
+# 기본값 (Django 설정이 없을 때)
+DEFAULT_QUEUE_PATH = Path(__file__).resolve().parent.parent / 'cache' / 'jobs.sqlite3'
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_LEASE_SECONDS = 60  # 실행 중 작업 임대 기간 (1/3마다 연장)
+
+# 재시도 대기: BACKOFF_BASE * 2^(시도-1) + 지터, 최대 BACKOFF_MAX (초)
+BACKOFF_BASE = 5
+BACKOFF_MAX = 15 * 60
+
+# 작업이 없을 때 큐 확인 주기 (초, 다른 프로세스가 넣은 작업/재시도 대기 작업용)
+POLL_INTERVAL = 2.0
+
+# 작업 상태
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+DEAD = 'dead'
+
+# 완료 작업 보관 기간 (초, 이후 삭제)
+DONE_RETENTION = 7 * 24 * 60 * 60
+
+
+def backoff_delay(attempts):
+    """재시도 대기 시간 (지수 백오프 + 최대 50% 지터)"""
+    delay = min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+    return delay + random.uniform(0, delay / 2)
+
+
+class JobQueue:
+    """
+    작업 큐 (SQLite jobs 테이블 + 워커 스레드 풀)
+
+    - enqueue(kind, payload): 작업 추가 (payload는 JSON 직렬화 가능한 dict)
+    - enqueue(..., dedupe_key=...): 같은 키의 대기 작업이 있으면 새로 넣지 않음
+    - register(kind, handler): 작업 종류별 처리 함수 (예외를 던지면 재시도)
+    - 'running' 작업은 locked_by(호스트:pid) + lease_until로 임대, 임대가 만료된 작업만 다시 가져감
+      (실행 중 프로세스가 죽은 작업, 살아 있는 다른 프로세스의 작업은 건드리지 않음)
+    """
+
+    def __init__(self, path=None, workers=None, max_attempts=None, lease_seconds=None):
+        if settings.configured:
+            path = path or getattr(settings, 'JOB_QUEUE_PATH', None)
+            workers = workers or getattr(settings, 'JOB_QUEUE_WORKERS', None)
+            max_attempts = max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', None)
+            lease_seconds = lease_seconds or getattr(settings, 'JOB_LEASE_SECONDS', None)
+        self.path = Path(path or DEFAULT_QUEUE_PATH)
+        self.workers = workers or DEFAULT_WORKERS
+        self.max_attempts = max_attempts or DEFAULT_MAX_ATTEMPTS
+        self.lease_seconds = lease_seconds or DEFAULT_LEASE_SECONDS
+
+        self._handlers = {}
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._initialized = False
+
+    @property
+    def owner(self):
+        """임대 소유자 ID (fork 후에도 현재 프로세스 기준)"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _connect(self):
+        """스레드별 연결 (SQLite 연결은 스레드 간 공유하지 않음)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    run_at REAL NOT NULL,
+                    last_error TEXT,
+                    dedupe_key TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'dedupe_key' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN dedupe_key TEXT")
+            if 'locked_by' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN locked_by TEXT")
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, run_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, status)")
+            self._local.conn = conn
+        return conn
+
+    def register(self, kind, handler):
+        """작업 종류별 처리 함수 등록 (handler(**payload))"""
+        self._handlers[kind] = handler
+
+    def enqueue(self, kind, payload, max_attempts=None, dedupe_key=None, delay=0):
+        """
+        작업 추가 (즉시 반환)
+
+        Args:
+            kind: 작업 종류 (register로 등록한 이름)
+            payload: 처리 함수 인자 dict
+            max_attempts: 최대 시도 횟수 (기본 settings.JOB_MAX_ATTEMPTS)
+            dedupe_key: 같은 키의 대기(pending) 작업이 있으면 추가하지 않고 그 작업 ID 반환
+            delay: 실행 지연 (초)
+
+        Returns:
+            int: 작업 ID
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if dedupe_key:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key=? AND status=? LIMIT 1",
+                    (dedupe_key, PENDING)
+                ).fetchone()
+                if row:
+                    conn.execute("COMMIT")
+                    return row[0]
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_at, dedupe_key, created_at, updated_at) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload, ensure_ascii=False, default=str), PENDING,
+                 max_attempts or self.max_attempts, now + delay, dedupe_key, now, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wakeup.set()
+        print(f"[JobQueue] 작업 추가: {kind} #{cursor.lastrowid}")
+        return cursor.lastrowid
+
+    def _claim(self):
+        """
+        실행할 작업 하나를 가져와 'running' + 임대로 표시 (없으면 None)
+
+        대기 작업, 또는 임대가 만료된 실행 중 작업 (가져간 프로세스가 죽음, 시도 횟수에 포함)
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts, max_attempts, status FROM jobs "
+                "WHERE ((status=? AND run_at<=?) OR (status=? AND COALESCE(lease_until, 0)<?)) "
+                "AND kind IN (%s) ORDER BY run_at, id LIMIT 1"
+                % ','.join('?' * len(self._handlers)),
+                (PENDING, now, RUNNING, now, *self._handlers)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status=?, attempts=attempts+1, locked_by=?, lease_until=?, updated_at=? WHERE id=?",
+                (RUNNING, self.owner, now + self.lease_seconds, now, row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        job_id, kind, payload, attempts, max_attempts, status = row
+        if status == RUNNING:
+            print(f"[JobQueue] {kind} #{job_id} 임대 만료 (이전 실행 중단), 다시 실행")
+        return job_id, kind, json.loads(payload), attempts + 1, max_attempts
+
+    def _renew_lease(self, job_id, finished):
+        """실행이 끝날 때까지 임대 연장 (lease_seconds의 1/3마다)"""
+        interval = self.lease_seconds / 3
+        while not finished.wait(interval):
+            try:
+                conn = self._connect()
+                conn.execute("UPDATE jobs SET lease_until=? WHERE id=? AND status=? AND locked_by=?",
+                             (time.time() + self.lease_seconds, job_id, RUNNING, self.owner))
+            except Exception as e:
+                print(f"[JobQueue] #{job_id} 임대 연장 실패: {e}")
+
+    def _release(self, job_id, columns, params):
+        """임대 해제와 함께 상태 갱신 (임대를 잃었으면 갱신하지 않음)"""
+        conn = self._connect()
+        updated = conn.execute(
+            f"UPDATE jobs SET {columns}, locked_by=NULL, lease_until=NULL, updated_at=? "
+            f"WHERE id=? AND status=? AND locked_by=?",
+            (*params, time.time(), job_id, RUNNING, self.owner)
+        ).rowcount
+        if not updated:
+            print(f"[JobQueue] #{job_id} 임대를 잃음 (다른 프로세스가 재실행), 결과 기록 생략")
+        return bool(updated)
+
+    def _finish(self, job_id):
+        self._release(job_id, "status=?, last_error=NULL", (DONE,))
+
+    def _fail(self, job_id, kind, attempts, max_attempts, error):
+        """실패 기록: 한도 전이면 백오프 후 재시도, 한도 도달 시 dead"""
+        if attempts >= max_attempts:
+            if self._release(job_id, "status=?, last_error=?", (DEAD, error)):
+                print(f"[JobQueue] {kind} #{job_id} 실패 {attempts}회 → dead: {error.splitlines()[-1] if error else ''}")
+            return
+        delay = backoff_delay(attempts)
+        if self._release(job_id, "status=?, run_at=?, last_error=?", (PENDING, time.time() + delay, error)):
+            print(f"[JobQueue] {kind} #{job_id} 실패 ({attempts}/{max_attempts}), {delay:.0f}초 후 재시도")
+
+    def run_once(self):
+        """
+        대기 작업 하나 실행
+
+        Returns:
+            bool: 실행한 작업이 있으면 True
+        """
+        if not self._handlers:
+            return False
+        job = self._claim()
+        if job is None:
+            return False
+
+        job_id, kind, payload, attempts, max_attempts = job
+        finished = threading.Event()
+        renewer = threading.Thread(target=self._renew_lease, args=(job_id, finished),
+                                   name=f'job-lease-{job_id}', daemon=True)
+        renewer.start()
+        try:
+            self._handlers[kind](**payload)
+        except Exception:
+            self._fail(job_id, kind, attempts, max_attempts, traceback.format_exc(limit=5))
+        else:
+            self._finish(job_id)
+        finally:
+            finished.set()
+        return True
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                print(f"[JobQueue] 워커 오류: {e}")
+            self._wakeup.wait(POLL_INTERVAL)
+            self._wakeup.clear()
+
+    def _recover(self):
+        """
+        임대가 만료된 실행 중 작업(프로세스 중단)을 대기 상태로 (시도 횟수는 유지)
+
+        임대가 살아 있는 작업은 다른 프로세스가 실행 중이므로 그대로 둠
+        """
+        conn = self._connect()
+        now = time.time()
+        recovered = conn.execute(
+            "UPDATE jobs SET status=?, run_at=?, locked_by=NULL, lease_until=NULL, updated_at=? "
+            "WHERE status=? AND COALESCE(lease_until, 0)<?",
+            (PENDING, now, now, RUNNING, now)
+        ).rowcount
+        conn.execute("DELETE FROM jobs WHERE status=? AND updated_at<?", (DONE, now - DONE_RETENTION))
+        if recovered:
+            print(f"[JobQueue] 중단된 작업 {recovered}개 재개")
+
+    def start(self):
+        """워커 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._start_lock:
+            if self._threads:
+                return
+            if not self._initialized:
+                self._recover()
+                self._initialized = True
+            self._stop.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            print(f"[JobQueue] 워커 {self.workers}개 시작 ({self.path})")
+
+    def stop(self, timeout=None):
+        """워커 종료 (실행 중인 작업은 끝까지 처리)"""
+        with self._start_lock:
+            self._stop.set()
+            self._wakeup.set()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def stats(self):
+        """
+        상태별 작업 수
+
+        Returns:
+            dict: {'pending': n, 'running': n, 'done': n, 'dead': n}
+        """
+        conn = self._connect()
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, DEAD: 0}
+        for status, count in conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def dead_jobs(self, kind=None, limit=50):
+        """dead 작업 목록 (최근 순)"""
+        conn = self._connect()
+        query = "SELECT id, kind, payload, attempts, last_error, updated_at FROM jobs WHERE status=?"
+        params = [DEAD]
+        if kind:
+            query += " AND kind=?"
+            params.append(kind)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        params.append(limit)
+        return [
+            {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]),
+             'attempts': row[3], 'last_error': row[4], 'updated_at': row[5]}
+            for row in conn.execute(query, params)
+        ]
+
+    def retry_dead(self, kind=None):
+        """
+        dead 작업을 다시 대기 상태로 (시도 횟수 초기화)
+
+        Returns:
+            int: 재시도할 작업 수
+        """
+        conn = self._connect()
+        now = time.time()
+        query = "UPDATE jobs SET status=?, attempts=0, run_at=?, updated_at=? WHERE status=?"
+        params = [PENDING, now, now, DEAD]
+        if kind:
+            query += " AND kind=?"
+            params.append(kind)
+        count = conn.execute(query, params).rowcount
+        self._wakeup.set()
+        return count
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """작업 큐 싱글톤 (워커는 start() 호출 시 시작)"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
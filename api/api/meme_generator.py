@@ -73,13 +73,12 @@ Requirements:
             
             image_url = response.data[0].url
             
-            # 이미지 다운로드 및 저장
-            import requests
+            # 이미지 다운로드 및 저장 (공유 HTTP 세션)
             from PIL import Image
             from io import BytesIO
+            from .clients import download
             
-            img_response = requests.get(image_url)
-            img = Image.open(BytesIO(img_response.content))
+            img = Image.open(BytesIO(download(image_url)))
             
             # 저장 경로
             if save_filename is None:
@@ -6,6 +6,10 @@ Base Project Class
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional
 
+from .. import document_schema
+from ..search_index import get_index
+from ..chunk_cache import get_chunk_cache, best_passages
+
 
 class BaseProject(ABC):
     """프로젝트 베이스 클래스"""
@@ -22,14 +26,21 @@ class BaseProject(ABC):
         'final': 'final'
     }
     
+    # 단계별 출처 라벨
+    stage_labels = {
+        'final': '최종본',
+        'draft': '초안',
+        'raw': '원본'
+    }
+    
     # 컨텐츠 타입
     content_types: List[str] = []
     
-    # 필드 매핑
+    # 필드 매핑 (정규 스키마, 이전 필드명은 document_schema.LEGACY_FIELDS)
     field_mapping: Dict[str, str] = {
         'category': '카테고리',
         'title': '제목',
-        'content': '내용',
+        'content': 'content',  # 본문 (스크립트/파이프라인 공통 필드명)
         'full_text': '전체글',
         'created_at': '작성일시',
         'status': '상태'
@@ -52,6 +63,14 @@ class BaseProject(ABC):
         """영문 키를 프로젝트별 필드명으로 변환"""
         return self.field_mapping.get(english_key, english_key)
     
+    def read_field(self, data: Dict, english_key: str) -> str:
+        """문서 필드 읽기 (정규 문서는 한 번 조회, 이전 문서는 이전 필드명 순서로)"""
+        return document_schema.read_field(data, english_key, self.field_mapping)
+    
+    def read_body(self, data: Dict) -> str:
+        """문서 본문 (전체글 > 내용)"""
+        return document_schema.read_body(data, self.field_mapping)
+    
     @abstractmethod
     def get_system_prompt(self) -> str:
         """
@@ -74,3 +93,71 @@ class BaseProject(ABC):
             str: DB에서 가져온 컨텍스트 문자열
         """
         pass
+    
+    def get_ranked_db_context(self, query: str, top_k: int = 8, char_budget: int = 6000,
+                              passages_per_doc: int = 2, category: Optional[str] = None,
+                              strategy: str = 'bm25') -> str:
+        """
+        랭킹 기반 DB 컨텍스트 (관련도 높은 문서의 가장 맞는 구절만, 예산 내에서)
+        
+        Args:
+            query: 사용자 질문
+            top_k: 최대 문서 수
+            char_budget: 전체 컨텍스트 최대 글자 수
+            passages_per_doc: 문서당 최대 구절 수
+            category: 카테고리 필터 (옵션)
+            strategy: 'bm25' (역색인) | 'hybrid' (임베딩 + BM25)
+            
+        Returns:
+            str: DB 컨텍스트 (관련도 순)
+        """
+        index = get_index(self.project_id)
+        if strategy == 'hybrid':
+            from ..semantic_index import get_vector_index
+            ranked = get_vector_index(self.project_id).hybrid_rank(query, category=category, top_k=top_k)
+        else:
+            ranked = index.rank(query, category=category, top_k=top_k)
+        query_terms = index.query_terms(query)
+        chunk_cache = get_chunk_cache()
+        
+        context_parts = []
+        used_chars = 0
+        
+        for score, stage, doc_id, data in ranked:
+            body = self.read_body(data)
+            if not body:
+                continue
+            
+            # 문서 구절 (버전이 같으면 캐시에서, 재분할 없음)
+            passages = chunk_cache.get_passages(
+                self.project_id, stage, doc_id, index.version(stage, doc_id), body
+            )
+            
+            selected = []
+            for passage in best_passages(passages, query_terms, limit=passages_per_doc):
+                if used_chars + len(passage) > char_budget:
+                    break
+                selected.append(passage)
+                used_chars += len(passage)
+            
+            if not selected:
+                break  # 예산 소진
+            
+            title = self.read_field(data, 'title') or 'N/A'
+            category_text = self.read_field(data, 'category') or 'N/A'
+            passage_text = "\n...\n".join(selected)
+            
+            context_parts.append(f"""
+[출처: {self.stage_labels.get(stage, stage)}]
+카테고리: {category_text}
+제목: {title}
+내용:
+{passage_text}
+{'...(생략)' if len(passages) > len(selected) else ''}
+""")
+        
+        if not context_parts:
+            return f"[{self.display_name} DB에서 관련 데이터를 찾을 수 없습니다]"
+        
+        print(f"[{self.project_id}] Ranked context ({strategy}): {len(context_parts)} docs, {used_chars} chars")
+        return "\n\n".join(context_parts)
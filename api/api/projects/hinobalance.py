@@ -5,6 +5,8 @@ HinoBalance Project
 
 import re
 from .base import BaseProject
+from ..search_index import get_index
+from ..chunk_cache import get_chunk_cache, best_passages
 from firebase_admin import firestore
 
 
@@ -166,7 +168,10 @@ class HinoBalanceProject(BaseProject):
         Returns:
             str: DB 컨텍스트 (모든 컬렉션 통합)
         """
-        db = firestore.client()
+        # 메모리 역색인 (최초 1회 구축, 쓰기 시 증분 갱신)
+        index = get_index(self.project_id)
+        chunk_cache = get_chunk_cache()
+        query_terms = index.query_terms(keyword) if keyword else []
         
         # 키워드 정규화 및 분리 (띄어쓰기 제거, 단어별 분리)
         normalized_keywords = []
@@ -188,34 +193,24 @@ class HinoBalanceProject(BaseProject):
         
         for subcollection, label in collections:
             try:
-                # 상하위 구조: projects/hinobalance/{subcollection}
-                query = db.collection('projects').document(self.project_id).collection(subcollection)
-                
-                # 카테고리 필터 적용 (옵션)
-                if category:
-                    query = query.where('category', '==', category)
-                
-                # order_by는 모든 문서에 해당 필드가 있어야 하므로 제거
-                # (기존 문서: 시간, 새 문서: timestamp - 혼재 시 에러)
-                
-                # 키워드 검색은 클라이언트 측에서 필터링 (Firestore는 LIKE 미지원)
-                docs = query.limit(limit * 3).stream()  # 키워드 필터링 위해 더 많이 가져옴
+                # 키워드가 있으면 n-gram 색인으로 후보만 추리고, 없으면 색인된 전체 문서
+                if normalized_keywords:
+                    docs = index.candidates(normalized_keywords, stages=[subcollection])
+                else:
+                    docs = index.documents(stages=[subcollection])
                 doc_count = 0
                 
-                for doc in docs:
-                    data = doc.to_dict()
+                for stage, doc_id, data in docs:
+                    # 카테고리 필터 적용 (옵션)
+                    if category and data.get('category') != category:
+                        continue
                     
                     # 문서 정보 추출 (다양한 필드명 지원 - 영문 우선)
-                    category_text = data.get('category') or data.get('카테고리') or 'N/A'
-                    title = data.get('제목') or data.get('title') or 'N/A'
+                    category_text = self.read_field(data, 'category') or 'N/A'
+                    title = self.read_field(data, 'title') or 'N/A'
                     
-                    # 내용 필드 우선순위: 전체글 > 내용 > content > ai_응답
-                    content = (data.get('전체글') or 
-                              data.get('내용') or 
-                              data.get('full_text') or 
-                              data.get('content') or 
-                              data.get('ai_응답') or
-                              '')
+                    # 본문: 전체글 > 내용 (정규 문서는 필드 한 번 조회)
+                    content = self.read_body(data)
                     
                     if not content:
                         continue
@@ -237,14 +232,18 @@ class HinoBalanceProject(BaseProject):
                     
                     doc_count += 1
                     
-                    # 컨텍스트 구성 (최대 800자)
+                    # 컨텍스트 구성 (키워드와 가장 맞는 구절 1개, 최대 800자)
+                    passages = chunk_cache.get_passages(
+                        self.project_id, stage, doc_id, index.version(stage, doc_id), content
+                    )
+                    passage = best_passages(passages, query_terms, keywords=normalized_keywords)[0]
                     doc_context = f"""
 [출처: {label}]
 카테고리: {category_text}
 제목: {title}
 내용:
-{content[:800]}
-{'...(생략)' if len(content) > 800 else ''}
+{passage}
+{'...(생략)' if len(passages) > 1 else ''}
 """
                     context_parts.append(doc_context)
                     
@@ -121,12 +121,13 @@ class ProjectManager:
                             docs = db.collection('projects').document(self.project_id).collection(collection).limit(limit).stream()
                             for doc in docs:
                                 data = doc.to_dict()
-                                title = data.get('제목', data.get('title', 'N/A'))
+                                title = self.read_field(data, 'title') or 'N/A'
                                 # RAW는 전체 내용 표시 (요약 금지!)
                                 if collection == 'raw':
-                                    원본 = data.get('원본', '')
-                                    ai_응답 = data.get('ai_응답', '')
-                                    content = data.get('내용', data.get('content', data.get('전체글', '')))
+                                    원본 = self.read_field(data, 'original')
+                                    content = self.read_field(data, 'content') or self.read_field(data, 'full_text')
+                                    # 정규 문서는 ai_응답 사본을 지우므로 본문으로 (내용이 달라 남은 경우만 그대로)
+                                    ai_응답 = data.get('ai_응답') or content
                                     
                                     raw_full = f"""
 📌 J님 원본 입력:
@@ -140,7 +141,7 @@ AI 이전 응답:
 """
                                     context_parts.append(f"[RAW - J님 원본] {title}\n{raw_full}")
                                 else:
-                                    content = data.get('내용', data.get('content', data.get('전체글', '')))
+                                    content = self.read_field(data, 'content') or self.read_field(data, 'full_text')
                                     context_parts.append(f"[{collection.upper()}] {title}: {content[:300]}")
                         except:
                             pass
@@ -7,10 +7,18 @@ import json
 import re
 import logging
 from django.conf import settings
+from .search_index import get_index
+from .document_schema import SCHEMA_VERSION, SCHEMA_VERSION_FIELD, field_name
+from .response_cache import get_response_cache
+from .job_queue import get_job_queue
+from .chat_buffer import get_chat_buffer
 
 logger = logging.getLogger(__name__)
 KST = timezone(timedelta(hours=9))
 
+# 작업 큐 작업 종류
+RAW_ANALYSIS_JOB = 'raw_analysis'
+
 
 def evaluate_chat_value(user_message: str, ai_response: str) -> bool:
     """
@@ -58,7 +66,7 @@ def evaluate_chat_value(user_message: str, ai_response: str) -> bool:
 
 def analyze_and_save_raw(project_id: str, user_message: str, ai_response: str, chat_ref: str, model: str):
     """
-    AI 분석 후 RAW 컬렉션에 저장
+    AI 분석 후 RAW 컬렉션에 저장 (동기 실행, 실패는 로그만)
     
     Args:
         project_id: 프로젝트 ID (hinobalance, jbody 등)
@@ -68,15 +76,43 @@ def analyze_and_save_raw(project_id: str, user_message: str, ai_response: str, c
         model: 사용된 AI 모델
     """
     try:
-        if not settings.AI_MODELS['gemini-flash']['enabled']:
-            print("[RAW 저장] AI 비활성화, 스킵")
-            return
-        
-        client = settings.AI_MODELS['gemini-flash']['client']
-        gemini_model = settings.AI_MODELS['gemini-flash']['model']
-        
-        # AI에게 분석 요청
-        analysis_prompt = f"""다음 대화를 분석하여 JSON 형식으로 정리하세요.
+        _analyze_and_save_raw(project_id, user_message, ai_response, chat_ref, model)
+    except Exception as e:
+        print(f"[RAW 저장] 실패: {e}")
+
+
+def enqueue_raw_analysis(project_id: str, user_message: str, ai_response: str, chat_ref: str, model: str):
+    """
+    RAW 분석을 작업 큐에 추가 (즉시 반환, 워커가 처리)
+    
+    RAW 문서 ID는 지금 정해 두어 재시도해도 같은 문서에 덮어씀
+    
+    Returns:
+        int: 작업 ID
+    """
+    queue = get_job_queue()
+    queue.start()
+    return queue.enqueue(RAW_ANALYSIS_JOB, {
+        'project_id': project_id,
+        'user_message': user_message,
+        'ai_response': ai_response,
+        'chat_ref': chat_ref,
+        'model': model,
+        'doc_id': datetime.now(KST).strftime('%Y%m%d_%H%M%S_%f'),
+    })
+
+
+def _analyze_and_save_raw(project_id, user_message, ai_response, chat_ref, model, doc_id=None):
+    """analyze_and_save_raw 본체 (예외 전파 → 작업 큐가 백오프 후 재시도)"""
+    if not settings.AI_MODELS['gemini-flash']['enabled']:
+        print("[RAW 저장] AI 비활성화, 스킵")
+        return
+    
+    client = settings.AI_MODELS['gemini-flash']['client']
+    gemini_model = settings.AI_MODELS['gemini-flash']['model']
+    
+    # AI에게 분석 요청
+    analysis_prompt = f"""다음 대화를 분석하여 JSON 형식으로 정리하세요.
 
 사용자: {user_message}
 AI: {ai_response}
@@ -95,8 +131,9 @@ AI: {ai_response}
 3. 근거 없는 추측 금지
 4. 확실하지 않으면 "불명확" 명시"""
 
-        from google.genai import types
-        
+    from google.genai import types
+    
+    def analyze():
         response = client.models.generate_content(
             model=gemini_model,
             contents=analysis_prompt,
@@ -106,117 +143,129 @@ AI: {ai_response}
                 responseMimeType='application/json'
             )
         )
-        
-        metadata = json.loads(response.text)
-        
-        # AI 자기언급 제거 (후처리)
-        ai_self_refs = r'(제가|저는|저희는|젠|젠시|진|클로|AI|어시스턴트|assistant|I am|I\'m|As an AI)'
-        for key in ['제목', '요약']:
-            if key in metadata and isinstance(metadata[key], str):
-                metadata[key] = re.sub(ai_self_refs, '', metadata[key], flags=re.IGNORECASE)
-                metadata[key] = re.sub(r'\s+', ' ', metadata[key]).strip()  # 공백 정리
-        
-        # 🔍 품질 검증: 일반론/엉터리 감지 (강화)
-        quality_issues = []
-        
-        # 1. J님 원본 키워드 누락 체크
-        user_keywords = set(re.findall(r'[\w가-힣]+', user_message.lower()))
-        response_text = ai_response.lower()
-        
-        # J님이 말씀한 핵심 키워드 중 5개 이상 누락 시 경고
-        missing_keywords = [kw for kw in user_keywords if len(kw) > 2 and kw not in response_text]
-        if len(missing_keywords) > 5:
-            quality_issues.append(f"J님 키워드 {len(missing_keywords)}개 누락")
-        
-        # 2. 일반론 키워드 감지 (강화)
-        generic_phrases = [
-            '일반적으로', '보통', '대체로', '흔히', '전형적으로',
-            '접근성', '비용 효율', '경쟁력', '생존 가능성',
-            '파트너십', '게임 요소', '사용자 경험',
-            '여러 의미', '다양한 해석', '맥락에 따라',
-            '전신 신경계 활성화', '균형 감각', '코어 안정성',  # 하이노 일반론
-            '협응력 향상', '신체 인지 능력', '근육 활성화'  # 추상적 표현
-        ]
-        generic_count = sum(1 for phrase in generic_phrases if phrase in ai_response)
-        if generic_count >= 3:
-            quality_issues.append(f"일반론 키워드 {generic_count}개 감지")
-        
-        # 3. 구조화된 답변 확인 (필수 필드 체크)
-        required_keywords = ['타겟', '효과', '타이밍']
-        missing_structure = [kw for kw in required_keywords if kw not in ai_response]
-        if missing_structure:
-            quality_issues.append(f"필수 구조 누락: {', '.join(missing_structure)}")
-        
-        # 4. 너무 짧은 답변
-        if len(ai_response) < 300:
-            quality_issues.append("답변 너무 짧음 (300자 미만)")
-        
-        # 5. 구체성 체크 (화살표 표현 있는지)
-        if '→' not in ai_response and '->' not in ai_response:
-            quality_issues.append("구체적 메커니즘 설명 부족 (화살표 없음)")
-        
-        # 품질 점수 계산 (0~100)
-        quality_score = 100
-        quality_score -= len(missing_keywords) * 2  # 누락 키워드당 -2점
-        quality_score -= generic_count * 10  # 일반론당 -10점
-        quality_score -= len(missing_structure) * 15  # 구조 누락당 -15점
-        if len(ai_response) < 300:
-            quality_score -= 30
-        if '→' not in ai_response and '->' not in ai_response:
-            quality_score -= 20
-        if len(ai_response) < 200:
-            quality_score -= 30
-        
-        quality_score = max(0, quality_score)
-        
-        # 품질 점수 로깅 (저장은 진행, J님이 점수 확인 후 기준 조정)
-        if quality_score < 60:
-            logger.warning(f"[품질 낮음] {quality_score}점 (기준 60점)")
-            logger.warning(f"[품질 문제] {', '.join(quality_issues)}")
-        
-        # Firestore 저장
-        db = firestore.client()
-        # UTC → KST 변환 (명확하게)
-        now_utc = datetime.now(timezone.utc)
-        now = now_utc.astimezone(KST)
-        timestamp_str = now.strftime('%Y%m%d_%H%M%S_%f')
-        doc_id = f"{timestamp_str}"
-        
-        raw_data = {
-            'id': doc_id,
-            '제목': metadata.get('제목', '제목 없음'),
-            '원본': user_message,
-            'ai_응답': ai_response,
-            '정리본': ai_response,  # 일단 원본과 동일, 나중에 정제 로직 추가
-            '키워드': metadata.get('키워드', []),
-            'category': metadata.get('카테고리', '기타'),
-            '태그': [],
-            '요약': metadata.get('요약', ''),
-            'chat_ref': chat_ref,
-            'project_id': project_id,
-            'timestamp': now,  # Firestore Timestamp (UTC 자동 변환)
-            'timestamp_kst': timestamp_str,  # KST 문자열 (한국 시간 표시용)
-            '작성자': 'J님',
-            '모델': model,
-            # 품질 메타데이터
-            '품질점수': quality_score,
-            '품질이슈': quality_issues,
-            '검증필요': quality_score < 60  # 60점 미만이면 J님 검토 필요
-        }
-        
-        # 상하위 구조: projects/{project_id}/raw/{doc_id}
-        new_ref = db.collection('projects').document(project_id).collection('raw').document(doc_id)
-        new_ref.set(raw_data)
-        
-        # chat_history 업데이트
-        storage_path = f"projects/{project_id}/raw/{doc_id}"
-        db.collection('chat_history').document(chat_ref).update({
-            'raw_분석_완료': True,
-            'raw_저장_위치': storage_path
-        })
-        
-        print(f"[RAW 저장] 성공: {storage_path}")
-        print(f"[RAW 저장] 제목: {metadata.get('제목')}")
-        
-    except Exception as e:
-        print(f"[RAW 저장] 실패: {e}")
+        json.loads(response.text)  # 파싱 실패 응답은 캐시하지 않음 (예외 전파)
+        return response.text
+    
+    # 같은 대화 재분석 시 캐시 응답 사용 (temperature 0.3)
+    response_text = get_response_cache().cached(
+        {'model': gemini_model, 'prompt': analysis_prompt, 'temperature': 0.3,
+         'max_output_tokens': 2048, 'mime_type': 'application/json'},
+        analyze
+    )
+    
+    metadata = json.loads(response_text)
+    
+    # AI 자기언급 제거 (후처리)
+    ai_self_refs = r'(제가|저는|저희는|젠|젠시|진|클로|AI|어시스턴트|assistant|I am|I\'m|As an AI)'
+    for key in ['제목', '요약']:
+        if key in metadata and isinstance(metadata[key], str):
+            metadata[key] = re.sub(ai_self_refs, '', metadata[key], flags=re.IGNORECASE)
+            metadata[key] = re.sub(r'\s+', ' ', metadata[key]).strip()  # 공백 정리
+    
+    # 🔍 품질 검증: 일반론/엉터리 감지 (강화)
+    quality_issues = []
+    
+    # 1. J님 원본 키워드 누락 체크
+    user_keywords = set(re.findall(r'[\w가-힣]+', user_message.lower()))
+    response_text = ai_response.lower()
+    
+    # J님이 말씀한 핵심 키워드 중 5개 이상 누락 시 경고
+    missing_keywords = [kw for kw in user_keywords if len(kw) > 2 and kw not in response_text]
+    if len(missing_keywords) > 5:
+        quality_issues.append(f"J님 키워드 {len(missing_keywords)}개 누락")
+    
+    # 2. 일반론 키워드 감지 (강화)
+    generic_phrases = [
+        '일반적으로', '보통', '대체로', '흔히', '전형적으로',
+        '접근성', '비용 효율', '경쟁력', '생존 가능성',
+        '파트너십', '게임 요소', '사용자 경험',
+        '여러 의미', '다양한 해석', '맥락에 따라',
+        '전신 신경계 활성화', '균형 감각', '코어 안정성',  # 하이노 일반론
+        '협응력 향상', '신체 인지 능력', '근육 활성화'  # 추상적 표현
+    ]
+    generic_count = sum(1 for phrase in generic_phrases if phrase in ai_response)
+    if generic_count >= 3:
+        quality_issues.append(f"일반론 키워드 {generic_count}개 감지")
+    
+    # 3. 구조화된 답변 확인 (필수 필드 체크)
+    required_keywords = ['타겟', '효과', '타이밍']
+    missing_structure = [kw for kw in required_keywords if kw not in ai_response]
+    if missing_structure:
+        quality_issues.append(f"필수 구조 누락: {', '.join(missing_structure)}")
+    
+    # 4. 너무 짧은 답변
+    if len(ai_response) < 300:
+        quality_issues.append("답변 너무 짧음 (300자 미만)")
+    
+    # 5. 구체성 체크 (화살표 표현 있는지)
+    if '→' not in ai_response and '->' not in ai_response:
+        quality_issues.append("구체적 메커니즘 설명 부족 (화살표 없음)")
+    
+    # 품질 점수 계산 (0~100)
+    quality_score = 100
+    quality_score -= len(missing_keywords) * 2  # 누락 키워드당 -2점
+    quality_score -= generic_count * 10  # 일반론당 -10점
+    quality_score -= len(missing_structure) * 15  # 구조 누락당 -15점
+    if len(ai_response) < 300:
+        quality_score -= 30
+    if '→' not in ai_response and '->' not in ai_response:
+        quality_score -= 20
+    if len(ai_response) < 200:
+        quality_score -= 30
+    
+    quality_score = max(0, quality_score)
+    
+    # 품질 점수 로깅 (저장은 진행, J님이 점수 확인 후 기준 조정)
+    if quality_score < 60:
+        logger.warning(f"[품질 낮음] {quality_score}점 (기준 60점)")
+        logger.warning(f"[품질 문제] {', '.join(quality_issues)}")
+    
+    # Firestore 저장
+    db = firestore.client()
+    # UTC → KST 변환 (명확하게)
+    now_utc = datetime.now(timezone.utc)
+    now = now_utc.astimezone(KST)
+    timestamp_str = now.strftime('%Y%m%d_%H%M%S_%f')
+    doc_id = doc_id or f"{timestamp_str}"
+    
+    raw_data = {
+        'id': doc_id,
+        '제목': metadata.get('제목', '제목 없음'),
+        '원본': user_message,
+        field_name('content'): ai_response,  # 정리본 (일단 AI 응답과 동일, 나중에 정제 로직 추가)
+        SCHEMA_VERSION_FIELD: SCHEMA_VERSION,
+        '키워드': metadata.get('키워드', []),
+        'category': metadata.get('카테고리', '기타'),
+        '태그': [],
+        '요약': metadata.get('요약', ''),
+        'chat_ref': chat_ref,
+        'project_id': project_id,
+        'timestamp': now,  # Firestore Timestamp (UTC 자동 변환)
+        'timestamp_kst': timestamp_str,  # KST 문자열 (한국 시간 표시용)
+        '작성자': 'J님',
+        '모델': model,
+        # 품질 메타데이터
+        '품질점수': quality_score,
+        '품질이슈': quality_issues,
+        '검증필요': quality_score < 60  # 60점 미만이면 J님 검토 필요
+    }
+    
+    # 상하위 구조: projects/{project_id}/raw/{doc_id}
+    new_ref = db.collection('projects').document(project_id).collection('raw').document(doc_id)
+    write_result = new_ref.set(raw_data)
+    get_index(project_id).upsert('raw', doc_id, raw_data, write_result.update_time)
+    
+    # chat_history 업데이트 (쓰기 버퍼에 남은 대화 먼저 커밋)
+    get_chat_buffer().flush()
+    storage_path = f"projects/{project_id}/raw/{doc_id}"
+    db.collection('chat_history').document(chat_ref).update({
+        'raw_분석_완료': True,
+        'raw_저장_위치': storage_path
+    })
+    
+    print(f"[RAW 저장] 성공: {storage_path}")
+    print(f"[RAW 저장] 제목: {metadata.get('제목')}")
+
+
+# 작업 큐 처리 함수 등록
+get_job_queue().register(RAW_ANALYSIS_JOB, _analyze_and_save_raw)
@@ -0,0 +1,309 @@
+"""
+모델 호출 안정화 (재시도 / 공급자 차단 / 대체 모델)
+공급자 장애(429, 5xx, timeout) 때 응답 지연이 한없이 늘어나지 않도록
+
+- 일시 오류만 재시도: 지수 백오프 + 지터, 429는 Retry-After 우선 (너무 길면 바로 대체 모델)
+- 모델(공급자 엔드포인트)별 서킷 브레이커: 연속 일시 오류가 쌓이면 쿨다운 동안 호출 없이 대체 모델로
+  (Gemini Pro/Flash는 같은 공급자라도 따로 과부하되므로 모델 키 단위)
+- 대체 모델: ai_config.RESILIENCE_SETTINGS['fallbacks'] 순서 (활성화된 모델만)
+- 요청 전체 재시도 한도(deadline)를 넘으면 더 기다리지 않음
+
+설정: ai_config.RESILIENCE_SETTINGS
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+
+from . import ai_config
+
+
+# 재시도할 HTTP 상태 (429 한도 초과, 5xx 서버 오류, 529 Claude 과부하)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504, 529}
+
+# 상태 코드가 없는 예외: 클래스 이름 / 메시지로 판단 (timeout, 연결 오류, gRPC 상태)
+_RETRYABLE_NAMES = ('Timeout', 'Connection', 'Connect', 'RemoteProtocol', 'ServiceUnavailable', 'Overloaded')
+_RETRYABLE_TEXT = re.compile(
+    r'\b(?:429|500|502|503|504|529)\b|UNAVAILABLE|RESOURCE_EXHAUSTED|DEADLINE_EXCEEDED|overloaded',
+    re.IGNORECASE
+)
+# Gemini 429 오류 본문의 RetryInfo ("retryDelay": "13s")
+_RETRY_DELAY_TEXT = re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s")
+
+
+class ModelUnavailable(Exception):
+    """요청 모델과 대체 모델 모두 실패"""
+
+    def __init__(self, model_key, errors):
+        self.model_key = model_key
+        self.errors = errors
+        details = '; '.join(f"{key}: {str(error)[:80]}" for key, error in errors.items())
+        super().__init__(f"모델 호출 실패 ({model_key}) - {details or '사용 가능한 모델 없음'}")
+
+
+def status_code(exc):
+    """예외의 HTTP 상태 코드 (openai/anthropic: status_code, google.genai: code)"""
+    for attr in ('status_code', 'code'):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    value = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(exc):
+    """일시 오류인지 (재시도/차단 대상)"""
+    code = status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    names = [cls.__name__ for cls in type(exc).__mro__]
+    if any(part in name for name in names for part in _RETRYABLE_NAMES):
+        return True
+    return bool(_RETRYABLE_TEXT.search(str(exc)))
+
+
+def retry_after(exc):
+    """서버가 지정한 재시도 대기 시간 (초, 없으면 None)"""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    if headers:
+        try:
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000
+            value = headers.get('retry-after')
+            if value:
+                try:
+                    return max(float(value), 0.0)
+                except ValueError:
+                    moment = parsedate_to_datetime(value)
+                    return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            pass
+    match = _RETRY_DELAY_TEXT.search(str(exc))
+    return float(match.group(1)) if match else None
+
+
+def backoff_delay(attempt, options=None):
+    """재시도 대기: base * 2^(시도-1), 최대 backoff_max, 지터 0.5~1.0배"""
+    options = options or ai_config.RESILIENCE_SETTINGS
+    delay = min(options['backoff_base'] * (2 ** (attempt - 1)), options['backoff_max'])
+    return delay * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker:
+    """
+    모델별 서킷 브레이커
+
+    closed → (연속 일시 오류 threshold회) → open: 호출 차단
+    open → (cooldown 경과) → half-open: 시험 호출 1개만 허용, 성공 시 closed / 실패 시 다시 open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name, threshold=None, cooldown=None):
+        options = ai_config.RESILIENCE_SETTINGS
+        self.name = name
+        self.threshold = threshold or options['breaker_threshold']
+        self.cooldown = cooldown or options['breaker_cooldown']
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """호출 가능 여부 (half-open에서는 시험 호출 하나만)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        """공급자가 응답함 (성공 또는 재시도 불가 오류)"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"[Resilience] {self.name} 차단 해제")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """일시 오류"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    print(f"[Resilience] {self.name} 차단 ({self.failures}회 연속 오류, {self.cooldown}s)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model_key):
+    """모델 키의 서킷 브레이커"""
+    with _breakers_lock:
+        if model_key not in _breakers:
+            _breakers[model_key] = CircuitBreaker(model_key)
+        return _breakers[model_key]
+
+
+def breaker_status():
+    """모델별 차단 상태 {'gemini-pro': {'state', 'failures'}, ...}"""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
+
+def candidates(model_key, fallback=True):
+    """호출 순서: 요청 모델 + 대체 모델 (활성화된 모델만, 중복 제외)"""
+    keys = [model_key]
+    if fallback:
+        keys += ai_config.RESILIENCE_SETTINGS['fallbacks'].get(model_key, [])
+    ordered = []
+    for key in keys:
+        if key not in ordered and settings.AI_MODELS.get(key, {}).get('enabled'):
+            ordered.append(key)
+    return ordered
+
+
+def _next_delay(breaker, key, exc, attempt, deadline):
+    """실패 처리 후 같은 모델 재시도 대기 시간 (None이면 다음 모델로)"""
+    options = ai_config.RESILIENCE_SETTINGS
+    if not is_retryable(exc):
+        breaker.record_success()  # 요청 오류(4xx 등)는 공급자 장애가 아님
+        print(f"[Resilience] {key} 재시도 불가 오류: {str(exc)[:100]}")
+        return None
+    breaker.record_failure()
+    if attempt >= options['max_attempts'] or breaker.state == CircuitBreaker.OPEN:
+        return None
+
+    delay = retry_after(exc)
+    if delay is None:
+        delay = backoff_delay(attempt, options)
+    elif delay > options['retry_after_max']:
+        print(f"[Resilience] {key} Retry-After {delay:.0f}s → 대체 모델")
+        return None
+    if time.monotonic() + delay >= deadline:
+        return None
+    print(f"[Resilience] {key} 재시도 {attempt}/{options['max_attempts'] - 1} ({delay:.1f}s 후): {str(exc)[:100]}")
+    return delay
+
+
+def _mark_fallback(result, model_key, key):
+    if key != model_key:
+        print(f"[Resilience] {model_key} → {key} 대체 응답")
+        if isinstance(result, dict):
+            result['_fallback_from'] = model_key
+    return result
+
+
+def call_with_fallback(model_key, call, fallback=True):
+    """
+    재시도/차단/대체를 적용한 모델 호출
+
+    Args:
+        model_key: 요청 모델 키
+        call: call(key) → 결과 (실패 시 예외)
+        fallback: False면 요청 모델만 재시도 (멀티 모델 호출용)
+
+    Returns:
+        call 결과 (대체 모델 응답이면 '_fallback_from'에 요청 모델)
+
+    Raises:
+        ModelUnavailable: 모든 후보 실패
+    """
+    deadline = time.monotonic() + ai_config.RESILIENCE_SETTINGS['deadline']
+    errors = {}
+    for key in candidates(model_key, fallback):
+        breaker = get_breaker(key)
+        if not breaker.allow():
+            errors[key] = '차단 중 (circuit open)'
+            continue
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = call(key)
+            except Exception as e:
+                errors[key] = e
+                delay = _next_delay(breaker, key, e, attempt, deadline)
+                if delay is None:
+                    break
+                time.sleep(delay)
+                continue
+            breaker.record_success()
+            return _mark_fallback(result, model_key, key)
+        if time.monotonic() >= deadline:
+            break
+    raise ModelUnavailable(model_key, errors)
+
+
+async def call_with_fallback_async(model_key, call, fallback=True):
+    """call_with_fallback 비동기 버전 (call(key)는 코루틴, 대기는 asyncio.sleep)"""
+    deadline = time.monotonic() + ai_config.RESILIENCE_SETTINGS['deadline']
+    errors = {}
+    for key in candidates(model_key, fallback):
+        breaker = get_breaker(key)
+        if not breaker.allow():
+            errors[key] = '차단 중 (circuit open)'
+            continue
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await call(key)
+            except Exception as e:
+                errors[key] = e
+                delay = _next_delay(breaker, key, e, attempt, deadline)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return _mark_fallback(result, model_key, key)
+        if time.monotonic() >= deadline:
+            break
+    raise ModelUnavailable(model_key, errors)
+
+
+def stream_with_fallback(model_key, open_stream):
+    """
+    스트리밍 호출: 첫 조각이 나올 때까지만 재시도/대체 (이미 보낸 내용은 되돌릴 수 없음)
+
+    Args:
+        model_key: 요청 모델 키
+        open_stream: open_stream(key) → 텍스트 조각 iterator
+
+    Yields:
+        str: 텍스트 조각
+    """
+    def first_chunk(key):
+        stream = iter(open_stream(key))
+        return next(stream, ''), stream
+
+    first, stream = call_with_fallback(model_key, first_chunk)
+    if first:
+        yield first
+    yield from stream
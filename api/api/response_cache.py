@@ -0,0 +1,198 @@
+"""
+AI 응답 캐시 (내용 주소 기반, 로컬 디스크)
+(모델, 시스템 프롬프트, 메시지, temperature 등) 전체 요청의 해시를 키로 응답을 SQLite에 보관
+→ 스크립트 재실행/같은 요청 반복 시 API 호출 없이 즉시 반환
+
+사용처에서 명시적으로 켜야 동작 (opt-in)
+Django 설정 없이 실행되는 배치 스크립트에서도 사용 가능
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+
+# 기본 위치/용량 (Django 설정이 없을 때)
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / 'cache' / 'responses.sqlite3'
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# 용량 초과 시 이 비율까지 오래 안 쓴 응답부터 삭제
+EVICT_TARGET_RATIO = 0.9
+
+# 삭제 시 한 번에 읽는 행 수 (오래 안 쓴 순)
+EVICT_BATCH = 100
+
+
+def make_key(**request):
+    """
+    요청 전체의 해시 (키 순서 무관)
+
+    Args:
+        request: model, system_prompt, messages, temperature 등 응답을 결정하는 모든 값
+
+    Returns:
+        str: sha256 hex
+    """
+    payload = json.dumps(request, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    응답 캐시 (SQLite, 크기 제한 + LRU 삭제)
+
+    값은 JSON 직렬화 가능한 객체 (응답 dict 또는 문자열)
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        if settings.configured:
+            path = path or getattr(settings, 'RESPONSE_CACHE_PATH', None)
+            max_bytes = max_bytes or getattr(settings, 'RESPONSE_CACHE_MAX_BYTES', None)
+        self.path = Path(path or DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes or DEFAULT_MAX_BYTES
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+            # 전체 크기 합계 (쓰기마다 SUM 조회 대신 한 행 유지, 처음 한 번만 계산)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_meta (id INTEGER PRIMARY KEY CHECK (id = 0), total_size INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_meta (id, total_size) SELECT 0, COALESCE(SUM(size), 0) FROM responses"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        """캐시된 응답 (없으면 None)"""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT value FROM responses WHERE key=?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET accessed_at=? WHERE key=?", (time.time(), key))
+                conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+            except Exception as e:
+                print(f"[ResponseCache] 조회 실패: {e}")
+                return None
+
+    def put(self, key, value):
+        """응답 저장 (용량 초과 시 오래 안 쓴 응답부터 삭제)"""
+        with self._lock:
+            try:
+                data = json.dumps(value, ensure_ascii=False, default=str)
+                size = len(data.encode('utf-8'))
+                now = time.time()
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute("SELECT size FROM responses WHERE key=?", (key,)).fetchone()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                        (key, data, size, now, now)
+                    )
+                    conn.execute(
+                        "UPDATE cache_meta SET total_size = total_size + ? WHERE id = 0",
+                        (size - (row[0] if row else 0),)
+                    )
+                    total = conn.execute("SELECT total_size FROM cache_meta WHERE id = 0").fetchone()[0]
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                if total > self.max_bytes:
+                    self._evict(conn)
+            except Exception as e:
+                print(f"[ResponseCache] 저장 실패: {e}")
+
+    def _evict(self, conn):
+        """오래 안 쓴 응답부터 삭제 (합계가 용량의 EVICT_TARGET_RATIO 이하가 될 때까지)"""
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        removed = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            total = conn.execute("SELECT total_size FROM cache_meta WHERE id = 0").fetchone()[0]
+            while total > target:
+                rows = conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at LIMIT ?", (EVICT_BATCH,)
+                ).fetchall()
+                if not rows:
+                    total = 0  # 합계가 어긋난 경우 (행 없음)
+                    break
+                for key, size in rows:
+                    if total <= target:
+                        break
+                    conn.execute("DELETE FROM responses WHERE key=?", (key,))
+                    total -= size
+                    removed += 1
+            conn.execute("UPDATE cache_meta SET total_size = ? WHERE id = 0", (max(total, 0),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if removed:
+            print(f"[ResponseCache] 용량 초과, {removed}개 삭제")
+
+    def cached(self, request, compute, enabled=True):
+        """
+        캐시 적중 시 저장된 응답, 아니면 compute() 결과를 저장 후 반환
+
+        Args:
+            request: 응답을 결정하는 요청 값 dict (make_key 입력)
+            compute: 실제 API 호출 (인자 없는 함수)
+            enabled: False면 캐시 없이 compute()만 호출
+
+        Returns:
+            compute()와 같은 형태의 값
+        """
+        if not enabled:
+            return compute()
+
+        key = make_key(**request)
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = compute()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """응답 캐시 싱글톤"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
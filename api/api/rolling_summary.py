@@ -0,0 +1,178 @@
+"""
+롤링 대화 요약 (세션별)
+최근 N개 메시지만 원문으로 보내고, 그 이전 대화는 세션 문서에 저장된 요약으로 대체
+→ 세션이 길어져도 프롬프트 크기/비용이 일정
+
+요약 갱신은 작업 큐(job_queue)에서 백그라운드로 (요청 경로에서 AI 호출 없음)
+작업은 아무 워커에서나 실행되므로 세션 문서/메시지를 Firestore에서 직접 읽음
+요청 경로의 요약 캐시는 CACHE_TTL초마다 다시 조회 (다른 워커가 갱신한 요약 반영)
+요약이 아직 따라오지 못한 메시지도 빠지지 않도록 원문에 포함 (다음 갱신 때 요약으로 이동)
+
+저장 위치: projects/{project_id}/sessions/{session_id} 의 '대화요약', '요약_마지막_ID'
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from firebase_admin import firestore
+
+from . import ai_config
+from .chat_buffer import get_chat_buffer
+from .chat_sessions import messages_path, session_path, sessions_path
+from .history_cache import get_history_cache
+from .job_queue import get_job_queue
+
+
+# 작업 큐 작업 종류
+SUMMARY_JOB = 'session_summary'
+
+# 요청 경로 요약 캐시 유지 시간(초): 다른 워커가 갱신한 요약은 이 시간 안에 반영
+CACHE_TTL = 60
+# 요약을 캐시할 최대 세션 수 (넘으면 오래 안 쓴 세션부터 제거)
+CACHE_MAX_SESSIONS = 256
+
+# (project_id, session_id) → {'summary': str, 'until': 마지막으로 요약에 들어간 메시지 ID, 'loaded_at'}
+_summaries = OrderedDict()
+_lock = threading.Lock()
+
+
+def _read_summary(project_id, session_id):
+    """세션 문서의 요약 (Firestore + 이 프로세스에서 아직 커밋 안 된 갱신, 조회 실패 시 예외)"""
+    entry = {'summary': '', 'until': ''}
+    doc = firestore.client().document(session_path(project_id, session_id)).get()
+    if doc.exists:
+        data = doc.to_dict()
+        entry = {'summary': data.get('대화요약', ''), 'until': data.get('요약_마지막_ID', '')}
+
+    for pending_id, data in get_chat_buffer().pending(prefix=sessions_path(project_id) + '/'):
+        if pending_id == session_id and data.get('요약_마지막_ID', '') > entry['until']:
+            entry = {'summary': data.get('대화요약', ''), 'until': data['요약_마지막_ID']}
+    return entry
+
+
+def _load_summary(project_id, session_id):
+    """세션 요약 (CACHE_TTL초 동안 캐시, 지나면 Firestore 다시 조회)"""
+    key = (project_id, session_id)
+    with _lock:
+        entry = _summaries.get(key)
+        if entry is not None and time.monotonic() - entry['loaded_at'] < CACHE_TTL:
+            _summaries.move_to_end(key)
+            return entry
+
+    try:
+        entry = _read_summary(project_id, session_id)
+    except Exception as e:
+        print(f"[RollingSummary] 요약 로드 실패 ({project_id}/{session_id}): {e}")
+        entry = {'summary': '', 'until': ''}
+    _remember(key, entry)
+    return entry
+
+
+def _remember(key, entry):
+    """요약 캐시에 저장 (CACHE_MAX_SESSIONS 초과 시 오래 안 쓴 세션부터 제거)"""
+    entry['loaded_at'] = time.monotonic()
+    with _lock:
+        _summaries[key] = entry
+        _summaries.move_to_end(key)
+        while len(_summaries) > CACHE_MAX_SESSIONS:
+            _summaries.popitem(last=False)
+
+
+def _unsummarized_messages(project_id, session_id, until):
+    """세션 메시지 중 until 이후 것 (Firestore 직접 조회, 문서 ID 순)"""
+    collection = firestore.client().collection(messages_path(project_id, session_id))
+    query = collection.order_by('__name__')
+    if until:
+        query = query.start_after({'__name__': collection.document(until)})
+    messages = []
+    for doc in query.stream():
+        data = doc.to_dict()
+        messages.append((doc.id, {'role': data.get('역할', 'user'), 'content': data.get('내용', '')}))
+    return messages
+
+
+def _summary_model(model):
+    name = ai_config.ROLLING_SUMMARY_SETTINGS['model']
+    if settings.AI_MODELS.get(name, {}).get('enabled'):
+        return name
+    return model if model != 'all' else 'gemini-pro'
+
+
+def prepare_history(project_id, session_id, model, limit=100):
+    """
+    이번 요청에 보낼 대화 (요약 + 최근 원문), 필요하면 요약 갱신 예약
+
+    Args:
+        project_id: 프로젝트 ID (None이면 일반 대화)
+        session_id: 세션 ID
+        model: 대화 모델 (요약 모델 비활성화 시 사용)
+        limit: 세션에서 읽을 최대 메시지 수
+
+    Returns:
+        tuple: (summary, messages)
+            summary: 이전 대화 요약 (없으면 빈 문자열)
+            messages: 원문으로 보낼 메시지 [{'role', 'content'}, ...]
+    """
+    options = ai_config.ROLLING_SUMMARY_SETTINGS
+    entries = get_history_cache().entries((project_id, session_id), limit)
+    entry = _load_summary(project_id, session_id)
+
+    # 요약에 이미 들어간 메시지는 제외 (문서 ID = 저장 시각 순서)
+    unsummarized = [(doc_id, msg) for doc_id, msg in entries if doc_id > entry['until']]
+    older = unsummarized[:-options['keep_messages']] if len(unsummarized) > options['keep_messages'] else []
+
+    if len(older) >= options['refresh_after']:
+        enqueue_summary_refresh(project_id, session_id, model)
+
+    return entry['summary'], [msg for _, msg in unsummarized]
+
+
+def enqueue_summary_refresh(project_id, session_id, model):
+    """세션 요약 갱신 작업 추가 (세션당 대기 작업 하나만)"""
+    queue = get_job_queue()
+    queue.start()
+    return queue.enqueue(
+        SUMMARY_JOB,
+        {'project_id': project_id, 'session_id': session_id, 'model': model},
+        dedupe_key=f"{SUMMARY_JOB}:{project_id}:{session_id}"
+    )
+
+
+def refresh_summary(project_id, session_id, model):
+    """
+    요약 갱신 (작업 큐 처리 함수): 최근 keep_messages개를 뺀 나머지 미요약 메시지를 요약에 합침
+
+    세션 문서의 요약/요약_마지막_ID와 그 이후 메시지를 Firestore에서 직접 읽음
+
+    실패 시 예외 → 작업 큐가 백오프 후 재시도
+    """
+    from .session_learning import summarize_conversation  # 지연 임포트로 순환 방지
+
+    options = ai_config.ROLLING_SUMMARY_SETTINGS
+
+    get_chat_buffer().flush()  # 이 프로세스에서 아직 커밋 안 된 메시지 먼저 반영
+    entry = _read_summary(project_id, session_id)
+    unsummarized = _unsummarized_messages(project_id, session_id, entry['until'])
+    older = unsummarized[:-options['keep_messages']] if len(unsummarized) > options['keep_messages'] else []
+    if not older:
+        return
+
+    summary = summarize_conversation(
+        [msg for _, msg in older], _summary_model(model),
+        previous_summary=entry['summary'], max_chars=options['max_chars']
+    )
+    until = older[-1][0]
+
+    # 세션 문서에 저장 (대화 기록과 같은 쓰기 버퍼)
+    get_chat_buffer().add_path(
+        session_path(project_id, session_id),
+        {'대화요약': summary, '요약_마지막_ID': until},
+        merge=True
+    )
+    _remember((project_id, session_id), {'summary': summary, 'until': until})
+    print(f"[RollingSummary] {project_id or '일반 대화'}/{session_id}: 메시지 {len(older)}개 요약 ({len(summary)}자)")
+
+
+# 작업 큐 처리 함수 등록
+get_job_queue().register(SUMMARY_JOB, refresh_summary)
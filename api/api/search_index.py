@@ -0,0 +1,606 @@
+"""
+프로젝트 문서 역색인 (Inverted Index) + 문서 캐시
+projects/{project_id}/final|draft|raw 문서를 메모리에 한 번 색인하고
+우리 쪽 쓰기 경로(write-through)와 on_snapshot 리스너로 증분 갱신
+→ 매 요청마다 Firestore 전체 스캔 없음, 변경분만 읽음
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from firebase_admin import firestore
+
+from .document_schema import read_body, read_field
+
+
+# 우선순위 순서: 최종 → 초안 → 원본
+STAGES = ('final', 'draft', 'raw')
+
+# 문자 n-gram 크기 (띄어쓰기 없는 합성어 검색용: "하이노워밍팔돌리기")
+NGRAM_SIZE = 2
+
+# 다른 프로세스/스크립트의 쓰기를 반영하기 위한 최대 색인 수명 (초)
+INDEX_MAX_AGE = 30 * 60
+
+# 토큰 끝에서 떼어낼 조사 (긴 것부터 검사)
+JOSA_SUFFIXES = (
+    '에서', '에게', '으로', '부터', '까지', '이란', '한테', '처럼',
+    '은', '는', '이', '가', '을', '를', '의', '에', '로', '와', '과', '도', '만'
+)
+
+# 랭킹 필드 가중치 (BM25F 방식: 필드별 출현 횟수 × 가중치)
+RANK_FIELD_WEIGHTS = {
+    'title': 3.0,
+    'category': 2.0,
+    'keywords': 2.0,
+    'body': 1.0,
+}
+
+# 키워드 필드 (제목/카테고리/본문은 document_schema.read_field)
+KEYWORD_FIELDS = ('키워드',)
+
+# 단계 가중치 (최종 > 초안 > 원본)
+STAGE_BOOSTS = {
+    'final': 1.5,
+    'draft': 1.2,
+    'raw': 1.0,
+}
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r'[가-힣]+|[a-z0-9]+')
+
+
+def normalize_text(text):
+    """검색용 정규화: 소문자 + 공백 제거"""
+    if not isinstance(text, str):
+        return ''
+    return re.sub(r'\s+', '', text).lower()
+
+
+def strip_josa(token):
+    """한글 토큰 끝의 조사 제거 (남는 길이가 2자 이상일 때만)"""
+    for suffix in JOSA_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """
+    한국어 인식 토큰화
+
+    "하이노워밍팔돌리기가 뭐지" → ['하이노워밍팔돌리기', '뭐지']
+
+    Returns:
+        list: 조사가 제거된 토큰 리스트 (1글자 토큰 제외)
+    """
+    if not isinstance(text, str):
+        return []
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        token = strip_josa(token)
+        if len(token) > 1:
+            tokens.append(token)
+    return tokens
+
+
+def char_ngrams(text, n=NGRAM_SIZE):
+    """정규화된 문자열의 문자 n-gram 집합"""
+    normalized = normalize_text(text)
+    if len(normalized) < n:
+        return set()
+    return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+
+
+def first_text(data, fields):
+    """필드 목록 중 처음으로 값이 있는 문자열 반환"""
+    for field in fields:
+        value = data.get(field)
+        if isinstance(value, str) and value:
+            return value
+        if isinstance(value, list) and value:
+            return ' '.join(item for item in value if isinstance(item, str))
+    return ''
+
+
+def get_body_text(data):
+    """문서 본문 (전체글 > 내용, 정규 문서는 필드 한 번 조회), 본문이 없으면 요약"""
+    return read_body(data) or first_text(data, ('요약',))
+
+
+def rank_fields(data):
+    """랭킹 필드별 텍스트 {'title': ..., 'category': ..., 'keywords': ..., 'body': ...}"""
+    return {
+        'title': read_field(data, 'title'),
+        'category': read_field(data, 'category'),
+        'keywords': first_text(data, KEYWORD_FIELDS),
+        'body': get_body_text(data),
+    }
+
+
+def document_version(data, update_time=None):
+    """
+    문서 버전 문자열 (구절 캐시 키)
+    Firestore update_time이 있으면 사용, 없으면 본문 해시
+    """
+    if update_time is not None and hasattr(update_time, 'isoformat'):
+        return update_time.isoformat()
+    return 'sha1:' + hashlib.sha1(get_body_text(data).encode('utf-8')).hexdigest()
+
+
+def extract_texts(data):
+    """문서의 모든 문자열 값 추출 (리스트 안의 문자열 포함)"""
+    texts = []
+    for value in data.values():
+        if isinstance(value, str):
+            texts.append(value)
+        elif isinstance(value, list):
+            texts.extend(item for item in value if isinstance(item, str))
+    return texts
+
+
+# 재구축 시 새 색인에서 가져오는 상태 필드
+INDEX_STATE = (
+    '_docs', '_ngram_postings', '_token_postings', '_doc_ngrams',
+    '_doc_tokens', '_doc_lengths', '_doc_versions', '_total_length',
+)
+
+
+class ProjectSearchIndex:
+    """
+    프로젝트 단위 역색인
+
+    - n-gram 색인: 부분 문자열 검색 후보 추출 (검증은 호출부의 기존 조건 그대로)
+    - 토큰 색인: 제목/카테고리/키워드/본문 필드 가중 출현 횟수 (BM25 랭킹용)
+    """
+
+    def __init__(self, project_id, stages=STAGES, max_age=INDEX_MAX_AGE):
+        self.project_id = project_id
+        self.stages = tuple(stages)
+        self.max_age = max_age
+
+        self._lock = threading.RLock()
+        self._docs = {}                           # (stage, doc_id) → data
+        self._ngram_postings = defaultdict(set)   # ngram → {(stage, doc_id)}
+        self._token_postings = defaultdict(dict)  # token → {(stage, doc_id): tf}
+        self._doc_ngrams = {}                     # (stage, doc_id) → {ngram}
+        self._doc_tokens = {}                     # (stage, doc_id) → Counter (가중 tf)
+        self._doc_lengths = {}                    # (stage, doc_id) → 가중 문서 길이
+        self._doc_versions = {}                   # (stage, doc_id) → 버전 (update_time)
+        self._total_length = 0.0
+        self._built_at = None
+        self._generation = 0                      # 변경 시마다 증가 (파생 색인 동기화용)
+        self._watches = []                        # on_snapshot 리스너 (있으면 재구축 불필요)
+        self._build_lock = threading.Lock()       # 재구축은 한 번에 하나 (색인 잠금과 별도)
+        self._pending_writes = None               # 재구축 중 들어온 쓰기 (교체 후 다시 적용)
+        self.last_used = time.time()
+
+    # ===== 색인 구축 =====
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    @property
+    def generation(self):
+        """색인 변경 세대 (재구축/증분 갱신마다 증가)"""
+        return self._generation
+
+    @property
+    def is_listening(self):
+        return bool(self._watches)
+
+    def ensure_built(self):
+        """
+        색인이 없으면 Firestore에서 구축 (다른 호출은 구축이 끝날 때까지 대기)
+        리스너가 없으면 max_age가 지난 색인도 재구축 (다른 프로세스의 쓰기 반영)
+        → 재구축하는 동안 다른 호출은 기다리지 않고 이전 색인 사용
+        """
+        self.last_used = time.time()
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self.rebuild()
+                    if getattr(settings, 'FIRESTORE_CACHE_LISTEN', False):
+                        self.start_listening()
+        elif not self._watches and time.time() - self._built_at > self.max_age:
+            if not self._build_lock.acquire(blocking=False):
+                return  # 다른 스레드가 재구축 중
+            try:
+                if time.time() - self._built_at > self.max_age:
+                    self.rebuild()
+            finally:
+                self._build_lock.release()
+
+    def start_listening(self):
+        """단계별 on_snapshot 리스너 등록 (실패 시 TTL 재구축으로 대체)"""
+        db = firestore.client()
+        with self._lock:
+            if self._watches:
+                return
+            for stage in self.stages:
+                try:
+                    collection = db.collection('projects').document(self.project_id).collection(stage)
+                    self._watches.append(collection.on_snapshot(self._snapshot_handler(stage)))
+                except Exception as e:
+                    print(f"[SearchIndex] Listener failed for projects/{self.project_id}/{stage}: {e}")
+                    self.close()
+                    return
+            print(f"[SearchIndex] Listening to projects/{self.project_id}")
+
+    def _snapshot_handler(self, stage):
+        def on_snapshot(doc_snapshots, changes, read_time):
+            # 첫 스냅샷(전체 ADDED)은 버전이 같으면 upsert에서 건너뜀
+            for change in changes:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    self.remove(stage, doc.id)
+                else:
+                    self.upsert(stage, doc.id, doc.to_dict() or {}, getattr(doc, 'update_time', None))
+        return on_snapshot
+
+    def close(self):
+        """리스너 해제"""
+        with self._lock:
+            for watch in self._watches:
+                try:
+                    watch.unsubscribe()
+                except Exception as e:
+                    print(f"[SearchIndex] Listener unsubscribe failed ({self.project_id}): {e}")
+            self._watches = []
+
+    def rebuild(self):
+        """
+        Firestore 전체 문서를 읽어 색인 재구축
+
+        읽는 동안은 잠금 없이 새 색인을 만들고 마지막에 잠금 안에서 교체
+        (그동안 검색은 이전 색인 사용, 들어온 쓰기는 기록해 두었다가 교체 후 다시 적용)
+        """
+        db = firestore.client()
+        with self._lock:
+            self._pending_writes = []
+
+        fresh = ProjectSearchIndex(self.project_id, self.stages, self.max_age)
+        for stage in self.stages:
+            try:
+                docs = db.collection('projects').document(self.project_id).collection(stage).stream()
+                count = 0
+                for doc in docs:
+                    fresh._add((stage, doc.id), doc.to_dict() or {}, getattr(doc, 'update_time', None))
+                    count += 1
+                print(f"[SearchIndex] Indexed {count} docs from projects/{self.project_id}/{stage}")
+            except Exception as e:
+                print(f"[SearchIndex] Error indexing projects/{self.project_id}/{stage}: {e}")
+
+        with self._lock:
+            for name in INDEX_STATE:
+                setattr(self, name, getattr(fresh, name))
+            self._generation += 1
+            self._built_at = time.time()
+            writes, self._pending_writes = self._pending_writes, None
+            for write in writes:
+                self._apply(*write, replay=True)
+            if writes:
+                print(f"[SearchIndex] 재구축 중 들어온 쓰기 {len(writes)}개 다시 적용 ({self.project_id})")
+
+    # ===== 증분 갱신 (색인 구축 전이면 무시: 다음 구축 시 반영됨, 구축 중이면 기록 후 교체 때 적용) =====
+
+    def upsert(self, stage, doc_id, data, update_time=None):
+        """문서 생성/덮어쓰기 (set, add) 반영 (update_time: WriteResult.update_time)"""
+        self._write('upsert', stage, doc_id, dict(data), update_time)
+
+    def merge(self, stage, doc_id, updates, update_time=None):
+        """부분 업데이트 (update) 반영 (update_time: WriteResult.update_time)"""
+        self._write('merge', stage, doc_id, dict(updates), update_time)
+
+    def remove(self, stage, doc_id):
+        """문서 삭제 반영"""
+        self._write('remove', stage, doc_id, None, None)
+
+    def _write(self, kind, stage, doc_id, data, update_time):
+        with self._lock:
+            if stage not in self.stages:
+                return
+            if self._pending_writes is not None:
+                self._pending_writes.append((kind, stage, doc_id, data, update_time))
+            if self.is_built:
+                self._apply(kind, stage, doc_id, data, update_time)
+
+    def _is_current(self, key, update_time):
+        """색인된 버전이 update_time 이후인지 (재구축이 이미 읽은 쓰기, self._lock 보유 상태에서 호출)"""
+        if update_time is None or not hasattr(update_time, 'isoformat') or key not in self._docs:
+            return False
+        indexed = self._doc_versions.get(key, '')
+        return not indexed.startswith('sha1:') and indexed >= update_time.isoformat()
+
+    def _apply(self, kind, stage, doc_id, data, update_time, replay=False):
+        """쓰기 반영 (self._lock 보유 상태에서 호출, replay면 재구축이 이미 읽은 버전은 건너뜀)"""
+        key = (stage, doc_id)
+        if kind == 'remove':
+            self._discard(key)
+            return
+        if replay and self._is_current(key, update_time):
+            return
+        if kind == 'upsert':
+            if update_time is not None and key in self._docs \
+                    and self._doc_versions.get(key) == document_version(data, update_time):
+                return  # 이미 반영된 쓰기 (write-through 후 리스너 통지 등)
+        else:
+            updates, data = data, dict(self._docs.get(key, {}))
+            data.update(updates)
+            for field, value in updates.items():
+                if value is firestore.DELETE_FIELD:
+                    data.pop(field, None)
+        self._discard(key)
+        self._add(key, data, update_time)
+
+    def _add(self, key, data, update_time=None):
+        ngrams = set()
+        for text in extract_texts(data):
+            ngrams |= char_ngrams(text)
+
+        tokens = Counter()
+        for field, text in rank_fields(data).items():
+            weight = RANK_FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                tokens[token] += weight
+        length = sum(tokens.values())
+
+        self._docs[key] = data
+        self._doc_ngrams[key] = ngrams
+        self._doc_tokens[key] = tokens
+        self._doc_lengths[key] = length
+        self._doc_versions[key] = document_version(data, update_time)
+        self._generation += 1
+        self._total_length += length
+
+        for ngram in ngrams:
+            self._ngram_postings[ngram].add(key)
+        for token, tf in tokens.items():
+            self._token_postings[token][key] = tf
+
+    def _discard(self, key):
+        if key not in self._docs:
+            return
+
+        for ngram in self._doc_ngrams.pop(key, ()):
+            postings = self._ngram_postings.get(ngram)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._ngram_postings[ngram]
+
+        for token in self._doc_tokens.pop(key, ()):
+            postings = self._token_postings.get(token)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._token_postings[token]
+
+        self._total_length -= self._doc_lengths.pop(key, 0.0)
+        self._doc_versions.pop(key, None)
+        del self._docs[key]
+        self._generation += 1
+
+    # ===== 조회 =====
+
+    def get(self, stage, doc_id):
+        """색인된 문서 데이터 (없으면 None)"""
+        self.ensure_built()
+        with self._lock:
+            return self._docs.get((stage, doc_id))
+
+    def documents(self, stages=None):
+        """
+        색인된 문서 목록 (우선순위 순서)
+
+        Returns:
+            list: [(stage, doc_id, data), ...]
+        """
+        self.ensure_built()
+        stages = self._resolve_stages(stages)
+        with self._lock:
+            return [
+                (stage, doc_id, data)
+                for stage in stages
+                for (doc_stage, doc_id), data in self._docs.items()
+                if doc_stage == stage
+            ]
+
+    def candidates(self, keywords, stages=None):
+        """
+        키워드 중 하나라도 (띄어쓰기 무시, 대소문자 무시) 포함할 수 있는 문서 목록
+        n-gram 교집합 기반 후보이므로 실제 포함 여부는 호출부의 기존 조건으로 검증
+
+        Args:
+            keywords: 키워드 문자열 또는 리스트 (OR 조건)
+            stages: 검색할 단계 (None이면 전체)
+
+        Returns:
+            list: [(stage, doc_id, data), ...] (우선순위 순서)
+        """
+        if isinstance(keywords, str):
+            keywords = [keywords]
+
+        query_ngram_sets = [char_ngrams(keyword) for keyword in keywords]
+        if not query_ngram_sets or not all(query_ngram_sets):
+            # n-gram보다 짧은 키워드 → 전체 문서가 후보
+            return self.documents(stages)
+
+        self.ensure_built()
+        stages = self._resolve_stages(stages)
+        with self._lock:
+            keys = set()
+            for query_ngrams in query_ngram_sets:
+                postings = sorted(
+                    (self._ngram_postings.get(ngram, set()) for ngram in query_ngrams),
+                    key=len
+                )
+                matched = set(postings[0])
+                for posting in postings[1:]:
+                    matched &= posting
+                    if not matched:
+                        break
+                keys |= matched
+
+            return [
+                (stage, doc_id, data)
+                for stage in stages
+                for (doc_stage, doc_id), data in self._docs.items()
+                if doc_stage == stage and (doc_stage, doc_id) in keys
+            ]
+
+    def rank(self, query, stages=None, category=None, top_k=10, stage_boosts=STAGE_BOOSTS):
+        """
+        BM25 랭킹 검색 (제목/카테고리/키워드/본문 가중, 단계 가중치 적용)
+
+        Args:
+            query: 자연어 질문 ("하이노워밍팔돌리기가 뭐지")
+            stages: 검색할 단계 (None이면 전체)
+            category: 카테고리 필터 (category 필드 일치)
+            top_k: 최대 결과 수
+            stage_boosts: 단계별 점수 배율
+
+        Returns:
+            list: [(score, stage, doc_id, data), ...] (점수 내림차순)
+        """
+        self.ensure_built()
+        stages = set(self._resolve_stages(stages))
+
+        with self._lock:
+            doc_count = len(self._docs)
+            if not doc_count:
+                return []
+            avg_length = (self._total_length / doc_count) or 1.0
+
+            query_tokens = []
+            for token in tokenize(query):
+                query_tokens.extend(self._expand_query_token(token))
+
+            scores = defaultdict(float)
+            for token in set(query_tokens):
+                postings = self._token_postings.get(token)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for key, tf in postings.items():
+                    if key[0] not in stages:
+                        continue
+                    length_norm = 1 - BM25_B + BM25_B * self._doc_lengths[key] / avg_length
+                    scores[key] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+            ranked = []
+            for (stage, doc_id), score in scores.items():
+                data = self._docs[(stage, doc_id)]
+                if category and data.get('category') != category:
+                    continue
+                ranked.append((score * stage_boosts.get(stage, 1.0), stage, doc_id, data))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked[:top_k] if top_k else ranked
+
+    def _expand_query_token(self, token):
+        """
+        색인에 없는 합성어 토큰을 색인 어휘로 분해 (최장 일치)
+        "하이노워밍팔돌리기" → ['하이노워밍', '팔돌리기']
+        """
+        if token in self._token_postings:
+            return [token]
+
+        pieces = []
+        start = 0
+        while start < len(token) - 1:
+            for end in range(len(token), start + 1, -1):
+                if token[start:end] in self._token_postings:
+                    pieces.append(token[start:end])
+                    start = end
+                    break
+            else:
+                start += 1
+        return pieces
+
+    def query_terms(self, query):
+        """
+        질문 토큰과 IDF (구절 점수 계산용)
+
+        Returns:
+            list: [(token, idf), ...]
+        """
+        self.ensure_built()
+        with self._lock:
+            doc_count = len(self._docs)
+            terms = []
+            for token in tokenize(query):
+                for piece in self._expand_query_token(token):
+                    df = len(self._token_postings.get(piece, ()))
+                    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                    if (piece, idf) not in terms:
+                        terms.append((piece, idf))
+            return terms
+
+    def version(self, stage, doc_id):
+        """문서 버전 (구절 캐시 키)"""
+        with self._lock:
+            return self._doc_versions.get((stage, doc_id))
+
+    def document_frequency(self, token):
+        """토큰이 등장하는 문서 수"""
+        self.ensure_built()
+        with self._lock:
+            return len(self._token_postings.get(token, ()))
+
+    def term_frequencies(self, stage, doc_id):
+        """문서의 토큰별 가중 출현 횟수"""
+        self.ensure_built()
+        with self._lock:
+            return dict(self._doc_tokens.get((stage, doc_id), {}))
+
+    def _resolve_stages(self, stages):
+        if stages is None:
+            return self.stages
+        return [stage for stage in self.stages if stage in stages]
+
+
+# 프로젝트별 색인 레지스트리 (LRU + 미사용 TTL로 해제)
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(project_id):
+    """
+    프로젝트 색인 반환 (지연 생성, 첫 조회 시 구축)
+
+    Args:
+        project_id: 프로젝트 ID (hinobalance 등)
+
+    Returns:
+        ProjectSearchIndex
+    """
+    max_projects = getattr(settings, 'FIRESTORE_CACHE_MAX_PROJECTS', 8)
+    ttl = getattr(settings, 'FIRESTORE_CACHE_TTL', INDEX_MAX_AGE)
+
+    with _indexes_lock:
+        index = _indexes.get(project_id)
+        if index is None:
+            index = ProjectSearchIndex(project_id, max_age=ttl)
+            _indexes[project_id] = index
+        _indexes.move_to_end(project_id)
+        index.last_used = time.time()
+
+        # 오래 안 쓴 프로젝트 / 개수 초과분 해제 (리스너 포함)
+        now = time.time()
+        for stale_id in list(_indexes):
+            stale = _indexes[stale_id]
+            if stale_id != project_id and (len(_indexes) > max_projects or now - stale.last_used > ttl):
+                stale.close()
+                del _indexes[stale_id]
+                print(f"[SearchIndex] Evicted {stale_id}")
+        return index
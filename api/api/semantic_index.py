@@ -0,0 +1,452 @@
+"""
+문서 임베딩 색인 (의미 검색)
+프로젝트/단계별 문서 벡터를 float32 행렬 파일로 디스크에 보관하고 메모리 매핑(np.memmap)으로 읽음
+→ 질문 벡터와 행렬 곱 한 번으로 코사인 유사도 계산, BM25 점수와 섞어 하이브리드 랭킹
+
+임베딩은 작업 큐(job_queue)에서 백그라운드로 (요청 경로에서 전체 재임베딩 없음)
+- 검색 시 임베딩 안 된 문서가 있으면 동기화 작업만 예약, 그 문서들은 끝날 때까지 BM25 점수로만 랭킹
+- 배치마다 행렬 파일 끝에 추가 + 메타 저장 → 중간에 실패해도 다음 작업이 이어서 임베딩
+- 다른 프로세스가 저장한 벡터는 메타 파일이 바뀌면 다시 읽음
+
+임베더 (settings.EMBEDDING_MODEL):
+- sentence-transformers 모델 이름 (기본): CPU 로컬 모델 (requirements에 없음, 별도 설치)
+- Gemini 임베딩 모델 이름 ('gemini-embedding-001' 등): Gemini API (GEMINI_API_KEY 필요, 명시적으로 지정할 때만)
+- 둘 다 쓸 수 없으면 해싱 임베딩: 글자 n-gram 유사도일 뿐 의미 검색이 아님 (표현이 다른 질문은 못 찾음)
+"""
+import json
+import os
+import threading
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+from . import file_lock
+from .job_queue import get_job_queue
+from .search_index import (
+    STAGE_BOOSTS, get_index, normalize_text, rank_fields, tokenize,
+)
+
+
+# 작업 큐 작업 종류 (백그라운드 임베딩)
+SYNC_JOB = 'semantic_sync'
+
+# 해싱 임베딩 차원
+EMBEDDING_DIM = 512
+
+# Gemini 임베딩 차원 (output_dimensionality, 작을수록 행렬/디스크 절약)
+GEMINI_EMBEDDING_DIM = 768
+
+# 임베딩 입력 최대 글자 수 (제목/카테고리/키워드 + 본문 앞부분)
+EMBED_MAX_CHARS = 4000
+
+# 한 번에 임베딩할 문서 수
+EMBED_BATCH_SIZE = 64
+
+# 하이브리드 점수 = alpha * 코사인 + (1 - alpha) * 정규화 BM25
+HYBRID_ALPHA = 0.6
+
+
+class HashingEmbedder:
+    """
+    해싱 임베딩 (임베딩 API/모델을 쓸 수 없을 때의 대체, CPU 전용)
+
+    - 토큰(조사 제거) + 글자 2/3-gram을 해시로 고정 차원에 투영
+    - 띄어쓰기가 달라도 ("하이노 워밍" / "하이노워밍") 글자 n-gram이 겹쳐 유사도 유지
+    - 어휘 유사도라서 n-gram이 겹치지 않는 바꿔 말한 질문은 찾지 못함 (의미 검색 아님)
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        features = {}
+        for token in tokenize(text):
+            features[token] = features.get(token, 0.0) + 1.0
+        compact = normalize_text(text).replace(' ', '')
+        for size in (2, 3):
+            for i in range(len(compact) - size + 1):
+                gram = '#' + compact[i:i + size]
+                features[gram] = features.get(gram, 0.0) + 0.5
+        return features
+
+    def embed(self, texts, query=False):
+        """
+        텍스트 리스트 → L2 정규화 벡터 행렬
+
+        Returns:
+            np.ndarray: (len(texts), dim) float32
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                h = zlib.crc32(feature.encode('utf-8'))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                matrix[row, h % self.dim] += sign * (1.0 + np.log(count))
+        return _normalize(matrix)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class GeminiEmbedder:
+    """
+    Gemini 임베딩 API (공유 google.genai 클라이언트)
+
+    문서는 RETRIEVAL_DOCUMENT, 질문은 RETRIEVAL_QUERY로 임베딩 (비대칭 검색)
+    """
+
+    def __init__(self, model_name, dim=GEMINI_EMBEDDING_DIM):
+        from .clients import get_gemini_client
+        self.client = get_gemini_client()
+        if self.client is None:
+            raise RuntimeError("GEMINI_API_KEY 없음")
+        self.model_name = model_name
+        self.dim = dim
+        self.name = f"gemini-{model_name}-{dim}"
+
+    def embed(self, texts, query=False):
+        from google.genai import types
+        result = self.client.models.embed_content(
+            model=self.model_name,
+            contents=list(texts),
+            config=types.EmbedContentConfig(
+                task_type='RETRIEVAL_QUERY' if query else 'RETRIEVAL_DOCUMENT',
+                output_dimensionality=self.dim,
+            ),
+        )
+        matrix = np.asarray([embedding.values for embedding in result.embeddings], dtype=np.float32)
+        return _normalize(matrix)  # 축소 차원은 정규화되어 있지 않음
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers 모델 임베딩 (settings.EMBEDDING_MODEL 지정 + 설치된 경우)"""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts, query=False):
+        vectors = self.model.encode(
+            list(texts), batch_size=EMBED_BATCH_SIZE, normalize_embeddings=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def get_embedder():
+    """설정된 임베더 (Gemini API / sentence-transformers, 쓸 수 없으면 해싱 임베딩)"""
+    model_name = getattr(settings, 'EMBEDDING_MODEL', None)
+    if model_name:
+        try:
+            if model_name.startswith(('gemini', 'text-embedding')):
+                return GeminiEmbedder(model_name)
+            return SentenceTransformerEmbedder(model_name)
+        except Exception as e:
+            print(f"[SemanticIndex] 임베딩 모델 사용 불가 ({model_name}): {e}")
+    print("[SemanticIndex] 해싱 임베딩 사용: 의미 검색 비활성 (글자 n-gram 유사도 + BM25)")
+    return HashingEmbedder()
+
+
+def embedding_text(data):
+    """문서 임베딩 입력 (제목/카테고리/키워드 + 본문 앞부분)"""
+    fields = rank_fields(data)
+    text = ' '.join([fields['title'], fields['category'], fields['keywords'], fields['body']])
+    return text[:EMBED_MAX_CHARS]
+
+
+class ProjectVectorIndex:
+    """
+    프로젝트 단위 벡터 색인
+
+    파일: {EMBEDDING_CACHE_DIR}/{project_id}/{stage}.f32 (행렬, 행 추가만) + {stage}.json (행 → 문서 ID/버전)
+    문서 목록은 ProjectSearchIndex에서 가져오고, 버전이 바뀐 문서만 다시 임베딩 (이전 버전 행은 검색에서 제외)
+    """
+
+    def __init__(self, project_id, embedder, cache_dir=None):
+        self.project_id = project_id
+        self.embedder = embedder
+        self.cache_dir = os.path.join(
+            str(cache_dir or settings.EMBEDDING_CACHE_DIR), project_id
+        )
+
+        self._lock = threading.Lock()        # 메모리 매핑/행 목록 (요청 경로, 짧게만 보유)
+        self._build_lock = threading.Lock()  # 임베딩 작업은 프로세스 안에서 한 번에 하나
+        self._matrices = {}          # stage → np.memmap (행 수 × dim)
+        self._rows = {}              # stage → [(doc_id, version), ...]
+        self._live = {}              # stage → 현재 버전 문서의 행 번호
+        self._meta_mtimes = {}       # stage → 읽은 메타 파일 수정 시각
+        self._checked_generation = None
+
+    def _paths(self, stage):
+        base = os.path.join(self.cache_dir, stage)
+        return base + '.f32', base + '.json'
+
+    def _read(self, stage):
+        """디스크의 행렬/메타 (임베더가 다르거나 없으면 (None, []))"""
+        matrix_path, meta_path = self._paths(stage)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('embedder') != self.embedder.name:
+                return None, []
+            rows = [tuple(row) for row in meta.get('rows', [])]
+            if not rows:
+                return None, []
+            matrix = np.memmap(matrix_path, dtype=np.float32, mode='r', shape=(len(rows), self.embedder.dim))
+            return matrix, rows
+        except FileNotFoundError:
+            return None, []
+        except Exception as e:
+            print(f"[SemanticIndex] {self.project_id}/{stage} 로드 실패: {e}")
+            return None, []
+
+    def _write_meta(self, stage, rows):
+        _, meta_path = self._paths(stage)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'embedder': self.embedder.name, 'rows': rows}, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+    def _append(self, stage, rows, new_rows, vectors):
+        """
+        배치 벡터를 행렬 파일 끝에 추가 후 메타 저장 (메타에 없는 행은 없는 것으로 취급)
+
+        Returns:
+            list: 저장된 전체 행 목록
+        """
+        matrix_path, _ = self._paths(stage)
+        with open(matrix_path, 'ab') as f:
+            f.truncate(len(rows) * self.embedder.dim * 4)  # 중단된 이전 쓰기의 꼬리 제거
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        rows = rows + [list(row) for row in new_rows]
+        self._write_meta(stage, rows)
+        return rows
+
+    def _compact(self, stage, rows, current):
+        """이전 버전/삭제된 문서 행이 절반을 넘으면 현재 행만 남겨 다시 쓰기"""
+        matrix, rows = self._read(stage)
+        keep = [i for i, row in enumerate(rows) if row in current]
+        if matrix is None or len(keep) * 2 >= len(rows):
+            return
+        matrix_path, _ = self._paths(stage)
+        tmp_path = f"{matrix_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(matrix[keep]).tobytes())
+        del matrix
+        os.replace(tmp_path, matrix_path)
+        self._write_meta(stage, [list(rows[i]) for i in keep])
+        print(f"[SemanticIndex] {self.project_id}/{stage}: 행렬 정리 ({len(rows)} → {len(keep)}행)")
+
+    def build(self):
+        """
+        임베딩 안 된/바뀐 문서 임베딩 (작업 큐 처리 함수, 배치마다 디스크에 저장)
+
+        다른 프로세스가 같은 프로젝트를 임베딩 중이면 예외 → 작업 큐가 나중에 재시도
+        """
+        index = get_index(self.project_id)
+        index.ensure_built()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        with self._build_lock, file_lock.locked(os.path.join(self.cache_dir, '.lock'), blocking=False) as acquired:
+            if not acquired:
+                raise RuntimeError(f"{self.project_id}: 다른 프로세스에서 임베딩 중")
+
+            for stage in index.stages:
+                current = {
+                    (doc_id, index.version(stage, doc_id)): data
+                    for _, doc_id, data in index.documents(stages=[stage])
+                }
+                _, rows = self._read(stage)
+                rows = [list(row) for row in rows]
+                done = {tuple(row) for row in rows}
+                pending = [row for row in current if row not in done]
+
+                for start in range(0, len(pending), EMBED_BATCH_SIZE):
+                    batch = pending[start:start + EMBED_BATCH_SIZE]
+                    vectors = self.embedder.embed([embedding_text(current[row]) for row in batch])
+                    rows = self._append(stage, rows, batch, vectors)
+
+                if pending:
+                    print(f"[SemanticIndex] {self.project_id}/{stage}: {len(current)}개 중 {len(pending)}개 임베딩")
+                self._compact(stage, rows, current)
+
+    def _refresh(self):
+        """
+        디스크 벡터 다시 읽기 (메타 파일이 바뀐 단계만) + 임베딩 안 된 문서가 있으면 동기화 작업 예약
+
+        임베딩은 하지 않음 (요청 경로)
+        """
+        index = get_index(self.project_id)
+        index.ensure_built()
+
+        missing = False
+        with self._lock:
+            changed = False
+            for stage in index.stages:
+                try:
+                    mtime = os.stat(self._paths(stage)[1]).st_mtime_ns
+                except FileNotFoundError:
+                    mtime = None
+                if stage in self._meta_mtimes and self._meta_mtimes[stage] == mtime:
+                    continue
+                self._matrices.pop(stage, None)
+                matrix, rows = self._read(stage)
+                if matrix is not None:
+                    self._matrices[stage] = matrix
+                self._rows[stage] = rows
+                self._meta_mtimes[stage] = mtime
+                changed = True
+
+            if not changed and self._checked_generation == index.generation:
+                return
+            self._checked_generation = index.generation
+
+            for stage in index.stages:
+                current = {(doc_id, index.version(stage, doc_id)) for _, doc_id, _ in index.documents(stages=[stage])}
+                rows = self._rows.get(stage, [])
+                self._live[stage] = [i for i, row in enumerate(rows) if row in current]
+                if len(self._live[stage]) < len(current):
+                    missing = True
+
+        if missing:
+            enqueue_sync(self.project_id)
+
+    def _scored_stages(self, stages):
+        """검색할 (stage, 행렬, 행 목록, 현재 행 번호) 목록"""
+        self._refresh()
+        with self._lock:
+            return [
+                (stage, matrix, self._rows[stage], self._live.get(stage, []))
+                for stage, matrix in self._matrices.items()
+                if (stages is None or stage in stages) and self._live.get(stage)
+            ]
+
+    def similarities(self, query, stages=None):
+        """
+        질문과 임베딩된 문서의 코사인 유사도 (임베딩 전인 문서는 없음)
+
+        Returns:
+            dict: {(stage, doc_id): cosine}
+        """
+        scored = self._scored_stages(stages)
+        if not scored:
+            return {}
+        query_vector = self.embedder.embed([query], query=True)[0]
+
+        scores = {}
+        for stage, matrix, rows, live in scored:
+            sims = np.asarray(matrix @ query_vector)
+            for i in live:
+                scores[(stage, rows[i][0])] = float(sims[i])
+        return scores
+
+    def search(self, query, stages=None, top_k=10):
+        """
+        벡터 유사도 상위 문서 (행렬 곱 + argpartition)
+
+        Returns:
+            list: [(cosine, stage, doc_id), ...] (유사도 내림차순)
+        """
+        scored = self._scored_stages(stages)
+        if not scored:
+            return []
+        query_vector = self.embedder.embed([query], query=True)[0]
+
+        results = []
+        for stage, matrix, rows, live in scored:
+            sims = np.asarray(matrix @ query_vector)[live]
+            k = min(top_k, len(sims))
+            top = np.argpartition(-sims, k - 1)[:k]
+            for i in top:
+                results.append((float(sims[i]), stage, rows[live[i]][0]))
+
+        results.sort(key=lambda item: item[0], reverse=True)
+        return results[:top_k]
+
+    def hybrid_rank(self, query, stages=None, category=None, top_k=10,
+                    alpha=HYBRID_ALPHA, stage_boosts=STAGE_BOOSTS):
+        """
+        하이브리드 랭킹 (코사인 유사도 + 최댓값으로 정규화한 BM25)
+
+        Args:
+            query: 자연어 질문
+            stages: 검색할 단계 (None이면 전체)
+            category: 카테고리 필터 (category 필드 일치)
+            top_k: 최대 결과 수
+            alpha: 벡터 점수 비중 (0이면 BM25만, 1이면 벡터만)
+            stage_boosts: 단계별 점수 배율
+
+        Returns:
+            list: [(score, stage, doc_id, data), ...] (점수 내림차순)
+        """
+        index = get_index(self.project_id)
+        try:
+            similarities = self.similarities(query, stages=stages)
+        except Exception as e:  # 임베딩 API 오류 → 이번 검색은 BM25만
+            print(f"[SemanticIndex] {self.project_id} 벡터 검색 실패, BM25만 사용: {e}")
+            similarities = {}
+
+        # 단계 가중치는 합산 후 한 번만 적용
+        bm25 = {
+            (stage, doc_id): score
+            for score, stage, doc_id, _ in index.rank(
+                query, stages=stages, category=category, top_k=None,
+                stage_boosts={}
+            )
+        }
+        max_bm25 = max(bm25.values(), default=0.0) or 1.0
+
+        ranked = []
+        for key in {**bm25, **similarities}:
+            cosine = similarities.get(key, 0.0)
+            data = index.get(*key)
+            if data is None:
+                continue
+            if category and data.get('category') != category:
+                continue
+            score = alpha * max(cosine, 0.0) + (1 - alpha) * bm25.get(key, 0.0) / max_bm25
+            if score <= 0:
+                continue
+            ranked.append((score * stage_boosts.get(key[0], 1.0), key[0], key[1], data))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked[:top_k] if top_k else ranked
+
+
+# 프로젝트별 벡터 색인 레지스트리 (임베더는 공유)
+_vector_indexes = {}
+_vector_lock = threading.Lock()
+_embedder = None
+
+
+def get_vector_index(project_id):
+    """프로젝트 벡터 색인 (없으면 생성, 임베딩은 작업 큐에서)"""
+    global _embedder
+    with _vector_lock:
+        if _embedder is None:
+            _embedder = get_embedder()
+        if project_id not in _vector_indexes:
+            _vector_indexes[project_id] = ProjectVectorIndex(project_id, _embedder)
+        return _vector_indexes[project_id]
+
+
+def enqueue_sync(project_id):
+    """프로젝트 임베딩 작업 추가 (프로젝트당 대기 작업 하나만)"""
+    queue = get_job_queue()
+    queue.start()
+    return queue.enqueue(SYNC_JOB, {'project_id': project_id}, dedupe_key=f"{SYNC_JOB}:{project_id}")
+
+
+def sync_project(project_id):
+    """임베딩 작업 처리 함수"""
+    get_vector_index(project_id).build()
+
+
+# 작업 큐 처리 함수 등록
+get_job_queue().register(SYNC_JOB, sync_project)
@@ -3,7 +3,12 @@ AI 세션 학습 관리
 진, 젠의 학습 내용을 세션 간 보존
 """
 from firebase_admin import firestore
-from datetime import datetime, timezone
+from datetime import datetime
+
+from .job_queue import get_job_queue
+
+# 작업 큐 작업 종류
+LEARNING_JOB = 'session_learning'
 
 
 def save_session_learning(project_id, model, learning_summary):
@@ -31,6 +36,10 @@ def save_session_learning(project_id, model, learning_summary):
         'timestamp': datetime.now()
     })
     
+    # 시스템 프롬프트의 학습 섹션 메모 무효화
+    from .ai_config import invalidate_learning_section  # 지연 임포트로 순환 방지
+    invalidate_learning_section(project_id)
+    
     print(f"[Session Learning] {model_alias}의 학습 내용 저장 완료")
 
 
@@ -38,34 +47,28 @@ def load_recent_learning(project_id, limit=5):
     """
     최근 세션 학습 내용 로드
     
+    정렬/개수 제한은 Firestore 쿼리로 처리 (복합 색인: project_id ASC, timestamp DESC
+    → firestore.indexes.json)
+    
     Args:
         project_id: 프로젝트 ID
         limit: 최대 개수
         
     Returns:
-        str: 학습 내용 통합 텍스트
+        str: 학습 내용 통합 텍스트 (오래된 것부터)
     """
     db = firestore.client()
     
-    query = db.collection('session_learning').where('project_id', '==', project_id)
-    raw_docs = list(query.stream())
-
-    def _resolve_timestamp(data):
-        value = data.get('timestamp')
-        if isinstance(value, datetime):
-            return value
-        return datetime.min.replace(tzinfo=timezone.utc)
-
-    entries = []
-    for doc in raw_docs:
-        data = doc.to_dict()
-        entries.append(data)
-
-    if not entries:
+    query = db.collection('session_learning')\
+        .where('project_id', '==', project_id)\
+        .order_by('timestamp', direction=firestore.Query.DESCENDING)
+    if limit:
+        query = query.limit(limit)
+    
+    recent_entries = [doc.to_dict() for doc in query.stream()]
+    if not recent_entries:
         return ""
-
-    entries.sort(key=_resolve_timestamp)
-    recent_entries = entries[-limit:] if limit else entries
+    recent_entries.reverse()
 
     learning_texts = []
     for data in recent_entries:
@@ -136,9 +139,63 @@ def auto_summarize_learning(conversation_history, model, project_id):
         return ""
 
 
+def summarize_conversation(messages, model, previous_summary="", max_chars=1500):
+    """
+    롤링 요약: 이전 요약 + 새로 밀려난 대화 → 갱신된 요약
+    (auto_summarize_learning과 같은 요약 호출, 학습 저장 없이 요약문만 반환)
+    
+    Args:
+        messages: 요약에 새로 넣을 대화 (오래된 것부터)
+        model: 요약에 사용할 AI 모델
+        previous_summary: 지금까지의 요약 (없으면 빈 문자열)
+        max_chars: 요약 최대 길이 (글자)
+        
+    Returns:
+        str: 갱신된 요약 (실패 시 예외)
+    """
+    chat_text = "\n".join([
+        f"{'J님' if chat.get('role') == 'user' else 'AI'}: {chat.get('content', '')[:1000]}"  # 각 1000자로 제한
+        for chat in messages
+    ])
+    
+    summary_prompt = f"""다음은 J님과 AI의 대화 중 앞부분 요약과, 그 뒤에 이어진 대화입니다.
+둘을 합쳐 하나의 요약으로 갱신해주세요.
+
+- 다룬 주제, 결정된 내용, J님의 요청/피드백, 아직 남은 질문을 빠짐없이
+- 이후 대화에서 "그거", "이전" 등으로 참조할 수 있는 구체적 용어/이름 유지
+- {max_chars}자 이내, 사실만 (추측 금지)
+
+[지금까지의 요약]
+{previous_summary or '(없음)'}
+
+[이어진 대화]
+{chat_text}
+
+**갱신된 요약**:"""
+    
+    from .ai_service import call_ai_model  # local import prevents circular dependency
+    response = call_ai_model(
+        model_name=model,
+        user_message=summary_prompt,
+        system_prompt="J님과의 대화를 이후 대화의 맥락으로 쓸 수 있게 압축 요약하는 AI입니다.",
+        db_context="",
+        mode='learning',
+        conversation_history=[],
+        temperature=0.3  # 사실 중심
+    )
+    
+    summary = (response.get('answer') or '').strip()
+    error = response.get('error') or response.get('_error')
+    if not summary or error:
+        raise RuntimeError(f"대화 요약 실패: {error or '빈 응답'}")
+    return summary[:max_chars]
+
+
 def check_and_auto_summarize(conversation_history, model, project_id):
     """
-    대화 개수 확인 후 자동 요약 실행
+    대화 개수 확인 후 자동 요약 예약 (작업 큐에서 백그라운드 실행, 응답 지연 없음)
+    
+    프로젝트당 대기 중인 요약 작업은 하나만 (이미 있으면 추가하지 않음)
     
     Args:
         conversation_history: 전체 대화 기록
@@ -146,14 +203,35 @@ def check_and_auto_summarize(conversation_history, model, project_id):
         project_id: 프로젝트 ID
         
     Returns:
-        bool: 요약 실행 여부
+        bool: 요약 예약 여부
     """
     # 대화 개수 확인 (10개마다)
     total_chats = len(conversation_history)
     
     if total_chats > 0 and total_chats % 10 == 0:
-        print(f"[Session Learning] 대화 {total_chats}개 도달. 자동 요약 시작...")
-        auto_summarize_learning(conversation_history, model, project_id)
+        print(f"[Session Learning] 대화 {total_chats}개 도달. 자동 요약 예약...")
+        queue = get_job_queue()
+        queue.start()
+        queue.enqueue(
+            LEARNING_JOB,
+            {
+                # auto_summarize_learning은 최근 10개만 사용
+                'conversation_history': conversation_history[-10:],
+                'model': model,
+                'project_id': project_id
+            },
+            dedupe_key=f"{LEARNING_JOB}:{project_id}"
+        )
         return True
     
     return False
+
+
+def _auto_summarize_job(conversation_history, model, project_id):
+    """자동 요약 작업 (실패 시 예외 → 작업 큐가 백오프 후 재시도)"""
+    if not auto_summarize_learning(conversation_history, model, project_id):
+        raise RuntimeError(f"자동 요약 실패 ({project_id})")
+
+
+# 작업 큐 처리 함수 등록
+get_job_queue().register(LEARNING_JOB, _auto_summarize_job)
@@ -0,0 +1,37 @@
+"""chunk_cache.split_passages: 구절 길이, 겹침, 경계"""
+from django.test import SimpleTestCase
+
+from api.chunk_cache import split_passages
+
+
+class SplitPassagesTests(SimpleTestCase):
+    def test_empty_and_short_text(self):
+        self.assertEqual(split_passages(''), [])
+        self.assertEqual(split_passages('짧은 글'), ['짧은 글'])
+
+    def test_passages_respect_size_and_cover_text(self):
+        text = ' '.join(f'문장{i}입니다.' for i in range(300))
+        passages = split_passages(text, size=200, overlap=50)
+        self.assertGreater(len(passages), 1)
+        self.assertTrue(all(len(passage) <= 200 for passage in passages))
+        self.assertTrue(text.startswith(passages[0]))
+        self.assertTrue(text.endswith(passages[-1]))
+
+    def test_neighbouring_passages_overlap(self):
+        text = ' '.join(f'문장{i}입니다.' for i in range(300))
+        passages = split_passages(text, size=200, overlap=50)
+        for previous, current in zip(passages, passages[1:]):
+            self.assertIn(current[:10], previous)
+
+    def test_cuts_at_paragraph_boundary(self):
+        first = '가' * 170
+        text = first + '\n\n' + '나' * 300
+        passages = split_passages(text, size=200, overlap=20)
+        self.assertEqual(passages[0], first)
+        self.assertTrue(passages[1].startswith('나'))
+
+    def test_text_without_boundaries_still_progresses(self):
+        text = 'x' * 1000
+        passages = split_passages(text, size=100, overlap=30)
+        self.assertTrue(all(len(passage) == 100 for passage in passages[:-1]))
+        self.assertEqual(''.join(passage[:70] for passage in passages[:-1]) + passages[-1], text)
@@ -0,0 +1,76 @@
+"""ContextManager.assemble: 토큰 예산 배분 (대화 이력 vs DB 맥락)"""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api import ai_config
+from api.core.context_manager import DB_TRIMMED_NOTE, ContextManager
+from api.core.token_budget import estimate_tokens
+
+
+MODEL = 'gemini-pro'
+BUDGET = 2000
+
+
+def history(count, chars=200):
+    return [
+        {'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'{i:03d}' + '가' * chars}
+        for i in range(count)
+    ]
+
+
+def db_context(blocks, chars=300):
+    return "\n\n".join(f'[문서{i}] ' + '나' * chars for i in range(blocks))
+
+
+class AssembleTests(SimpleTestCase):
+    def setUp(self):
+        input_tokens = dict(ai_config.CONTEXT_BUDGET_SETTINGS['input_tokens'], **{MODEL: BUDGET})
+        patcher = mock.patch.dict(ai_config.CONTEXT_BUDGET_SETTINGS, {'input_tokens': input_tokens})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assemble(self, conversation, db='', db_focus=100, summary=''):
+        return ContextManager.assemble(MODEL, '시스템', '질문', conversation, db, db_focus, summary)
+
+    def test_total_within_budget(self):
+        usage = self.assemble(history(40), db_context(20))['token_usage']
+        self.assertEqual(usage['budget'], BUDGET)
+        self.assertLessEqual(usage['total'], BUDGET)
+        self.assertGreater(usage['history_dropped'], 0)
+        self.assertTrue(usage['db_trimmed'])
+
+    def test_db_gets_larger_share_when_focused(self):
+        usage = self.assemble(history(40), db_context(20))['token_usage']
+        self.assertGreater(usage['db_context'], usage['history'] * 2)
+
+    def test_history_keeps_latest_messages_in_order(self):
+        conversation = history(40)
+        kept = self.assemble(conversation, db_context(20))['conversation_history']
+        self.assertEqual(kept, conversation[-len(kept):])
+
+    def test_trimmed_db_keeps_leading_blocks(self):
+        result = self.assemble(history(40), db_context(20))
+        self.assertTrue(result['db_context'].startswith('[문서0]'))
+        self.assertTrue(result['db_context'].endswith(DB_TRIMMED_NOTE))
+
+    def test_unused_db_share_goes_to_history(self):
+        with_db = self.assemble(history(40), db_context(20))['token_usage']
+        small_db = self.assemble(history(40), db_context(1, chars=10))['token_usage']
+        self.assertFalse(small_db['db_trimmed'])
+        self.assertGreater(small_db['history_messages'], with_db['history_messages'])
+
+    def test_db_off_gives_history_whole_budget(self):
+        usage = self.assemble(history(40), db_focus=0)['token_usage']
+        self.assertEqual(usage['db_context'], 0)
+        self.assertGreater(usage['history'], BUDGET // 2)
+
+    def test_current_question_not_repeated_in_history(self):
+        conversation = history(2) + [{'role': 'user', 'content': '질문'}]
+        usage = self.assemble(conversation, db_focus=0)['token_usage']
+        self.assertEqual((usage['history_messages'], usage['history_dropped']), (2, 0))
+
+    def test_summary_counted_separately_from_system_prompt(self):
+        result = self.assemble(history(2), summary='요약' * 50)
+        self.assertIn('요약' * 50, result['system_prompt'])
+        self.assertEqual(result['token_usage']['summary'], estimate_tokens(result['system_prompt'][len('시스템'):], MODEL))
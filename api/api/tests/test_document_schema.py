@@ -0,0 +1,70 @@
+"""document_schema: 필드 읽기, 이전 문서 압축"""
+from firebase_admin import firestore
+from django.test import SimpleTestCase
+
+from api.document_schema import (
+    SCHEMA_VERSION, SCHEMA_VERSION_FIELD, compact_document, read_body, read_field,
+)
+
+
+def apply_updates(data, updates):
+    """set(merge=True) 결과 (DELETE_FIELD는 필드 삭제)"""
+    data = dict(data)
+    for field, value in updates.items():
+        if value is firestore.DELETE_FIELD:
+            data.pop(field, None)
+        else:
+            data[field] = value
+    return data
+
+
+class ReadFieldTests(SimpleTestCase):
+    def test_legacy_priority_prefers_refined_body(self):
+        data = {'내용': '초안', 'final_refined': '정제본', 'refined': True}
+        self.assertEqual(read_field(data, 'content'), '정제본')
+
+    def test_legacy_skips_flags_and_joins_lists(self):
+        self.assertEqual(read_field({'refined': True, '내용': '본문'}, 'content'), '본문')
+        self.assertEqual(read_field({'정리본': ['가', 3, '나']}, 'content'), '가 나')
+
+    def test_canonical_document_reads_only_canonical_field(self):
+        data = {'content': '새 본문', '내용': '이전 본문', SCHEMA_VERSION_FIELD: SCHEMA_VERSION}
+        self.assertEqual(read_field(data, 'content'), '새 본문')
+        self.assertEqual(read_field({SCHEMA_VERSION_FIELD: SCHEMA_VERSION, '내용': '이전'}, 'content'), '')
+
+    def test_other_keys_and_missing(self):
+        self.assertEqual(read_field({'title': '제목 영문'}, 'title'), '제목 영문')
+        self.assertEqual(read_field({'원본': '원문'}, 'original'), '원문')
+        self.assertEqual(read_field({}, 'category'), '')
+
+    def test_custom_mapping(self):
+        mapping = {'content': 'body'}
+        data = {'body': '본문', SCHEMA_VERSION_FIELD: SCHEMA_VERSION}
+        self.assertEqual(read_field(data, 'content', mapping), '본문')
+
+    def test_read_body_prefers_full_text(self):
+        self.assertEqual(read_body({'전체글': '전체', 'content': '본문'}), '전체')
+        self.assertEqual(read_body({'content': '본문'}), '본문')
+
+
+class CompactDocumentTests(SimpleTestCase):
+    def test_removes_identical_copies_and_keeps_different_fields(self):
+        data = {'내용': '본문', '정리본': '본문', 'ai_응답': '다른 응답', '전체글': '본문', '제목': '제목'}
+        compacted = apply_updates(data, compact_document(data))
+        self.assertEqual(compacted, {
+            'content': '본문', 'ai_응답': '다른 응답', '제목': '제목', SCHEMA_VERSION_FIELD: SCHEMA_VERSION,
+        })
+        self.assertEqual(read_body(compacted), read_body(data))
+
+    def test_idempotent(self):
+        data = {'final_refined': '정제본', '내용': '정제본', '전체글': '출판용 전체글'}
+        compacted = apply_updates(data, compact_document(data))
+        self.assertIsNone(compact_document(compacted))
+        self.assertEqual(read_field(compacted, 'content'), '정제본')
+        self.assertEqual(read_body(compacted), '출판용 전체글')
+
+    def test_conflicting_canonical_field_is_left_alone(self):
+        self.assertIsNone(compact_document({'final_refined': '정제본', 'content': '다른 본문'}))
+
+    def test_nothing_to_compact(self):
+        self.assertIsNone(compact_document({'제목': '본문 없음'}))
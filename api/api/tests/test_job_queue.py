@@ -0,0 +1,126 @@
+"""job_queue: 작업 가져가기, 임대 만료, 백오프, dead"""
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api import job_queue
+from api.job_queue import DEAD, DONE, PENDING, RUNNING, JobQueue
+
+
+class OtherProcessQueue(JobQueue):
+    """같은 큐 파일을 쓰는 다른 프로세스"""
+    owner = 'other-host:1'
+
+
+class BackoffDelayTests(SimpleTestCase):
+    def test_exponential_with_jitter(self):
+        for attempts, base in ((1, 5), (2, 10), (3, 20)):
+            delay = job_queue.backoff_delay(attempts)
+            self.assertGreaterEqual(delay, base)
+            self.assertLessEqual(delay, base * 1.5)
+
+    def test_capped(self):
+        self.assertLessEqual(job_queue.backoff_delay(50), job_queue.BACKOFF_MAX * 1.5)
+
+
+class JobQueueTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / 'jobs.sqlite3'
+        self.queue = self.make_queue(JobQueue)
+        self.calls = []
+        self.queue.register('echo', lambda **payload: self.calls.append(payload))
+
+    def make_queue(self, cls, **kwargs):
+        queue = cls(path=self.path, workers=1, max_attempts=3, lease_seconds=60, **kwargs)
+        self.addCleanup(lambda: getattr(queue._local, 'conn', None) and queue._local.conn.close())
+        return queue
+
+    def job(self, job_id):
+        row = self.queue._connect().execute(
+            "SELECT status, attempts, run_at, locked_by, last_error FROM jobs WHERE id=?", (job_id,)
+        ).fetchone()
+        return dict(zip(('status', 'attempts', 'run_at', 'locked_by', 'last_error'), row))
+
+    def test_run_once_executes_and_finishes(self):
+        job_id = self.queue.enqueue('echo', {'text': '안녕'})
+        self.assertTrue(self.queue.run_once())
+        self.assertEqual(self.calls, [{'text': '안녕'}])
+        self.assertEqual(self.job(job_id)['status'], DONE)
+        self.assertIsNone(self.job(job_id)['locked_by'])
+        self.assertFalse(self.queue.run_once())
+
+    def test_dedupe_key_reuses_pending_job(self):
+        first = self.queue.enqueue('echo', {'n': 1}, dedupe_key='doc-1')
+        self.assertEqual(self.queue.enqueue('echo', {'n': 2}, dedupe_key='doc-1'), first)
+        self.queue.run_once()
+        self.assertNotEqual(self.queue.enqueue('echo', {'n': 3}, dedupe_key='doc-1'), first)
+
+    def test_claims_only_registered_kinds_and_due_jobs(self):
+        self.queue.enqueue('unknown', {})
+        self.queue.enqueue('echo', {}, delay=60)
+        self.assertIsNone(self.queue._claim())
+
+    def test_running_job_with_live_lease_is_not_claimed(self):
+        job_id = self.queue.enqueue('echo', {})
+        self.assertEqual(self.queue._claim()[0], job_id)
+        other = self.make_queue(OtherProcessQueue)
+        other.register('echo', lambda **payload: None)
+        self.assertIsNone(other._claim())
+
+    def test_expired_lease_is_reclaimed_and_old_owner_loses_it(self):
+        job_id = self.queue.enqueue('echo', {})
+        self.queue._claim()
+        self.queue._connect().execute("UPDATE jobs SET lease_until=? WHERE id=?", (time.time() - 1, job_id))
+
+        other = self.make_queue(OtherProcessQueue)
+        other.register('echo', lambda **payload: None)
+        claimed = other._claim()
+        self.assertEqual(claimed[0], job_id)
+        self.assertEqual(claimed[3], 2)  # 중단된 실행도 시도 횟수에 포함
+        self.assertEqual(self.job(job_id)['locked_by'], 'other-host:1')
+
+        self.queue._finish(job_id)  # 임대를 잃은 프로세스의 결과는 기록하지 않음
+        self.assertEqual(self.job(job_id)['status'], RUNNING)
+        other._finish(job_id)
+        self.assertEqual(self.job(job_id)['status'], DONE)
+
+    def test_failure_backs_off_then_goes_dead(self):
+        def fail(**payload):
+            raise ValueError('boom')
+        self.queue.register('fail', fail)
+        job_id = self.queue.enqueue('fail', {})
+
+        before = time.time()
+        self.queue.run_once()
+        job = self.job(job_id)
+        self.assertEqual((job['status'], job['attempts']), (PENDING, 1))
+        self.assertGreaterEqual(job['run_at'], before + job_queue.BACKOFF_BASE)
+        self.assertIn('ValueError: boom', job['last_error'])
+
+        with mock.patch('api.job_queue.backoff_delay', return_value=0):
+            self.queue._connect().execute("UPDATE jobs SET run_at=0 WHERE id=?", (job_id,))
+            self.queue.run_once()
+            self.queue.run_once()
+        job = self.job(job_id)
+        self.assertEqual((job['status'], job['attempts']), (DEAD, 3))
+        self.assertEqual([dead['id'] for dead in self.queue.dead_jobs(kind='fail')], [job_id])
+        self.assertEqual(self.queue.stats()[DEAD], 1)
+
+        self.assertEqual(self.queue.retry_dead(kind='fail'), 1)
+        self.assertEqual((self.job(job_id)['status'], self.job(job_id)['attempts']), (PENDING, 0))
+
+    def test_recover_resets_only_expired_leases(self):
+        expired = self.queue.enqueue('echo', {})
+        live = self.queue.enqueue('echo', {})
+        self.queue._claim()
+        self.queue._claim()
+        self.queue._connect().execute("UPDATE jobs SET lease_until=? WHERE id=?", (time.time() - 1, expired))
+        self.queue._recover()
+        self.assertEqual(self.job(expired)['status'], PENDING)
+        self.assertEqual(self.job(expired)['attempts'], 1)
+        self.assertEqual(self.job(live)['status'], RUNNING)
@@ -0,0 +1,62 @@
+"""ai_service.merge_model_responses: 주장 합의, 근거 병합"""
+from django.test import SimpleTestCase
+
+from api.ai_service import merge_model_responses
+
+
+def response(answer, claims=(), evidence=(), confidence=0.8, **extra):
+    return dict(answer=answer, claims=list(claims), evidence=list(evidence), confidence=confidence, **extra)
+
+
+class MergeModelResponsesTests(SimpleTestCase):
+    def test_majority_claims_are_agreed(self):
+        merged = merge_model_responses({
+            'gemini-pro': response('A', ['팔돌리기는 어깨 관절을 푼다', '호흡을 먼저 고른다']),
+            'gpt': response('B', ['팔돌리기는 어깨 관절을 푼다.']),
+            'claude': response('C', ['팔돌리기는 어깨 관절을 푼다', '하루 세 번 한다']),
+        })
+        self.assertEqual(merged['claims'], ['팔돌리기는 어깨 관절을 푼다.'])
+        disputed = {item['claim'] for item in merged['_consensus']['disputed_claims']}
+        self.assertEqual(disputed, {'호흡을 먼저 고른다', '하루 세 번 한다'})
+        self.assertEqual(merged['_consensus']['agreed_claims'][0]['models'], ['claude', 'gemini-pro', 'gpt'])
+
+    def test_failed_models_lower_confidence_and_are_excluded(self):
+        merged = merge_model_responses({
+            'gemini-pro': response('A', ['주장'], confidence=0.9),
+            'gpt': {'error': 'timeout'},
+        })
+        self.assertEqual(merged['answer'], 'A')
+        self.assertEqual(merged['confidence'], 0.45)
+        self.assertEqual(merged['_consensus']['models_failed'], ['gpt'])
+
+    def test_all_failed_raises(self):
+        with self.assertRaises(Exception):
+            merge_model_responses({'gpt': {'error': 'timeout'}, 'claude': response('', confidence=0.0)})
+
+    def test_evidence_deduplicated_including_list_values(self):
+        item = {'collection': 'final', 'doc_id': 'd1', 'field': '키워드', 'value': ['어깨', '호흡']}
+        merged = merge_model_responses({
+            'gemini-pro': response('A', evidence=[item, 'not-a-dict']),
+            'gpt': response('B', evidence=[dict(item)]),
+            'claude': response('C', evidence=[{'collection': 'final', 'doc_id': 'd2', 'field': '제목', 'value': '걷기'}]),
+        })
+        self.assertEqual(len(merged['evidence']), 2)
+        self.assertEqual(merged['evidence'][0]['doc_id'], 'd1')
+        self.assertEqual(merged['evidence'][0]['models'], ['gemini-pro', 'gpt'])
+
+    def test_best_model_has_most_agreed_claims(self):
+        merged = merge_model_responses({
+            'gemini-pro': response('A', ['어깨 관절을 부드럽게 푼다'], confidence=0.99),
+            'gpt': response('B', ['어깨 관절을 부드럽게 푼다', '호흡은 천천히 내쉰다']),
+            'claude': response('C', ['호흡은 천천히 내쉰다']),
+        })
+        self.assertEqual(merged['_consensus']['best_model'], 'gpt')
+        self.assertEqual(merged['answer'], 'B')
+
+    def test_lists_are_unioned_in_order(self):
+        merged = merge_model_responses({
+            'gpt': response('A', missing_info=['x', 'y'], actions_suggested=['a']),
+            'claude': response('B', missing_info=['y', 'z'], actions_suggested=['a', 'b']),
+        })
+        self.assertEqual(merged['missing_info'], ['x', 'y', 'z'])
+        self.assertEqual(merged['actions_suggested'], ['a', 'b'])
@@ -0,0 +1,98 @@
+"""resilience: 일시 오류 판단, Retry-After, 서킷 브레이커 상태"""
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.resilience import CircuitBreaker, is_retryable, retry_after
+
+
+class StatusError(Exception):
+    def __init__(self, message='', status_code=None, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {}, status_code=status_code)
+
+
+class ReadTimeout(Exception):
+    pass
+
+
+class IsRetryableTests(SimpleTestCase):
+    def test_status_codes(self):
+        for code in (429, 500, 503, 529):
+            self.assertTrue(is_retryable(StatusError(status_code=code)), code)
+        for code in (400, 401, 404):
+            self.assertFalse(is_retryable(StatusError('503 in text', status_code=code)), code)
+
+    def test_exception_names_and_messages(self):
+        self.assertTrue(is_retryable(ReadTimeout()))
+        self.assertTrue(is_retryable(Exception('429 RESOURCE_EXHAUSTED')))
+        self.assertTrue(is_retryable(Exception('model is overloaded')))
+        self.assertFalse(is_retryable(ValueError('invalid prompt')))
+
+
+class RetryAfterTests(SimpleTestCase):
+    def test_headers(self):
+        self.assertEqual(retry_after(StatusError(headers={'retry-after': '7'})), 7.0)
+        self.assertEqual(retry_after(StatusError(headers={'retry-after-ms': '1500'})), 1.5)
+        self.assertEqual(retry_after(StatusError(headers={'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'})), 0.0)
+
+    def test_gemini_retry_delay_in_message(self):
+        self.assertEqual(retry_after(Exception("429 ... 'retryDelay': '13s'")), 13.0)
+
+    def test_missing(self):
+        self.assertIsNone(retry_after(Exception('boom')))
+        self.assertIsNone(retry_after(StatusError(headers={'retry-after': 'soon'})))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch('api.resilience.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('test', threshold=2, cooldown=10)
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_single_probe(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 10
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_probe_success_closes(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 10
+        self.breaker.allow()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.snapshot(), {'state': CircuitBreaker.CLOSED, 'failures': 0})
+        self.assertTrue(self.breaker.allow())
+
+    def test_probe_failure_reopens_for_another_cooldown(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 10
+        self.breaker.allow()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.now += 5
+        self.assertFalse(self.breaker.allow())
+        self.now += 5
+        self.assertTrue(self.breaker.allow())
@@ -0,0 +1,84 @@
+"""response_cache: 요청 키, 용량 합계, LRU 삭제"""
+import itertools
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.response_cache import ResponseCache, make_key
+
+
+class MakeKeyTests(SimpleTestCase):
+    def test_key_ignores_argument_order(self):
+        self.assertEqual(
+            make_key(model='gpt', temperature=0.5, messages=[{'role': 'user', 'content': '안녕'}]),
+            make_key(messages=[{'role': 'user', 'content': '안녕'}], temperature=0.5, model='gpt'),
+        )
+
+    def test_key_changes_with_any_value(self):
+        base = make_key(model='gpt', temperature=0.5, system_prompt='a')
+        self.assertNotEqual(base, make_key(model='gpt', temperature=0.7, system_prompt='a'))
+        self.assertNotEqual(base, make_key(model='claude', temperature=0.5, system_prompt='a'))
+        self.assertNotEqual(base, make_key(model='gpt', temperature=0.5, system_prompt='b'))
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # 같은 시각으로 저장되지 않도록 accessed_at을 1초씩 증가
+        clock = itertools.count(1000)
+        patcher = mock.patch('api.response_cache.time.time', side_effect=lambda: next(clock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_cache(self, max_bytes):
+        cache = ResponseCache(path=Path(self.tmp.name) / 'responses.sqlite3', max_bytes=max_bytes)
+        self.addCleanup(lambda: cache._conn and cache._conn.close())
+        return cache
+
+    def total_size(self, cache):
+        return cache._connect().execute("SELECT total_size FROM cache_meta WHERE id = 0").fetchone()[0]
+
+    def test_put_get_and_total(self):
+        cache = self.make_cache(10_000)
+        cache.put('a', {'answer': '안녕'})
+        cache.put('a', 'xx')  # 덮어쓰기: 이전 크기는 합계에서 빠짐
+        cache.put('b', 'yyyy')
+        self.assertEqual(cache.get('a'), 'xx')
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(self.total_size(cache), len('"xx"') + len('"yyyy"'))
+
+    def test_evicts_least_recently_used_below_target(self):
+        cache = self.make_cache(50)
+        for key in 'abcd':
+            cache.put(key, 'x' * 8)  # 10 bytes each
+        cache.get('a')  # a를 최근 사용으로
+        cache.put('e', 'x' * 18)  # 합계 60 > 50 → 45 이하까지 삭제
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNone(cache.get('c'))
+        self.assertIsNotNone(cache.get('d'))
+        self.assertIsNotNone(cache.get('e'))
+        self.assertEqual(self.total_size(cache), 40)
+
+    def test_total_seeded_from_existing_rows(self):
+        cache = self.make_cache(10_000)
+        cache.put('a', 'x' * 8)
+        cache._conn.execute("DROP TABLE cache_meta")
+        cache._conn.commit()
+        cache._conn.close()
+        reopened = self.make_cache(10_000)
+        self.assertEqual(self.total_size(reopened), 10)
+
+    def test_cached_calls_compute_once(self):
+        cache = self.make_cache(10_000)
+        compute = mock.Mock(return_value={'answer': '응답'})
+        request = {'model': 'gpt', 'messages': []}
+        self.assertEqual(cache.cached(request, compute), {'answer': '응답'})
+        self.assertEqual(cache.cached(request, compute), {'answer': '응답'})
+        compute.assert_called_once()
+        cache.cached(request, compute, enabled=False)
+        self.assertEqual(compute.call_count, 2)
@@ -0,0 +1,19 @@
+"""검색 커서 토큰 (search_documents 페이지 넘김)"""
+from django.test import SimpleTestCase
+
+from api.views_v2 import _decode_search_cursor, _encode_search_cursor
+
+
+class SearchCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        token = _encode_search_cursor('final', '하이노_문서/1', 40)
+        self.assertEqual(_decode_search_cursor(token), ('final', '하이노_문서/1', 40))
+
+    def test_token_is_url_safe(self):
+        token = _encode_search_cursor('raw', '??>>~~' * 5, 3)
+        self.assertNotRegex(token, r'[+/]')
+
+    def test_invalid_tokens(self):
+        self.assertIsNone(_decode_search_cursor('not-a-cursor'))
+        self.assertIsNone(_decode_search_cursor(''))
+        self.assertIsNone(_decode_search_cursor('e30='))  # {} (필드 없음)
@@ -0,0 +1,119 @@
+"""search_index: 토큰화, BM25 랭킹, 증분 갱신 버전 중복 제거"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.search_index import ProjectSearchIndex, char_ngrams, strip_josa, tokenize
+
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def build_index(docs_by_stage):
+    """Firestore 대신 주어진 문서로 구축한 색인 {stage: {doc_id: data}}"""
+    def collection(stage):
+        docs = [
+            SimpleNamespace(id=doc_id, to_dict=lambda data=data: dict(data), update_time=T0)
+            for doc_id, data in docs_by_stage.get(stage, {}).items()
+        ]
+        return SimpleNamespace(stream=lambda: iter(docs))
+
+    client = mock.MagicMock()
+    client.collection.return_value.document.return_value.collection.side_effect = collection
+    index = ProjectSearchIndex('test')
+    with mock.patch('api.search_index.firestore.client', return_value=client):
+        index.ensure_built()
+    return index
+
+
+class TokenizeTests(SimpleTestCase):
+    def test_strips_josa_and_short_tokens(self):
+        self.assertEqual(tokenize("하이노워밍팔돌리기가 뭐지"), ['하이노워밍팔돌리기', '뭐지'])
+        self.assertEqual(tokenize("균형을 a 잡는 법"), ['균형', '잡는'])
+
+    def test_lowercases_ascii(self):
+        self.assertEqual(tokenize("HINO Balance 2026"), ['hino', 'balance', '2026'])
+
+    def test_non_string(self):
+        self.assertEqual(tokenize(None), [])
+
+    def test_josa_kept_when_stem_too_short(self):
+        self.assertEqual(strip_josa('팔을'), '팔을')
+
+    def test_char_ngrams_ignore_whitespace(self):
+        self.assertEqual(char_ngrams("A B c"), {'ab', 'bc'})
+        self.assertEqual(char_ngrams("a"), set())
+
+
+class RankTests(SimpleTestCase):
+    def setUp(self):
+        self.index = build_index({
+            'final': {
+                'title_hit': {'제목': '팔돌리기', '내용': '어깨 관절을 부드럽게 푸는 동작'},
+                'body_hit': {'제목': '준비 운동', '내용': '팔돌리기 전에 호흡을 고른다'},
+            },
+            'raw': {
+                'raw_hit': {'제목': '팔돌리기', '내용': '어깨 관절을 부드럽게 푸는 동작'},
+            },
+            'draft': {
+                'other': {'제목': '걷기', '내용': '발바닥 감각'},
+            },
+        })
+
+    def test_title_match_outranks_body_match(self):
+        ranked = self.index.rank("팔돌리기", stages=['final'])
+        self.assertEqual([doc_id for _, _, doc_id, _ in ranked], ['title_hit', 'body_hit'])
+
+    def test_stage_boost_orders_identical_documents(self):
+        ranked = self.index.rank("팔돌리기", stages=['final', 'raw'])
+        doc_ids = [doc_id for _, _, doc_id, _ in ranked]
+        self.assertLess(doc_ids.index('title_hit'), doc_ids.index('raw_hit'))
+
+    def test_scores_descending_and_top_k(self):
+        ranked = self.index.rank("팔돌리기 어깨", top_k=2)
+        self.assertEqual(len(ranked), 2)
+        self.assertGreaterEqual(ranked[0][0], ranked[1][0])
+
+    def test_compound_query_is_split_into_indexed_terms(self):
+        ranked = self.index.rank("어깨팔돌리기")
+        self.assertIn('title_hit', [doc_id for _, _, doc_id, _ in ranked])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.rank("수영"), [])
+
+
+class IncrementalUpdateTests(SimpleTestCase):
+    def setUp(self):
+        self.index = build_index({'final': {'doc': {'제목': '팔돌리기', '내용': '어깨'}}})
+
+    def test_same_version_upsert_is_ignored(self):
+        generation = self.index.generation
+        self.index.upsert('final', 'doc', {'제목': '팔돌리기', '내용': '어깨'}, T0)
+        self.assertEqual(self.index.generation, generation)
+
+    def test_newer_upsert_replaces_postings(self):
+        self.index.upsert('final', 'doc', {'제목': '걷기', '내용': '발바닥'}, T0 + timedelta(seconds=1))
+        self.assertEqual(self.index.document_frequency('팔돌리기'), 0)
+        self.assertEqual(self.index.document_frequency('걷기'), 1)
+        self.assertEqual(self.index.version('final', 'doc'), (T0 + timedelta(seconds=1)).isoformat())
+
+    def test_merge_keeps_other_fields(self):
+        self.index.merge('final', 'doc', {'내용': '발바닥'}, T0 + timedelta(seconds=1))
+        self.assertEqual(self.index.get('final', 'doc'), {'제목': '팔돌리기', '내용': '발바닥'})
+
+    def test_remove_clears_postings(self):
+        self.index.remove('final', 'doc')
+        self.assertIsNone(self.index.get('final', 'doc'))
+        self.assertEqual(self.index.document_frequency('팔돌리기'), 0)
+        self.assertEqual(self.index.candidates('팔돌리기'), [])
+
+    def test_replay_skips_writes_already_read_by_rebuild(self):
+        with self.index._lock:
+            self.index._apply('upsert', 'final', 'doc', {'제목': '걷기'}, T0 - timedelta(seconds=1), replay=True)
+        self.assertEqual(self.index.get('final', 'doc')['제목'], '팔돌리기')
+
+    def test_unknown_stage_is_ignored(self):
+        self.index.upsert('archive', 'doc', {'제목': '걷기'}, T0)
+        self.assertEqual(self.index.documents(), [('final', 'doc', {'제목': '팔돌리기', '내용': '어깨'})])
@@ -6,7 +6,11 @@ from django.conf import settings
 import json
 from .ai_service import call_ai_model, classify_intent, validate_ai_response  # Phase 6: 의도 분류, 검증 추가
 from .db_service import FirestoreService  # DB 서비스 레이어
+from .chat_buffer import get_chat_buffer  # chat_history 쓰기 버퍼
+from .history_cache import ALL_PROJECTS, get_history_cache  # 최근 대화 링 버퍼
+from .chat_sessions import buffer_session_message  # 세션별 대화 기록
 from .meme_generator import MemeGenerator  # 밈 생성기
+from .document_schema import read_field  # 정규 스키마 필드 읽기
 from django.shortcuts import render  # 템플릿 렌더링
 
 # 한국 시간대 (KST = UTC+9)
@@ -46,10 +50,10 @@ def hino_review_draft(request):
                 'content_type': data.get('content_type', 'N/A'),
                 'category': data.get('category', 'N/A'),
                 'title': data.get('title', data.get('exercise_name', data.get('doc_id', 'N/A'))),
-                'length': len(data.get('content', data.get('organized_content', ''))),
+                'length': len(read_field(data, 'content')),
                 'created_at': data.get('created_at', 'N/A'),
                 'status': data.get('status', 'N/A'),
-                'preview': (data.get('content', data.get('organized_content', '')))[:200] + '...'
+                'preview': read_field(data, 'content')[:200] + '...'
             })
         
         return JsonResponse({
@@ -198,7 +202,7 @@ conversation_history = []
 MAX_HISTORY = 10
 
 
-def save_chat_history(role, content, mode, model, temperature=0.85, db_focus=25, project_context=None):
+def save_chat_history(role, content, mode, model, temperature=0.85, db_focus=25, project_context=None, session_id=None):
     """
     대화 기록을 Firestore에 저장 (확장된 필드)
     문서 ID: YYYYMMDD_HHMMSS_microseconds (역순 정렬 가능)
@@ -211,9 +215,11 @@ def save_chat_history(role, content, mode, model, temperature=0.85, db_focus=25,
         temperature: AI 창의성 (0.0-1.0)
         db_focus: DB 사용률 (0-100)
         project_context: 프로젝트 ID (None이면 일반 대화)
+        session_id: 대화 세션 ID (지정 시 projects/{id}/sessions/{sid}/messages에도 저장)
+    
+    Firestore 쓰기는 chat_buffer가 모아서 처리 (로컬 저널 기록 후 즉시 반환)
     """
     try:
-        db = firestore.client()
         now = now_kst()
         timestamp = now.strftime('%Y%m%d_%H%M%S_%f')
         doc_id = f"{timestamp}"
@@ -229,43 +235,34 @@ def save_chat_history(role, content, mode, model, temperature=0.85, db_focus=25,
             'project_context': project_context,
             'raw_분석_완료': False
         }
+        if session_id:
+            doc_data['session_id'] = session_id
         
-        db.collection('chat_history').document(doc_id).set(doc_data)
+        get_chat_buffer().add(doc_id, doc_data)
+        if session_id:
+            buffer_session_message(project_context, session_id, doc_id, doc_data)
+        get_history_cache().append((project_context, session_id), doc_id, role, content)
         return doc_id  # ID 반환 (RAW 저장 시 참조용)
     except Exception as e:
         print(f"[대화 저장 실패] {str(e)}")
         return None
 
 
-def load_chat_history(limit=20):
+def load_chat_history(limit=20, project_context=None, session_id=None):
     """
-    Firestore에서 최근 대화 기록 조회
-    문서 ID 기반 역순 정렬 (최신이 먼저)
+    최근 대화 기록 조회 (프로젝트/세션별 메모리 링 버퍼, 첫 조회 + 주기적으로 최근분만 Firestore)
+    문서 ID 기반 정렬 (저장 시각 = '시간' 필드 순서)
     
     Args:
         limit: 최근 몇 개 메시지 (기본 20개 = 10턴)
+        project_context: 프로젝트 ID (None이면 일반 대화, ALL_PROJECTS면 프로젝트 구분 없이 전체 - v1)
+        session_id: 대화 세션 ID (None이면 프로젝트 전체)
     
     Returns:
-        list: [{'role': 'user', 'content': '...'}, ...]
+        list: [{'role': 'user', 'content': '...'}, ...] (오래된 것부터 - AI 컨텍스트용)
     """
     try:
-        db = firestore.client()
-        # timestamp 기준 내림차순 정렬 (최신이 먼저) → 역순으로 뒤집어 오래된 것부터
-        docs = db.collection('chat_history')\
-                .order_by('timestamp', direction=firestore.Query.DESCENDING)\
-                .limit(limit)\
-                .stream()
-        
-        history = []
-        for doc in docs:
-            data = doc.to_dict()
-            history.append({
-                'role': data.get('역할', 'user'),
-                'content': data.get('내용', '')  # 전체 조회 (제한 없음)
-            })
-        
-        # 시간 역순으로 정렬 (오래된 것부터 - AI 컨텍스트용)
-        return list(reversed(history))
+        return get_history_cache().recent((project_context, session_id), limit)
     except Exception as e:
         print(f"[대화 로드 실패] {str(e)}")
         return []
@@ -1023,8 +1020,8 @@ def chat(request):
                             db_context += f"제목: {doc.get('제목', 'N/A')}\n"
                             db_context += f"카테고리: {doc.get('카테고리', 'N/A')}\n"
                             # 내용/전체글 길이 제한 (메모리 최적화)
-                            content = doc.get('내용', '')
-                            full_text = doc.get('전체글', '')
+                            content = read_field(doc, 'content')
+                            full_text = read_field(doc, 'full_text')
                             db_context += f"내용: {content[:1000]}\n"  # 1000자 제한
                             if full_text:
                                 db_context += f"전체글: {full_text[:5000]}...\n"  # 5000자로 증가
@@ -1161,9 +1158,9 @@ def chat(request):
                             document_list.append({
                                 'collection': col_name,
                                 'doc_id': doc.get('_id'),
-                                'title': doc.get('제목', doc.get('내용', '')[:30] + '...'),
+                                'title': doc.get('제목', read_field(doc, 'content')[:30] + '...'),
                                 'category': doc.get('카테고리', ''),
-                                'preview': doc.get('내용', '')[:100] + '...' if len(doc.get('내용', '')) > 100 else doc.get('내용', ''),
+                                'preview': read_field(doc, 'content')[:100] + '...' if len(read_field(doc, 'content')) > 100 else read_field(doc, 'content'),
                                 'created_at': created_at_str
                             })
             else:
@@ -1180,9 +1177,9 @@ def chat(request):
                             document_list.append({
                                 'collection': col_name,
                                 'doc_id': doc.get('_id'),
-                                'title': doc.get('제목', doc.get('내용', '')[:30] + '...'),
+                                'title': doc.get('제목', read_field(doc, 'content')[:30] + '...'),
                                 'category': doc.get('카테고리', ''),
-                                'preview': doc.get('내용', '')[:100] + '...' if len(doc.get('내용', '')) > 100 else doc.get('내용', ''),
+                                'preview': read_field(doc, 'content')[:100] + '...' if len(read_field(doc, 'content')) > 100 else read_field(doc, 'content'),
                                 'created_at': created_at_str
                             })
             
@@ -1315,7 +1312,7 @@ def chat(request):
                             'title': title,
                             'collection': f'projects/hinobalance/{subcol}',
                             'category': data.get('카테고리', ''),
-                            'preview': data.get('내용', '')[:100] + '...'
+                            'preview': read_field(data, 'content')[:100] + '...'
                         })
             
             print(f"[DELETE] 찾은 문서 개수: {len(found_docs)}")
@@ -1348,7 +1345,7 @@ def chat(request):
             # DB는 이미 위에서 조회됨 (organize/hybrid 모드)
             
             # Firestore에서 최근 대화 20개 로드
-            chat_history = load_chat_history(limit=20)
+            chat_history = load_chat_history(limit=20, project_context=ALL_PROJECTS)
             
             # ⭐ 사용자 메시지 즉시 저장 (AI 실패와 무관)
             save_chat_history('user', user_message, mode, model)
@@ -1427,13 +1424,13 @@ def chat(request):
                     
                     # 포함 키워드 체크
                     if include_kw:
-                        content = str(doc_data.get('내용', '')) + str(doc_data.get('제목', ''))
+                        content = read_field(doc_data, 'content') + str(doc_data.get('제목', ''))
                         if not any(kw in content for kw in include_kw):
                             continue
                     
                     # 제외 키워드 체크
                     if exclude_kw:
-                        content = str(doc_data.get('내용', '')) + str(doc_data.get('제목', ''))
+                        content = read_field(doc_data, 'content') + str(doc_data.get('제목', ''))
                         if any(kw in content for kw in exclude_kw):
                             continue
                     
@@ -1454,7 +1451,7 @@ def chat(request):
             
             # Gemini로 종합
             combined_content = "\n\n=== 문서 구분선 ===\n\n".join([
-                f"[문서 {idx+1}]\n제목: {doc.get('제목', 'N/A')}\n카테고리: {doc.get('카테고리', 'N/A')}\n운동명: {doc.get('운동명', 'N/A')}\n\n내용:\n{doc.get('내용', '')}\n\n전체글:\n{doc.get('전체글', '')}"
+                f"[문서 {idx+1}]\n제목: {doc.get('제목', 'N/A')}\n카테고리: {doc.get('카테고리', 'N/A')}\n운동명: {doc.get('운동명', 'N/A')}\n\n내용:\n{read_field(doc, 'content')}\n\n전체글:\n{read_field(doc, 'full_text')}"
                 for idx, doc in enumerate(all_docs)
             ])
             
@@ -1537,7 +1534,7 @@ JSON 형식:
         # 일반 질문 (NONE)
         
         # Firestore에서 최근 대화 20개 로드 (10턴)
-        chat_history = load_chat_history(limit=20)
+        chat_history = load_chat_history(limit=20, project_context=ALL_PROJECTS)
         
         # ⭐ 사용자 메시지 즉시 저장 (AI 실패와 무관)
         save_chat_history('user', user_message, mode, model)
@@ -1885,7 +1882,7 @@ def generate_final(request):
         
         # Gemini에게 종합 요청
         combined_content = "\n\n=== 문서 구분선 ===\n\n".join([
-            f"[문서 {idx+1}]\n제목: {doc.get('제목', 'N/A')}\n카테고리: {doc.get('카테고리', 'N/A')}\n운동명: {doc.get('운동명', 'N/A')}\n\n내용:\n{doc.get('내용', '')}\n\n전체글:\n{doc.get('전체글', '')}"
+            f"[문서 {idx+1}]\n제목: {doc.get('제목', 'N/A')}\n카테고리: {doc.get('카테고리', 'N/A')}\n운동명: {doc.get('운동명', 'N/A')}\n\n내용:\n{read_field(doc, 'content')}\n\n전체글:\n{read_field(doc, 'full_text')}"
             for idx, doc in enumerate(source_docs)
         ])
         
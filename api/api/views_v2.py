@@ -3,25 +3,42 @@ JNext v2 Views
 동적 맥락 시스템 기반 채팅 API
 """
 
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.shortcuts import render
+from django.conf import settings
 from firebase_admin import firestore
 from datetime import datetime, timezone, timedelta
+import asyncio
+import base64
 import json
 import re
 
 from .core.context_manager import ContextManager
 from .projects.project_manager import project_manager
-from .ai_service import call_ai_model
+from .ai_service import (
+    call_ai_model, call_ai_model_async, stream_ai_model, stream_all_models, merge_model_responses,
+)
 from .views import save_chat_history, load_chat_history, now_kst
 from . import ai_config # ai_config.py 임포트
 from .session_learning import check_and_auto_summarize, load_recent_learning, save_session_learning
+from .search_index import get_index
+from .document_schema import SCHEMA_VERSION, SCHEMA_VERSION_FIELD, content_updates, normalize_updates, read_body, read_field
+from .chunk_cache import get_chunk_cache
+from .db_service import FirestoreService
+from .raw_storage import evaluate_chat_value, enqueue_raw_analysis
+from .chat_sessions import resolve_session, list_sessions
+from .rolling_summary import prepare_history
+from . import clients
 
 # 한국 시간대
 KST = timezone(timedelta(hours=9))
 
+# 문서 검색 페이지 크기
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 200
+
 
 def remove_markdown_formatting(text):
     """
@@ -49,10 +66,57 @@ def remove_markdown_formatting(text):
     return text
 
 
+def _load_project_db_context(project_id, user_message, db_focus, retrieval):
+    """
+    프로젝트 DB 컨텍스트 로드 (chat_v2, chat_v2_stream 공용)
+    
+    Returns:
+        str: DB 컨텍스트 (DB Focus 0%이거나 프로젝트가 없으면 빈 문자열)
+    """
+    project_db_context = ""
+    project = project_manager.get_project(project_id)
+    if project:
+        # "정밀분석해"가 아닐 때만 프로젝트 기본 프롬프트 사용 고려
+        # (하지만 현재는 general / hinobalance로 양분)
+        if "정밀분석해" not in user_message:
+            # 만약 프로젝트별 범용 프롬프트가 있다면 여기서 설정 가능
+            # pass 
+            print(f"[JNext v2] Project loaded: {project.display_name}")
+        
+        # DB Focus가 0%보다 클 때만 DB Context 가져오기
+        if db_focus > 0 and retrieval in ('ranked', 'semantic'):
+            # BM25 (또는 임베딩 하이브리드) 랭킹: 관련도 높은 구절만 글자 예산 내에서
+            project_db_context = project.get_ranked_db_context(
+                user_message,
+                strategy='hybrid' if retrieval == 'semantic' else 'bm25',
+                **ai_config.RANKED_CONTEXT_SETTINGS
+            )
+            
+            print(f"[JNext v2] DB context length: {len(project_db_context)} chars ({retrieval})")
+        elif db_focus > 0:
+            # 사용자 메시지에서 키워드 추출 (특수문자 제거)
+            # "하이노워밍팔돌리기가 뭐지" → "하이노워밍팔돌리기 뭐지"
+            keyword = re.sub(r'[?!.,\s]+', ' ', user_message).strip()
+            # 너무 길면 첫 50자만
+            if len(keyword) > 50:
+                keyword = keyword[:50]
+            
+            project_db_context = project.get_db_context(limit=100, keyword=keyword)
+            
+            print(f"[JNext v2] DB context length: {len(project_db_context)} chars")
+            # print(f"[JNext v2] DB context preview: {project_db_context[:200]}...") # 너무 길어서 주석 처리
+        else:
+            print(f"[JNext v2] Project loaded: {project.display_name} (DB Context: 0%)")
+    else:
+        print(f"[JNext v2] Warning: Project '{project_id}' not found")
+    
+    return project_db_context
+
+
 @csrf_exempt
-def chat_v2(request):
+async def chat_v2(request):
     """
-    JNext v2 채팅 API
+    JNext v2 채팅 API (비동기: 모델 응답 대기 중 워커를 점유하지 않음)
     동적 맥락 관리 + 슬라이더 2개 (Temperature + DB 사용률)
     """
     if request.method != 'POST':
@@ -71,6 +135,8 @@ def chat_v2(request):
         # 기본값은 v2 설정 따름
         temperature = data.get('temperature', ai_config.TEMPERATURE_SETTINGS.get('v2', 0.5))
         db_focus = data.get('db_focus', 0) # 0 또는 100
+        # DB 검색 방식: 'ranked' (BM25 상위 구절, 기본) | 'semantic' (임베딩 + BM25) | 'keyword' (기존 키워드 OR 검색)
+        retrieval = data.get('retrieval', 'ranked')
 
         if not user_message:
             return JsonResponse({'error': 'Message is required'}, status=400)
@@ -81,22 +147,30 @@ def chat_v2(request):
         print(f"[JNext v2] DB Focus: {db_focus}%")
         print(f"[JNext v2] Model: {model}")
         
+        # 0. 대화 세션 (지정 없으면 최근 세션 이어가기, new_session이면 새로 시작)
+        session_id = await asyncio.to_thread(
+            resolve_session, project_id, data.get('session_id'), bool(data.get('new_session', False))
+        )
+        
         # 1. 사용자 메시지 즉시 저장 (백업)
-        chat_id = save_chat_history(
+        chat_id = await asyncio.to_thread(
+            save_chat_history,
             role='user',
             content=user_message,
             mode='v2',
             model=model,
             temperature=temperature,
             db_focus=db_focus,
-            project_context=project_id
+            project_context=project_id,
+            session_id=session_id
         )
         
-        # 2. 대화 기록 로드 (최근 100개)
-        conversation_history = load_chat_history(limit=100)
+        # 2. 대화 기록 로드 (이 세션의 최근 100개)
+        conversation_history = await asyncio.to_thread(
+            load_chat_history, limit=100, project_context=project_id, session_id=session_id
+        )
         
         # 3. 프로젝트 정보 및 시스템 프롬프트 동적 선택
-        project = None
         project_db_context = ""
         system_prompt_to_use = ai_config.GENERAL_SYSTEM_PROMPT
 
@@ -114,13 +188,13 @@ def chat_v2(request):
             
             print("[JNext v2] '정밀분석해' 감지. HINOBALANCE 프롬프트 사용 (최신 학습 반영).")
             # 매 요청마다 최신 학습 내용 반영
-            system_prompt_to_use = ai_config.get_hinobalance_prompt(project_id)
+            system_prompt_to_use = await asyncio.to_thread(ai_config.get_hinobalance_prompt, project_id)
         
         # 특수 명령어 "학습정리" 감지 (수동 요약)
         elif "학습정리" in user_message:
             if project_id and len(conversation_history) > 0:
                 from .session_learning import auto_summarize_learning
-                summary = auto_summarize_learning(conversation_history, model, project_id)
+                summary = await asyncio.to_thread(auto_summarize_learning, conversation_history, model, project_id)
                 
                 return JsonResponse({
                     'status': 'success',
@@ -135,112 +209,93 @@ def chat_v2(request):
                 }, status=400)
         
         if project_id:
-            project = project_manager.get_project(project_id)
-            if project:
-                # "정밀분석해"가 아닐 때만 프로젝트 기본 프롬프트 사용 고려
-                # (하지만 현재는 general / hinobalance로 양분)
-                if "정밀분석해" not in user_message:
-                    # 만약 프로젝트별 범용 프롬프트가 있다면 여기서 설정 가능
-                    # pass 
-                    print(f"[JNext v2] Project loaded: {project.display_name}")
-                
-                # DB Focus가 0%보다 클 때만 DB Context 가져오기
-                if db_focus > 0:
-                    # 사용자 메시지에서 키워드 추출 (특수문자 제거)
-                    # "하이노워밍팔돌리기가 뭐지" → "하이노워밍팔돌리기 뭐지"
-                    keyword = re.sub(r'[?!.,\s]+', ' ', user_message).strip()
-                    # 너무 길면 첫 50자만
-                    if len(keyword) > 50:
-                        keyword = keyword[:50]
-                    
-                    project_db_context = project.get_db_context(limit=100, keyword=keyword)
-                    
-                    print(f"[JNext v2] DB context length: {len(project_db_context)} chars")
-                    # print(f"[JNext v2] DB context preview: {project_db_context[:200]}...") # 너무 길어서 주석 처리
-                else:
-                    print(f"[JNext v2] Project loaded: {project.display_name} (DB Context: 0%)")
-            else:
-                print(f"[JNext v2] Warning: Project '{project_id}' not found")
+            project_db_context = await asyncio.to_thread(
+                _load_project_db_context, project_id, user_message, db_focus, retrieval
+            )
         
-        # 4. AI 호출 (ContextManager 사용 안함, 직접 전달)
-        # ContextManager의 복잡한 가중치 로직 대신, 결정된 프롬프트를 직접 사용
+        # 4. 이전 대화는 롤링 요약 + 최근 대화만 원문, 토큰 예산 안으로 조정 (대화 이력은 네이티브 이력으로 한 번만 전달)
+        conversation_summary, recent_history = await asyncio.to_thread(
+            prepare_history, project_id, session_id, model
+        )
+        context = ContextManager.assemble(
+            model, system_prompt_to_use, user_message, recent_history,
+            project_db_context if db_focus > 0 else "", db_focus, conversation_summary
+        )
         
         print(f"[JNext v2] Using Temperature: {temperature}")
         
-        # 5. AI 호출 (재시도 로직 포함)
+        # 5. AI 호출 (일시 오류 재시도/대체 모델은 ai_service → resilience.py)
         ai_response = None
         error_occurred = None
         
-        for attempt in range(3):
-            try:
-                ai_response = call_ai_model(
-                    model_name=model,
-                    user_message=user_message,
-                    system_prompt=system_prompt_to_use,
-                    db_context=project_db_context if db_focus > 0 else "",
-                    mode='v2',
-                    conversation_history=conversation_history,
-                    temperature=temperature
-                )
-                break
-                
-            except Exception as e:
-                error_occurred = e
-                error_str = str(e)
-                
-                if '503' in error_str and attempt < 2:
-                    import time
-                    wait_time = 2 ** attempt
-                    print(f"[JNext v2] Retry {attempt + 1}/3 after {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue
-                
-                break
+        try:
+            ai_response = await call_ai_model_async(
+                model_name=model,
+                user_message=user_message,
+                system_prompt=context['system_prompt'],
+                db_context=context['db_context'],
+                mode='v2',
+                conversation_history=context['conversation_history'],
+                temperature=temperature
+            )
+        except Exception as e:
+            error_occurred = e
         
         # 6. 응답 처리
         if ai_response:
             ai_answer = ai_response.get('answer', '')
             
             # AI 응답 저장
-            save_chat_history(
+            answer_chat_id = await asyncio.to_thread(
+                save_chat_history,
                 role='assistant',
                 content=ai_answer,
                 mode='v2',
                 model=model,
                 temperature=temperature,
                 db_focus=db_focus,
-                project_context=project_id
+                project_context=project_id,
+                session_id=session_id
             )
             
-            # 자동 학습 요약 체크 (10개마다)
+            # 자동 학습 요약 체크 (10개마다, 작업 큐로 예약만 하고 바로 응답)
             if project_id:
-                check_and_auto_summarize(conversation_history, model, project_id)
+                await asyncio.to_thread(check_and_auto_summarize, conversation_history, model, project_id)
             
-            # Phase 3: 프로젝트 대화이면 가치 평가 및 RAW 저장 (현재는 비활성화)
-            # if project_id:
-            #     ...
+            # Phase 3: 프로젝트 대화이면 가치 평가 후 RAW 분석을 작업 큐에 추가 (응답은 바로 반환)
+            if project_id and settings.RAW_AUTO_ANALYSIS and evaluate_chat_value(user_message, ai_answer):
+                await asyncio.to_thread(
+                    enqueue_raw_analysis, project_id, user_message, ai_answer, answer_chat_id, model
+                )
             
             return JsonResponse({
                 'status': 'success',
                 'response': ai_answer,
                 'metadata': {
                     'project_id': project_id,
+                    'session_id': session_id,
                     'db_focus': db_focus,
                     'temperature': temperature,
                     'model': model,
+                    'answered_by': ai_response.get('_model', model),
+                    'retrieval': retrieval if db_focus > 0 else None,
+                    'db_context_chars': len(context['db_context']),
+                    'token_usage': context['token_usage'],
                     'prompt_type': 'HINOBALANCE' if "정밀분석해" in user_message else 'GENERAL'
                 }
             })
         else:
             error_msg = f"AI 서비스 일시 중단 중입니다. ({str(error_occurred)[:100]})"
-            save_chat_history(
+            await asyncio.to_thread(
+                save_chat_history,
                 role='assistant',
                 content=error_msg,
                 mode='v2',
                 model=model,
                 temperature=temperature,
                 db_focus=db_focus,
-                project_context=project_id
+                project_context=project_id,
+                session_id=session_id
             )
             
             return JsonResponse({
@@ -258,6 +313,194 @@ def chat_v2(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _sse_event(event, payload):
+    """Server-Sent Events 메시지 한 건"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+async def _iterate_in_thread(iterator):
+    """
+    동기 제너레이터를 워커 스레드에서 한 항목씩 꺼내 전달 (이벤트 루프는 막지 않음)
+
+    ASGI는 StreamingHttpResponse의 동기 이터레이터를 끝까지 모은 뒤 보내므로 스트리밍이 안 됨
+    """
+    finished = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, finished)
+        if item is finished:
+            return
+        yield item
+
+
+@csrf_exempt
+async def chat_v2_stream(request):
+    """
+    JNext v2 스트리밍 채팅 API (Server-Sent Events)
+    POST /api/v2/chat/stream/
+    
+    Body: chat_v2와 동일 (message, project, model, temperature, db_focus, retrieval, session_id, new_session)
+    
+    Events:
+        token: {"text": "..."}  생성되는 대로 전달
+        model_result: {"model": "gpt", "result": {...}}  (model='all') 모델별 응답이 도착하는 대로
+        done:  {"answer": "...", "metadata": {...}}  완료 (chat_history 저장 후, 'all'이면 consensus 포함)
+        error: {"message": "..."}
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST method required'}, status=405)
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    
+    user_message = data.get('message', '').strip()
+    project_id = data.get('project_id') or data.get('project')
+    model = data.get('model', 'gemini-pro')
+    temperature = data.get('temperature', ai_config.TEMPERATURE_SETTINGS.get('v2', 0.5))
+    db_focus = data.get('db_focus', 0)
+    retrieval = data.get('retrieval', 'ranked')
+    
+    if not user_message:
+        return JsonResponse({'error': 'Message is required'}, status=400)
+    if "정밀분석해" in user_message and not project_id:
+        return JsonResponse({'error': '정밀분석은 프로젝트를 선택해야 합니다.'}, status=400)
+    
+    print(f"\n[JNext v2 Stream] User: {user_message}")
+    print(f"[JNext v2 Stream] Project: {project_id or '일반 대화'}, Model: {model}, DB Focus: {db_focus}%")
+    
+    def generate():
+        # 0. 대화 세션 (chat_v2와 동일)
+        session_id = resolve_session(project_id, data.get('session_id'), bool(data.get('new_session', False)))
+        history_kwargs = dict(
+            mode='v2',
+            model=model,
+            temperature=temperature,
+            db_focus=db_focus,
+            project_context=project_id,
+            session_id=session_id
+        )
+        
+        # 1. 사용자 메시지 저장 + 대화 기록 로드
+        save_chat_history(role='user', content=user_message, **history_kwargs)
+        conversation_history = load_chat_history(limit=100, project_context=project_id, session_id=session_id)
+        
+        # 2. 학습정리는 스트리밍 없이 한 번에 반환
+        if "학습정리" in user_message:
+            if project_id and len(conversation_history) > 0:
+                from .session_learning import auto_summarize_learning
+                summary = auto_summarize_learning(conversation_history, model, project_id)
+                answer = f"✅ 세션 학습 내용을 저장했습니다.\n\n{summary}"
+                yield _sse_event('token', {'text': answer})
+                yield _sse_event('done', {'answer': answer, 'metadata': {'project_id': project_id, 'session_id': session_id, 'model': model}})
+            else:
+                yield _sse_event('error', {'message': '학습 정리는 프로젝트를 선택하고 대화 후 사용하세요.'})
+            return
+        
+        # 3. 시스템 프롬프트 + DB 컨텍스트 (chat_v2와 동일)
+        system_prompt_to_use = ai_config.GENERAL_SYSTEM_PROMPT
+        if "정밀분석해" in user_message:
+            system_prompt_to_use = ai_config.get_hinobalance_prompt(project_id)
+        
+        project_db_context = ""
+        if project_id:
+            project_db_context = _load_project_db_context(project_id, user_message, db_focus, retrieval)
+        
+        # 롤링 요약 + 최근 대화, 토큰 예산 안으로 조정 (chat_v2와 동일)
+        conversation_summary, recent_history = prepare_history(project_id, session_id, model)
+        context = ContextManager.assemble(
+            model, system_prompt_to_use, user_message, recent_history,
+            project_db_context if db_focus > 0 else "", db_focus, conversation_summary
+        )
+        
+        # 4-1. 멀티 모델: 모델별 결과를 도착 순서대로 전달 후 합의
+        consensus = None
+        if model == 'all':
+            results = {}
+            for model_key, result in stream_all_models(
+                user_message=user_message,
+                system_prompt=context['system_prompt'],
+                db_context=context['db_context'],
+                mode='v2',
+                conversation_history=context['conversation_history'],
+                temperature=temperature
+            ):
+                results[model_key] = result
+                yield _sse_event('model_result', {'model': model_key, 'result': result})
+            try:
+                merged = merge_model_responses(results)
+            except Exception as e:
+                error_msg = f"AI 서비스 일시 중단 중입니다. ({str(e)[:100]})"
+                save_chat_history(role='assistant', content=error_msg, **history_kwargs)
+                yield _sse_event('error', {'message': error_msg})
+                return
+            parts = [merged['answer']]
+            consensus = merged['_consensus']
+            consensus['claims'] = merged['claims']
+            consensus['evidence'] = merged['evidence']
+        else:
+            # 4-2. 단일 모델: 토큰 스트리밍
+            parts = []
+            try:
+                for text in stream_ai_model(
+                    model_name=model,
+                    user_message=user_message,
+                    system_prompt=context['system_prompt'],
+                    db_context=context['db_context'],
+                    mode='v2',
+                    conversation_history=context['conversation_history'],
+                    temperature=temperature
+                ):
+                    parts.append(text)
+                    yield _sse_event('token', {'text': text})
+            except Exception as e:
+                print(f"[JNext v2 Stream] Error: {e}")
+                error_msg = f"AI 서비스 일시 중단 중입니다. ({str(e)[:100]})"
+                # 받은 부분까지 + 오류 안내 저장
+                save_chat_history(role='assistant', content=''.join(parts) + f"\n\n{error_msg}", **history_kwargs)
+                yield _sse_event('error', {'message': error_msg, 'partial': ''.join(parts)})
+                return
+        
+        # 5. 완료: 전체 답변 저장 후 done
+        ai_answer = ''.join(parts)
+        answer_chat_id = save_chat_history(role='assistant', content=ai_answer, **history_kwargs)
+        
+        if project_id:
+            check_and_auto_summarize(conversation_history, model, project_id)
+            if settings.RAW_AUTO_ANALYSIS and evaluate_chat_value(user_message, ai_answer):
+                enqueue_raw_analysis(project_id, user_message, ai_answer, answer_chat_id, model)
+        
+        yield _sse_event('done', {
+            'answer': ai_answer,
+            'metadata': {
+                'project_id': project_id,
+                'session_id': session_id,
+                'db_focus': db_focus,
+                'temperature': temperature,
+                'model': model,
+                'retrieval': retrieval if db_focus > 0 else None,
+                'db_context_chars': len(context['db_context']),
+                'token_usage': context['token_usage'],
+                'prompt_type': 'HINOBALANCE' if "정밀분석해" in user_message else 'GENERAL',
+                'consensus': consensus
+            }
+        })
+    
+    def event_stream():
+        # 준비 단계 (세션, 대화 기록, 프롬프트, DB 컨텍스트) 등 어디서 실패해도 error 이벤트로 종료
+        # (이벤트 없이 끝나면 클라이언트가 반쯤 열린 연결을 계속 기다림)
+        try:
+            yield from generate()
+        except Exception as e:
+            print(f"[JNext v2 Stream] Error: {e}")
+            yield _sse_event('error', {'message': f"AI 서비스 일시 중단 중입니다. ({str(e)[:100]})"})
+    
+    response = StreamingHttpResponse(_iterate_in_thread(event_stream()), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # 프록시 버퍼링 방지
+    return response
+
+
 @csrf_exempt
 def save_to_raw_v2(request):
     """
@@ -292,6 +535,7 @@ def save_to_raw_v2(request):
             project.get_field_name('content'): content,
             project.get_field_name('created_at'): now_kst(),
             project.get_field_name('status'): 'RAW',
+            SCHEMA_VERSION_FIELD: SCHEMA_VERSION,
             'project_id': project_id
         }
         
@@ -331,7 +575,8 @@ def test_context_manager(request):
     
     for focus in [0, 25, 50, 75, 100]:
         context = ContextManager.build_context(
-            focus=focus,
+            temperature=ai_config.TEMPERATURE_SETTINGS.get('v2', 0.5),
+            db_focus=focus,
             project_id='hino',
             user_message='테스트 질문',
             conversation_history=[],
@@ -342,7 +587,8 @@ def test_context_manager(request):
         test_cases.append({
             'focus': focus,
             'weights': context['weights'],
-            'temperature': context['temperature']
+            'temperature': context['temperature'],
+            'token_usage': context['token_usage']
         })
     
     return JsonResponse({
@@ -370,6 +616,61 @@ def list_projects(request):
     })
 
 
+def list_chat_sessions(request):
+    """
+    대화 세션 목록 API (최근 대화 순)
+    GET /api/v2/sessions/?project=hinobalance&limit=20
+    
+    project 생략 시 일반 대화 세션
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'GET method required'}, status=405)
+    
+    project_id = request.GET.get('project') or None
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    
+    try:
+        return JsonResponse({
+            'status': 'success',
+            'project_id': project_id,
+            'sessions': list_sessions(project_id, limit=limit)
+        })
+    except Exception as e:
+        print(f"[JNext v2] Session list error: {e}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def chat_session_messages(request):
+    """
+    세션 메시지 조회 API (세션 이어가기용)
+    GET /api/v2/sessions/messages/?project=hinobalance&session_id=...&limit=100
+    
+    이후 채팅 요청에 같은 session_id를 보내면 이 세션에 이어서 저장/맥락 사용
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'GET method required'}, status=405)
+    
+    project_id = request.GET.get('project') or None
+    session_id = request.GET.get('session_id')
+    if not session_id:
+        return JsonResponse({'error': 'session_id is required'}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', 100)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    
+    messages = load_chat_history(limit=limit, project_context=project_id, session_id=session_id)
+    return JsonResponse({
+        'status': 'success',
+        'project_id': project_id,
+        'session_id': session_id,
+        'messages': messages
+    })
+
+
 @csrf_exempt
 def create_project(request):
     """
@@ -440,10 +741,92 @@ def document_manager_ui(request):
     })
 
 
+def _encode_search_cursor(collection, doc_id, position):
+    """검색 커서 토큰 (마지막으로 반환한 문서 기준)"""
+    payload = json.dumps({'c': collection, 'id': doc_id, 'n': position}, ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_search_cursor(token):
+    """검색 커서 토큰 해석 (잘못된 토큰이면 None)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        return payload['c'], payload['id'], int(payload.get('n', 0))
+    except Exception:
+        return None
+
+
+def _search_fields(data, doc_id):
+    """검색/응답용 필드 추출 (정규 문서는 필드 한 번 조회, 이전 문서는 document_schema 우선순위)"""
+    title = read_field(data, 'title') or data.get('doc_id') or doc_id
+    
+    # 본문 (정제본 우선), 없으면 전체글 → 요약
+    content = read_field(data, 'content') or read_field(data, 'full_text') or read_field(data, '요약')
+    
+    # 원본 내용 (J님 입력)
+    original = read_field(data, 'original')
+    
+    # 키워드가 리스트면 문자열로 변환
+    keywords = data.get('키워드') or ''
+    if isinstance(keywords, list):
+        keywords = ' '.join(keywords)
+    elif not isinstance(keywords, str):
+        keywords = str(keywords)
+    
+    return {
+        'title': title,
+        'content': content,
+        'original': original,
+        # 카테고리와 운동명
+        'category': data.get('카테고리') or data.get('category') or '',
+        'exercise_name': data.get('exercise_name') or data.get('제목') or title or '',
+        'keywords': keywords,
+        'doc_type': data.get('doc_type') or '',  # 이론/실전 구분
+    }
+
+
+def _matches_search(fields, keyword, search_type):
+    """검색 타입에 따라 필터링"""
+    keyword_lower = keyword.lower()
+    title = fields['title'].lower()
+    content = fields['content'].lower()
+    
+    if search_type == 'category':
+        # 카테고리 검색
+        return keyword_lower in fields['category'].lower()
+    if search_type == 'exercise':
+        # 운동명 검색
+        return keyword_lower in fields['exercise_name'].lower()
+    if search_type in ('이론', '실전'):
+        # 이론/실전 문서만 검색 (doc_type="이론" / "실전")
+        return (fields['doc_type'] == search_type and 
+                (keyword_lower in title or keyword_lower in content))
+    if search_type == 'keyword':
+        # 키워드 필드 검색
+        return keyword_lower in fields['keywords'].lower()
+    # 'all': 전체 검색 (제목, 내용, 카테고리, 운동명, 키워드)
+    return (keyword_lower in title or 
+            keyword_lower in content or
+            keyword_lower in fields['category'].lower() or
+            keyword_lower in fields['exercise_name'].lower() or
+            keyword_lower in fields['keywords'].lower())
+
+
 @csrf_exempt
 def search_documents(request):
     """
-    문서 검색 API - 간소화 버전
+    문서 검색 API (커서 페이지네이션)
+    GET /api/v2/documents/search/
+    
+    Query:
+        project, collection (raw|draft|final|전체), keyword, search_type
+        page_size: 페이지당 문서 수 (기본 50, 최대 200)
+        cursor: 이전 응답의 next_cursor (다음 페이지)
+        fields: 'full' (기본) | 'summary' (내용전체/J님원본 제외, 목록용)
+    
+    Response:
+        documents, count, total_estimate (메모리 캐시 기준 전체 일치 수),
+        next_cursor (마지막 페이지면 null), has_more
     """
     if request.method != 'GET':
         return JsonResponse({'error': 'GET method required'}, status=405)
@@ -453,14 +836,21 @@ def search_documents(request):
         collection = request.GET.get('collection', 'raw').strip()
         keyword = request.GET.get('keyword', '').strip()
         search_type = request.GET.get('search_type', 'all').strip()
+        cursor = request.GET.get('cursor', '').strip()
+        projection = request.GET.get('fields', 'full').strip()
+        try:
+            page_size = int(request.GET.get('page_size', SEARCH_PAGE_SIZE))
+        except ValueError:
+            page_size = SEARCH_PAGE_SIZE
+        page_size = max(1, min(page_size, SEARCH_MAX_PAGE_SIZE))
         
-        print(f"[검색] project={project_id}, collection={collection}, keyword={keyword}, search_type={search_type}")
+        print(f"[검색] project={project_id}, collection={collection}, keyword={keyword}, search_type={search_type}, cursor={'Y' if cursor else 'N'}")
         
         if not project_id:
             return JsonResponse({'error': 'project required'}, status=400)
         
-        # Firestore에서 직접 가져오기
-        db = firestore.client()
+        # 프로젝트 역색인에서 가져오기 (Firestore 스캔 없음)
+        index = get_index(project_id)
         
         # '전체' 컬렉션이면 raw, draft, final 모두 검색
         collections_to_search = []
@@ -469,125 +859,102 @@ def search_documents(request):
         else:
             collections_to_search = [collection]
         
-        results = []
-        
-        for coll_name in collections_to_search:
-            try:
-                # projects/hinobalance/raw, draft, final 각각 검색
-                docs_ref = db.collection('projects').document(project_id).collection(coll_name)
-                docs = docs_ref.limit(50).stream()
-                
-                for doc in docs:
-                    data = doc.to_dict()
-                    
-                    # 모든 가능한 필드명 시도 (우선순위 순서)
-                    title = (data.get('제목') or data.get('title') or 
-                            data.get('exercise_name') or data.get('doc_id') or 
-                            doc.id)
-                    
-                    # 내용 필드 우선순위
-                    content = (data.get('final_refined') or  # 최종 정제본
-                              data.get('refined') or         # 정제본
-                              data.get('organized_content') or  # 정리된 내용
-                              data.get('content') or         # 기본 내용
-                              data.get('정리본') or
-                              data.get('ai_응답') or
-                              data.get('내용') or
-                              data.get('전체글') or
-                              data.get('요약') or
-                              '')
-                    
-                    # content가 boolean이면 문자열로 변환
-                    if isinstance(content, bool):
-                        content = ''
-                    elif not isinstance(content, str):
-                        content = str(content)
-                    
-                    # 원본 내용 (J님 입력)
-                    original = (data.get('J님원본') or 
-                               data.get('원본') or
-                               data.get('original_content') or
-                               data.get('원본질문') or
-                               '')
-                    
-                    # original도 boolean 체크
-                    if isinstance(original, bool):
-                        original = ''
-                    elif not isinstance(original, str):
-                        original = str(original)
-                    
-                    # 카테고리와 운동명
-                    category = data.get('카테고리') or data.get('category') or ''
-                    exercise_name = data.get('exercise_name') or data.get('제목') or title or ''
-                    keywords = data.get('키워드') or ''
-                    doc_type = data.get('doc_type') or ''  # 이론/실전 구분
-                    
-                    # 키워드가 리스트면 문자열로 변환
-                    if isinstance(keywords, list):
-                        keywords = ' '.join(keywords)
-                    elif not isinstance(keywords, str):
-                        keywords = str(keywords)
-                    
-                    # 검색 타입에 따라 필터링
+        # 1. 정렬된 후보 (일반: 컬렉션 순서 → 문서 ID 순, 의미 검색: 점수 순)
+        semantic = search_type == 'semantic' and bool(keyword)
+        semantic_scores = {}
+        ordered = []
+        if semantic:
+            from .semantic_index import get_vector_index
+            hits = get_vector_index(project_id).hybrid_rank(
+                keyword, stages=collections_to_search, top_k=None
+            )
+            for score, stage, doc_id, data in hits:
+                semantic_scores[(stage, doc_id)] = score
+                ordered.append((stage, doc_id, data))
+        else:
+            for coll_name in collections_to_search:
+                try:
+                    # 키워드가 있으면 n-gram 색인 후보만 검사
                     if keyword:
-                        match = False
-                        keyword_lower = keyword.lower()
-                        
-                        if search_type == 'category':
-                            # 카테고리 검색
-                            match = keyword_lower in category.lower()
-                        elif search_type == 'exercise':
-                            # 운동명 검색
-                            match = keyword_lower in exercise_name.lower()
-                        elif search_type == '이론':
-                            # 이론 문서만 검색 (doc_type="이론")
-                            match = (doc_type == "이론" and 
-                                    (keyword_lower in title.lower() or keyword_lower in content.lower()))
-                        elif search_type == '실전':
-                            # 실전 문서만 검색 (doc_type="실전")
-                            match = (doc_type == "실전" and 
-                                    (keyword_lower in title.lower() or keyword_lower in content.lower()))
-                        elif search_type == 'keyword':
-                            # 키워드 필드 검색
-                            match = keyword_lower in keywords.lower()
-                        else:  # 'all'
-                            # 전체 검색 (제목, 내용, 카테고리, 운동명, 키워드)
-                            match = (keyword_lower in title.lower() or 
-                                    keyword_lower in content.lower() or
-                                    keyword_lower in category.lower() or
-                                    keyword_lower in exercise_name.lower() or
-                                    keyword_lower in keywords.lower())
-                        
-                        if not match:
-                            continue
-                    
-                    results.append({
-                        'id': doc.id,
-                        'collection': coll_name,  # 실제 컬렉션 이름
-                        '제목': title,
-                        '내용': content[:200] + '...' if len(content) > 200 else content,
-                        '내용전체': content,
-                        'J님원본': original,
-                        '생성일': str(data.get('생성일') or data.get('작성일시') or data.get('created_at') or data.get('timestamp') or ''),
-                        'ai모델': data.get('ai모델') or data.get('모델') or data.get('model') or '',
-                        '품질점수': data.get('품질점수', 0),
-                        '검증필요': data.get('검증필요', False),
-                        'category': data.get('카테고리') or data.get('category') or '',
-                        'exercise_name': data.get('exercise_name') or '',
-                        '요약': data.get('요약') or '',
-                        '키워드': data.get('키워드') or ''
-                    })
-                    
-            except Exception as e:
-                print(f"[검색] {coll_name} 컬렉션 오류: {e}")
+                        docs = index.candidates(keyword, stages=[coll_name])
+                    else:
+                        docs = index.documents(stages=[coll_name])
+                    ordered.extend(sorted(docs, key=lambda item: item[1]))
+                except Exception as e:
+                    print(f"[검색] {coll_name} 컬렉션 오류: {e}")
+                    continue
+        
+        # 2. 검색 조건 필터 (메모리 캐시 위에서 전체 일치 수 계산)
+        matched = []
+        for coll_name, doc_id, data in ordered:
+            fields = _search_fields(data, doc_id)
+            if keyword and not semantic and not _matches_search(fields, keyword, search_type):
                 continue
+            matched.append((coll_name, doc_id, data, fields))
+        
+        # 3. 커서 다음 위치부터 한 페이지
+        start = 0
+        decoded = _decode_search_cursor(cursor) if cursor else None
+        if decoded:
+            cursor_col, cursor_id, cursor_pos = decoded
+            if semantic:
+                # 점수 순서: 같은 문서 다음 (사라졌으면 이전 위치)
+                start = next(
+                    (i + 1 for i, item in enumerate(matched) if item[:2] == (cursor_col, cursor_id)),
+                    cursor_pos
+                )
+            else:
+                # (컬렉션, 문서 ID) 순서: 커서 문서가 삭제되어도 이어서 조회
+                order = {name: i for i, name in enumerate(collections_to_search)}
+                cursor_key = (order.get(cursor_col, -1), cursor_id)
+                start = next(
+                    (i for i, item in enumerate(matched) if (order[item[0]], item[1]) > cursor_key),
+                    len(matched)
+                )
+        page = matched[start:start + page_size]
         
-        print(f"[검색] 완료: {len(results)}개")
+        results = []
+        for coll_name, doc_id, data, fields in page:
+            content = fields['content']
+            result = {
+                'id': doc_id,
+                'collection': coll_name,  # 실제 컬렉션 이름
+                '제목': fields['title'],
+                '내용': content[:200] + '...' if len(content) > 200 else content,
+                '내용전체': content,
+                'J님원본': fields['original'],
+                '생성일': str(data.get('생성일') or data.get('작성일시') or data.get('created_at') or data.get('timestamp') or ''),
+                'ai모델': data.get('ai모델') or data.get('모델') or data.get('model') or '',
+                '품질점수': data.get('품질점수', 0),
+                '검증필요': data.get('검증필요', False),
+                'category': data.get('카테고리') or data.get('category') or '',
+                'exercise_name': data.get('exercise_name') or '',
+                '요약': data.get('요약') or '',
+                '키워드': data.get('키워드') or ''
+            }
+            if projection == 'summary':
+                # 목록용: 전체 본문 제외 (상세는 문서 열 때 full로 조회)
+                del result['내용전체']
+                del result['J님원본']
+            if semantic:
+                result['score'] = round(semantic_scores[(coll_name, doc_id)], 4)
+            results.append(result)
+        
+        has_more = start + len(page) < len(matched)
+        next_cursor = None
+        if has_more and page:
+            last_col, last_id = page[-1][0], page[-1][1]
+            next_cursor = _encode_search_cursor(last_col, last_id, start + len(page))
+        
+        print(f"[검색] 완료: {len(results)}개 / 전체 {len(matched)}개")
         
         return JsonResponse({
             'status': 'success',
             'documents': results,
-            'count': len(results)
+            'count': len(results),
+            'total_estimate': len(matched),
+            'next_cursor': next_cursor,
+            'has_more': has_more
         })
         
     except Exception as e:
@@ -648,10 +1015,15 @@ def update_document(request):
         db = firestore.client()
         doc_ref = db.collection('projects').document(project_id).collection(collection).document(doc_id)
         
+        # 본문은 정규 필드 하나에만 (여러 이름으로 보내도 한 번 저장)
+        project = project_manager.get_project(project_id)
+        cleaned_updates = normalize_updates(cleaned_updates, project.field_mapping if project else None)
+        
         # 수정일시 추가
         cleaned_updates['수정일시'] = now_kst()
         
-        doc_ref.update(cleaned_updates)
+        write_result = doc_ref.update(cleaned_updates)
+        get_index(project_id).merge(collection, doc_id, cleaned_updates, write_result.update_time)
         
         print(f"[문서 수정] projects/{project_id}/{collection}/{doc_id}")
         
@@ -667,7 +1039,7 @@ def update_document(request):
 
 
 @csrf_exempt
-def regenerate_document(request):
+async def regenerate_document(request):
     """
     문서 재생성 API
     POST /api/v2/documents/regenerate/
@@ -691,28 +1063,18 @@ def regenerate_document(request):
         if not all([project_id, collection, doc_id]):
             return JsonResponse({'error': 'project, collection, doc_id required'}, status=400)
         
-        # 원본 문서 가져오기
-        db = firestore.client()
-        doc_ref = db.collection('projects').document(project_id).collection(collection).document(doc_id)
-        doc = doc_ref.get()
+        # 원본 문서 가져오기 (메모리 캐시)
+        doc_data = await asyncio.to_thread(FirestoreService.get_project_document, project_id, collection, doc_id)
         
-        if not doc.exists:
+        if doc_data is None:
             return JsonResponse({'error': 'Document not found'}, status=404)
         
-        doc_data = doc.to_dict()
-        
         # 재생성 소스 우선순위: J님원본 > 내용 > 정리본
         user_original = (doc_data.get('J님원본') or 
                         doc_data.get('원본') or 
                         doc_data.get('original_content'))
         
-        current_content = (doc_data.get('final_refined') or
-                          doc_data.get('refined') or
-                          doc_data.get('organized_content') or
-                          doc_data.get('content') or
-                          doc_data.get('정리본') or
-                          doc_data.get('ai_응답') or
-                          doc_data.get('내용'))
+        current_content = read_field(doc_data, 'content')
         
         # 둘 중 하나라도 있으면 재생성 가능
         source_text = user_original or current_content
@@ -726,11 +1088,11 @@ def regenerate_document(request):
         
         # RAW → DRAFT 정리 시: DB 100% + gemini-pro 사용
         if collection == 'raw':
-            db_context = project.get_db_context(limit=100) if project else ""  # DB 100%
+            db_context = await asyncio.to_thread(project.get_db_context, limit=100) if project else ""  # DB 100%
             model_to_use = 'gemini-pro'  # Pro 모델 고정
             print(f"[RAW→DRAFT 정리 모드] DB 100%, gemini-pro 사용")
         else:
-            db_context = project.get_db_context(limit=30) if project else ""  # 일반 재생성은 30개
+            db_context = await asyncio.to_thread(project.get_db_context, limit=30) if project else ""  # 일반 재생성은 30개
             model_to_use = 'gemini-pro'
         
         # AI로 재생성 (프로젝트 맥락 활용)
@@ -746,14 +1108,16 @@ def regenerate_document(request):
 - 숫자 목록은 1. 2. 3. 형식만 사용
 - 강조는 「」 또는 '' 사용"""
         
-        ai_response = call_ai_model(
+        ai_response = await call_ai_model_async(
             model_name=model_to_use,  # RAW→DRAFT일 때 gemini-pro 사용
             user_message=prompt,
             system_prompt=system_prompt + "\n\n절대 규칙: 마크다운 문법(**, ##, -, ` 등) 사용 금지. 평문으로만 작성.",
             db_context=db_context,  # 프로젝트 전체 DB 맥락 제공
             mode='v2',
             conversation_history=[],
-            temperature=0.85
+            temperature=0.85,
+            # 재생성은 매번 새 결과가 기본, 스크립트 재실행 등에서만 "cache": true로 재사용
+            cache=bool(data.get('cache', False))
         )
         
         new_content = ai_response.get('answer', '')
@@ -765,10 +1129,7 @@ def regenerate_document(request):
         print(f"[문서 재생성 미리보기] projects/{project_id}/{collection}/{doc_id}")
         
         # 제목 추출
-        title = (doc_data.get('제목') or
-                doc_data.get('title') or
-                doc_data.get('exercise_name') or
-                doc.id)
+        title = read_field(doc_data, 'title') or doc_id
         
         return JsonResponse({
             'status': 'success',
@@ -852,7 +1213,8 @@ def apply_regeneration(request):
                 db_context="",
                 mode='v2',
                 conversation_history=[],
-                temperature=0.3  # 낮은 temperature로 정확성 향상
+                temperature=0.3,  # 낮은 temperature로 정확성 향상
+                cache=True  # 같은 내용 + 같은 피드백 재적용 시 API 호출 없음
             )
             
             final_content = ai_response.get('answer', new_content)
@@ -868,24 +1230,20 @@ def apply_regeneration(request):
         db = firestore.client()
         doc_ref = db.collection('projects').document(project_id).collection(collection).document(doc_id)
         
-        updates = {
-            'content': final_content,
-            '내용': final_content,
-            '내용전체': final_content,
-            'final_refined': final_content,
-            'refined': final_content,
-            'organized_content': final_content,
-            '정리본': final_content,
-            'ai_응답': final_content,
+        # 본문은 정규 필드 하나에만 (이전 사본 필드는 삭제)
+        project = project_manager.get_project(project_id)
+        updates = content_updates(final_content, project.field_mapping if project else None)
+        updates.update({
             '수정일시': now_kst(),
             '재생성': True,
             '재생성시각': now_kst()
-        }
+        })
         
         if feedback:
             updates['마지막피드백'] = feedback
         
-        doc_ref.update(updates)
+        write_result = doc_ref.update(updates)
+        get_index(project_id).merge(collection, doc_id, updates, write_result.update_time)
         
         print(f"[재생성 적용] projects/{project_id}/{collection}/{doc_id}")
         
@@ -903,7 +1261,7 @@ def apply_regeneration(request):
 
 
 @csrf_exempt
-def combine_documents(request):
+async def combine_documents(request):
     """
     여러 문서 정리/재구성 API
     POST /api/v2/documents/combine/
@@ -932,25 +1290,23 @@ def combine_documents(request):
         if not project_id or not documents:
             return JsonResponse({'error': 'project, documents required'}, status=400)
         
-        # 문서들 가져오기
-        db = firestore.client()
+        # 문서들 가져오기 (메모리 캐시)
+        db = FirestoreService.get_async_client()
         source_docs = []
         
         for doc_info in documents:
             col = doc_info.get('collection')
             doc_id = doc_info.get('doc_id')
             
-            doc_ref = db.collection('projects').document(project_id).collection(col).document(doc_id)
-            doc = doc_ref.get()
+            doc_data = await asyncio.to_thread(FirestoreService.get_project_document, project_id, col, doc_id)
             
-            if doc.exists:
-                doc_data = doc.to_dict()
+            if doc_data is not None:
                 source_docs.append({
                     'collection': col,
                     'doc_id': doc_id,
-                    '제목': doc_data.get('제목', ''),
-                    '내용': doc_data.get('내용', ''),
-                    'J님원본': doc_data.get('J님원본', '')
+                    '제목': read_field(doc_data, 'title'),
+                    '내용': read_field(doc_data, 'content'),
+                    'J님원본': read_field(doc_data, 'original')
                 })
         
         if not source_docs:
@@ -971,7 +1327,7 @@ def combine_documents(request):
         project = project_manager.get_project(project_id)
         system_prompt = project.get_system_prompt() if project else ""
         
-        ai_response = call_ai_model(
+        ai_response = await call_ai_model_async(
             model_name='gemini-pro',
             user_message=prompt,
             system_prompt=system_prompt,
@@ -991,8 +1347,9 @@ def combine_documents(request):
             '원본문서': [f"{d['collection']}/{d['doc_id']}" for d in source_docs]
         }
         
-        new_ref = db.collection('projects').document(project_id).collection(target).add(new_doc)
+        new_ref = await db.collection('projects').document(project_id).collection(target).add(new_doc)
         new_doc_id = new_ref[1].id
+        get_index(project_id).upsert(target, new_doc_id, new_doc, new_ref[0])
         
         print(f"[문서 정리] {len(source_docs)}개 → projects/{project_id}/{target}/{new_doc_id}")
         
@@ -1010,7 +1367,7 @@ def combine_documents(request):
 
 
 @csrf_exempt
-def custom_organize_documents(request):
+async def custom_organize_documents(request):
     """
     자유 명령어로 문서 정리 API (신규)
     POST /api/v2/documents/custom-organize/
@@ -1041,25 +1398,23 @@ def custom_organize_documents(request):
         if not project_id or not documents or not instruction:
             return JsonResponse({'error': 'project, documents, instruction required'}, status=400)
         
-        # 문서들 가져오기
-        db = firestore.client()
+        # 문서들 가져오기 (메모리 캐시)
+        db = FirestoreService.get_async_client()
         source_docs = []
         
         for doc_info in documents:
             col = doc_info.get('collection')
             doc_id = doc_info.get('doc_id')
             
-            doc_ref = db.collection('projects').document(project_id).collection(col).document(doc_id)
-            doc = doc_ref.get()
+            doc_data = await asyncio.to_thread(FirestoreService.get_project_document, project_id, col, doc_id)
             
-            if doc.exists:
-                doc_data = doc.to_dict()
+            if doc_data is not None:
                 source_docs.append({
                     'collection': col,
                     'doc_id': doc_id,
-                    '제목': doc_data.get('제목', ''),
-                    '내용': doc_data.get('전체글', doc_data.get('내용', '')),
-                    'J님원본': doc_data.get('J님원본', '')
+                    '제목': read_field(doc_data, 'title'),
+                    '내용': read_body(doc_data),
+                    'J님원본': read_field(doc_data, 'original')
                 })
         
         if not source_docs:
@@ -1084,7 +1439,7 @@ def custom_organize_documents(request):
         project = project_manager.get_project(project_id)
         system_prompt = project.get_system_prompt() if project else ""
         
-        ai_response = call_ai_model(
+        ai_response = await call_ai_model_async(
             model_name='gemini-pro',
             user_message=prompt,
             system_prompt=system_prompt,
@@ -1105,8 +1460,9 @@ def custom_organize_documents(request):
             '원본문서': [f"{d['collection']}/{d['doc_id']}" for d in source_docs]
         }
         
-        new_ref = db.collection('projects').document(project_id).collection(target).add(new_doc)
+        new_ref = await db.collection('projects').document(project_id).collection(target).add(new_doc)
         new_doc_id = new_ref[1].id
+        get_index(project_id).upsert(target, new_doc_id, new_doc, new_ref[0])
         
         print(f"[자유 명령어 정리] {len(source_docs)}개, 명령: '{instruction}' → projects/{project_id}/{target}/{new_doc_id}")
         
@@ -1163,6 +1519,8 @@ def delete_documents(request):
                 
                 if doc.exists:
                     doc_ref.delete()
+                    get_index(project_id).remove(col, doc_id)
+                    get_chunk_cache().invalidate(project_id, col, doc_id)
                     deleted_count += 1
                     print(f"[문서 삭제 성공] projects/{project_id}/{col}/{doc_id}")
                 else:
@@ -1218,57 +1576,67 @@ def move_to_final(request):
             return JsonResponse({'error': '이미 FINAL 컬렉션에 있는 문서입니다.'}, status=400)
         
         db = firestore.client()
-        
-        # 1. 원본 문서 가져오기
         source_ref = db.collection('projects').document(project_id).collection(source_col).document(doc_id)
-        source_doc = source_ref.get()
-        
-        if not source_doc.exists:
-            return JsonResponse({'error': '원본 문서를 찾을 수 없습니다.'}, status=404)
-        
-        doc_data = source_doc.to_dict()
-        
-        # 2. FINAL 스키마 필드 추가 (없으면)
-        if '밈스토리' not in doc_data:
-            doc_data['밈스토리'] = {
-                '훅_0_3초': '',
-                '전개_3_10초': '',
-                '반전_10_15초': '',
-                '클로징_15_20초': ''
-            }
-        
-        if '밈이미지' not in doc_data:
-            doc_data['밈이미지'] = {
-                '프레임1_0초': '',
-                '프레임2_3초': '',
-                '프레임3_10초': '',
-                '프레임4_15초': ''
-            }
-        
-        if '밈자막' not in doc_data:
-            doc_data['밈자막'] = {
-                '상단': '',
-                '중단': '',
-                '하단': ''
-            }
-        
-        if '숏스크립트' not in doc_data:
-            doc_data['숏스크립트'] = ''
+        final_ref = db.collection('projects').document(project_id).collection('final').document(doc_id)
         
-        if '전자책' not in doc_data:
-            doc_data['전자책'] = {
-                '장': '',
-                '절': '',
-                '순서': 0,
-                '타입': '동작'
-            }
+        # 원본 조회 → FINAL 복사 → 원본 삭제를 한 트랜잭션으로
+        # (메모리 캐시는 리스너가 꺼져 있으면 TTL만큼 오래될 수 있어 원본은 직접 조회)
+        @firestore.transactional
+        def move(transaction):
+            # 1. 원본 문서 가져오기
+            source_doc = source_ref.get(transaction=transaction)
+            if not source_doc.exists:
+                return None
+            doc_data = source_doc.to_dict()
+            
+            # 2. FINAL 스키마 필드 추가 (없으면)
+            if '밈스토리' not in doc_data:
+                doc_data['밈스토리'] = {
+                    '훅_0_3초': '',
+                    '전개_3_10초': '',
+                    '반전_10_15초': '',
+                    '클로징_15_20초': ''
+                }
+            
+            if '밈이미지' not in doc_data:
+                doc_data['밈이미지'] = {
+                    '프레임1_0초': '',
+                    '프레임2_3초': '',
+                    '프레임3_10초': '',
+                    '프레임4_15초': ''
+                }
+            
+            if '밈자막' not in doc_data:
+                doc_data['밈자막'] = {
+                    '상단': '',
+                    '중단': '',
+                    '하단': ''
+                }
+            
+            if '숏스크립트' not in doc_data:
+                doc_data['숏스크립트'] = ''
+            
+            if '전자책' not in doc_data:
+                doc_data['전자책'] = {
+                    '장': '',
+                    '절': '',
+                    '순서': 0,
+                    '타입': '동작'
+                }
+            
+            # 3. FINAL 컬렉션에 복사, 4. 원본 삭제
+            transaction.set(final_ref, doc_data)
+            transaction.delete(source_ref)
+            return doc_data
         
-        # 3. FINAL 컬렉션에 복사
-        final_ref = db.collection('projects').document(project_id).collection('final').document(doc_id)
-        final_ref.set(doc_data)
+        doc_data = move(db.transaction())
+        if doc_data is None:
+            return JsonResponse({'error': '원본 문서를 찾을 수 없습니다.'}, status=404)
         
-        # 4. 원본 삭제
-        source_ref.delete()
+        index = get_index(project_id)
+        index.remove(source_col, doc_id)
+        get_chunk_cache().invalidate(project_id, source_col, doc_id)
+        index.upsert('final', doc_id, doc_data)
         
         print(f"[FINAL 이동 성공] projects/{project_id}/{source_col}/{doc_id} → final/{doc_id}")
         
@@ -1303,7 +1671,6 @@ def generate_image(request):
         }
     """
     try:
-        import os
         import base64
         from PIL import Image
         from io import BytesIO
@@ -1344,14 +1711,12 @@ def generate_image(request):
             print(f"[캐릭터 스타일] 캐시 사용: {character_style_prompt[:50]}...")
         else:
             try:
-                from django.conf import settings
-                from google import genai
                 from pathlib import Path
                 
-                # Gemini API 키
-                gemini_key = getattr(settings, 'GEMINI_API_KEY', None) or os.environ.get('GEMINI_API_KEY')
+                # Gemini 클라이언트 (공유 레지스트리)
+                client = clients.get_gemini_client(getattr(settings, 'GEMINI_API_KEY', None))
                 
-                if gemini_key:
+                if client:
                     # meme_images 폴더 경로
                     meme_folder = Path(__file__).parent.parent.parent / 'meme_images'
                     
@@ -1368,8 +1733,6 @@ def generate_image(request):
                         print(f"[캐릭터 스타일 분석 - 최초 1회] {j_image.name}")
                         
                         # Gemini Vision으로 스타일 분석
-                        client = genai.Client(api_key=gemini_key)
-                        
                         with open(j_image, 'rb') as f:
                             image_data = f.read()
                         
@@ -1397,21 +1760,12 @@ def generate_image(request):
         
         # 2단계: DALL-E 3 API 호출 (GPT = 진)
         try:
-            import openai
-            from django.conf import settings
-            import requests
-            
-            # OpenAI API 키 가져오기
-            api_key = getattr(settings, 'OPENAI_API_KEY', None) or os.environ.get('OPENAI_API_KEY')
+            # OpenAI 클라이언트 (공유 레지스트리, 연결 재사용)
+            openai_client = clients.get_openai_client(getattr(settings, 'OPENAI_API_KEY', None))
             
-            if not api_key:
+            if not openai_client:
                 raise Exception("OPENAI_API_KEY not found in settings or environment")
             
-            print(f"[DALL-E] API 키 확인: {api_key[:20]}...")
-            
-            # OpenAI 클라이언트 초기화
-            openai.api_key = api_key
-            
             # DALL-E 3 크기 매핑
             dalle_size = '1024x1024'  # DALL-E 3는 정사각형만 지원
             if size == '1024x768':
@@ -1422,7 +1776,7 @@ def generate_image(request):
             print(f"[DALL-E] 크기 변환: {size} → {dalle_size}")
             
             # DALL-E 3 이미지 생성
-            response = openai.images.generate(
+            response = openai_client.images.generate(
                 model="dall-e-3",
                 prompt=enhanced_prompt,
                 size=dalle_size,
@@ -1434,10 +1788,8 @@ def generate_image(request):
             image_url_temp = response.data[0].url
             print(f"[DALL-E] 임시 URL: {image_url_temp[:50]}...")
             
-            # 이미지 다운로드
-            img_response = requests.get(image_url_temp, timeout=30)
-            img_response.raise_for_status()
-            image_data = img_response.content
+            # 이미지 다운로드 (공유 HTTP 세션)
+            image_data = clients.download(image_url_temp, timeout=30)
             
             print(f"[DALL-E 생성 성공] 크기: {len(image_data)} bytes")
                 
@@ -1458,16 +1810,10 @@ def generate_image(request):
         
         # Firebase Storage 업로드
         try:
-            from google.cloud import storage
             import uuid
             
-            # Storage 클라이언트 초기화 (서비스 계정 사용)
-            service_account_path = os.path.join(os.path.dirname(__file__), '../../jnext-service-account.json')
-            storage_client = storage.Client.from_service_account_json(service_account_path)
-            
-            # 버킷 이름 (J님이 개설한 Firebase Storage)
-            bucket_name = 'jnext-e3dd9.firebasestorage.app'
-            bucket = storage_client.bucket(bucket_name)
+            # 버킷 (J님이 개설한 Firebase Storage, 서비스 계정 클라이언트 재사용)
+            bucket = clients.get_storage_bucket()
             
             # 파일명 생성 (UUID + 타임스탬프)
             timestamp = datetime.now(KST).strftime('%Y%m%d_%H%M%S')
@@ -1511,7 +1857,8 @@ def generate_image(request):
                 'size': size,
                 'created_at': datetime.now(KST).isoformat()
             })
-            doc_ref.update({'이미지목록': images})
+            write_result = doc_ref.update({'이미지목록': images})
+            get_index(project_id).merge(collection, doc_id, {'이미지목록': images}, write_result.update_time)
         
         return JsonResponse({
             'status': 'success',
@@ -4,6 +4,11 @@
 2. 품질 분석 및 업그레이드
 3. 같은 카테고리/운동 통합
 4. draft 컬렉션으로 이동
+
+작업 단위(통합 1건 / 문서 1건)를 워커 풀로 동시 처리 (api/batch_engine.py)
+- 완료한 작업은 체크포인트(cache/checkpoints/auto_upgrade.json)에 입력 해시와 함께 기록
+- 재실행 시 원본이 바뀐 작업과 실패한 작업만 처리 (UPGRADE_FORCE=True면 전체)
+- draft 저장은 WriteBatch로 모아 커밋, 커밋된 작업만 완료 처리
 """
 import firebase_admin
 from firebase_admin import credentials, firestore
@@ -13,6 +18,10 @@ from datetime import datetime
 import google.generativeai as genai
 import os
 
+from api.batch_engine import BatchStats, BatchWriter, Checkpoint, RateLimiter, content_hash, run_parallel
+from api.clients import get_legacy_gemini_model
+from api.response_cache import get_response_cache
+
 # Firebase 초기화
 if not firebase_admin._apps:
     cred = credentials.Certificate('jnext-service-account.json')
@@ -21,8 +30,30 @@ if not firebase_admin._apps:
 db = firestore.client()
 
 # Gemini 초기화
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.0-flash-exp')
+MODEL_NAME = 'gemini-2.0-flash-exp'
+model = get_legacy_gemini_model(MODEL_NAME)
+
+# 배치 설정 (환경 변수로 조정)
+WORKERS = int(os.getenv('UPGRADE_WORKERS', '4'))               # 동시 AI 호출 수
+REQUESTS_PER_MINUTE = int(os.getenv('UPGRADE_RPM', '30'))      # Gemini 분당 요청 한도
+WRITE_BATCH_SIZE = 50                                          # draft 저장 WriteBatch 크기
+FORCE = os.getenv('UPGRADE_FORCE', 'False') == 'True'          # 체크포인트 무시하고 전체 처리
+
+# 원본 문서에서 업그레이드 결과에 영향을 주는 필드 (입력 해시)
+SOURCE_FIELDS = ['제목', '내용', '전체글', 'content', 'title', 'category', '카테고리', 'exercise_name']
+
+def generate_upgrade(prompt):
+    """문서 업그레이드 생성 (재실행 시 같은 프롬프트는 캐시 응답 사용)"""
+    return get_response_cache().cached(
+        {'model': MODEL_NAME, 'prompt': prompt, 'temperature': 0.3, 'max_output_tokens': 8000},
+        lambda: model.generate_content(
+            prompt,
+            generation_config=genai.GenerationConfig(
+                temperature=0.3,
+                max_output_tokens=8000
+            )
+        ).text
+    )
 
 def clean_ai_mentions(text):
     """AI 언급 변환"""
@@ -75,13 +106,8 @@ def group_documents(documents):
     
     return groups
 
-def analyze_and_upgrade(docs, category):
-    """문서 분석 및 업그레이드"""
-    print(f"\n{'='*70}")
-    print(f"📝 {category} 카테고리 처리 중 ({len(docs)}개 문서)")
-    print(f"{'='*70}")
-    
-    # 1. AI 언급 변환
+def clean_documents(docs):
+    """AI 언급 변환 (원본 dict 수정)"""
     for doc in docs:
         if '제목' in doc:
             doc['제목'] = clean_ai_mentions(doc['제목'])
@@ -93,21 +119,47 @@ def analyze_and_upgrade(docs, category):
             doc['content'] = clean_ai_mentions(doc['content'])
         if 'title' in doc:
             doc['title'] = clean_ai_mentions(doc['title'])
+
+def source_hash(doc):
+    """원본 문서 입력 해시 (변경 감지용)"""
+    return content_hash(doc['doc_id'], {field: doc.get(field) for field in SOURCE_FIELDS})
+
+def plan_units(groups):
+    """
+    작업 단위 구성: 같은 운동/이론 문서들은 통합 1건, 아니면 문서별 1건
     
-    # 2. 같은 운동/이론이면 통합, 아니면 개별 업그레이드
-    if len(docs) > 1:
+    Returns:
+        list: [(key, unit)]  unit = {'kind': 'merge'|'single', 'category', 'name', 'docs', 'hash'}
+    """
+    units = []
+    for category, docs in sorted(groups.items()):
         # 통합 필요 여부 판단 (exercise_name 또는 제목이 같으면)
         names = set()
         for doc in docs:
             name = doc.get('exercise_name') or doc.get('제목') or doc.get('title') or ''
             names.add(name.strip())
         
-        if len(names) == 1:  # 모두 같은 운동/이론
-            return merge_documents(docs, category, list(names)[0])
-        else:  # 다른 문서들
-            return upgrade_documents_separately(docs, category)
-    else:  # 1개 문서
-        return upgrade_single_document(docs[0], category)
+        if len(docs) > 1 and len(names) == 1:  # 모두 같은 운동/이론
+            name = names.pop()
+            members = sorted(docs, key=lambda doc: doc['doc_id'])
+            units.append((f"merge:{category}:{name}", {
+                'kind': 'merge', 'category': category, 'name': name, 'docs': members,
+                'hash': content_hash(MODEL_NAME, [source_hash(doc) for doc in members]),
+            }))
+        else:  # 문서별 개별 업그레이드
+            for doc in docs:
+                units.append((f"doc:{doc['doc_id']}", {
+                    'kind': 'single', 'category': category, 'docs': [doc],
+                    'hash': content_hash(MODEL_NAME, source_hash(doc)),
+                }))
+    return units
+
+def process_unit(key, unit):
+    """작업 단위 1건 업그레이드 (워커 스레드, 실패 시 예외 → 재시도/실패 기록)"""
+    clean_documents(unit['docs'])
+    if unit['kind'] == 'merge':
+        return merge_documents(unit['docs'], unit['category'], unit['name'])
+    return upgrade_single_document(unit['docs'][0], unit['category'])
 
 def merge_documents(docs, category, name):
     """같은 운동/이론 문서들을 하나로 통합"""
@@ -138,18 +190,8 @@ def merge_documents(docs, category, name):
 
 재작성된 최종 문서:"""
 
-    try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=0.3,
-                max_output_tokens=8000
-            )
-        )
-        upgraded_content = response.text
-    except Exception as e:
-        print(f"❌ AI 업그레이드 실패: {e}")
-        upgraded_content = merged_content
+    # 실패 시 예외 (원본을 draft로 저장하지 않고 다음 실행에서 재처리)
+    upgraded_content = generate_upgrade(prompt)
     
     # draft 컬렉션에 저장
     result_doc = {
@@ -174,16 +216,6 @@ def merge_documents(docs, category, name):
     print(f"✅ 통합 완료: {name}")
     return result_doc
 
-def upgrade_documents_separately(docs, category):
-    """문서들을 개별적으로 업그레이드"""
-    results = []
-    
-    for doc in docs:
-        upgraded = upgrade_single_document(doc, category)
-        results.append(upgraded)
-    
-    return results
-
 def upgrade_single_document(doc, category):
     """단일 문서 업그레이드"""
     name = doc.get('exercise_name') or doc.get('제목') or doc.get('title') or doc.get('doc_id')
@@ -208,18 +240,8 @@ def upgrade_single_document(doc, category):
 
 업그레이드된 문서:"""
 
-    try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                temperature=0.3,
-                max_output_tokens=8000
-            )
-        )
-        upgraded_content = response.text
-    except Exception as e:
-        print(f"❌ AI 업그레이드 실패: {e}")
-        upgraded_content = content
+    # 실패 시 예외 (원본을 draft로 저장하지 않고 다음 실행에서 재처리)
+    upgraded_content = generate_upgrade(prompt)
     
     # draft 컬렉션에 저장할 데이터
     result_doc = {
@@ -243,18 +265,15 @@ def upgrade_single_document(doc, category):
     print(f"✅ 업그레이드 완료: {name}")
     return result_doc
 
-def save_to_draft(doc_data, category):
-    """draft 컬렉션에 저장"""
-    try:
-        doc_id = f"{category}_{doc_data['exercise_name']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        doc_id = doc_id.replace(' ', '_').replace('/', '_')
-        
-        db.collection('projects/hinobalance/draft').document(doc_id).set(doc_data)
-        print(f"💾 Draft 저장: {doc_id}")
-        return True
-    except Exception as e:
-        print(f"❌ Draft 저장 실패: {e}")
-        return False
+def draft_doc_id(doc_data, category):
+    """새 draft 문서 ID (카테고리_이름_시각)"""
+    doc_id = f"{category}_{doc_data['exercise_name']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    return doc_id.replace(' ', '_').replace('/', '_')
+
+def save_to_draft(writer, doc_data, doc_id, key):
+    """draft 컬렉션 저장 (WriteBatch로 모아 커밋, 커밋되면 key 완료 처리)"""
+    writer.set(db.collection('projects/hinobalance/draft').document(doc_id), doc_data, tag=key)
+    print(f"💾 Draft 저장 대기: {doc_id}")
 
 def main():
     print(f"{'='*70}")
@@ -270,44 +289,63 @@ def main():
         print("❌ 문서가 없습니다!")
         return
     
-    # 2. 카테고리별 그룹화
+    # 2. 카테고리별 그룹화 → 작업 단위
     groups = group_documents(raw_docs)
     print(f"📊 {len(groups)}개 카테고리로 그룹화:\n")
     for cat, docs in sorted(groups.items()):
         print(f"   - {cat}: {len(docs)}개")
     
-    # 3. 카테고리별 처리
-    total_success = 0
-    total_fail = 0
+    checkpoint = Checkpoint('auto_upgrade')
+    units = plan_units(groups)
+    stats = BatchStats(total=len(units))
+    todo = []  # [(key, unit)]
+    for key, unit in units:
+        if not FORCE and checkpoint.is_done(key, unit['hash']):
+            stats.skipped += 1
+        else:
+            todo.append((key, unit))
+    print(f"\n🧮 작업 {len(units)}건 중 {len(todo)}건 처리 (변경 없음 {stats.skipped}건 건너뜀)")
     
-    for category, docs in sorted(groups.items()):
-        try:
-            result = analyze_and_upgrade(docs, category)
-            
-            # 결과가 리스트면 여러 개, 딕셔너리면 1개
-            if isinstance(result, list):
-                for doc_data in result:
-                    if save_to_draft(doc_data, category):
-                        total_success += 1
-                    else:
-                        total_fail += 1
-            else:
-                if save_to_draft(result, category):
-                    total_success += 1
-                else:
-                    total_fail += 1
-                    
-        except Exception as e:
-            print(f"❌ {category} 처리 실패: {e}")
-            total_fail += len(docs)
+    # 3. 동시 업그레이드 + draft 모아 쓰기 (커밋된 작업만 체크포인트 완료)
+    hashes = {key: unit['hash'] for key, unit in todo}
+    staged = {}  # 커밋 대기: key → (입력 해시, draft 문서 ID)
+    
+    def on_commit(keys):
+        entries = []
+        for key in keys:
+            unit_hash, doc_id = staged.pop(key)
+            entries.append((key, unit_hash, {'draft_id': doc_id}))
+        checkpoint.mark_done_many(entries)
+        stats.succeeded += len(keys)
+    
+    def on_error(keys, error):
+        for key in keys:
+            staged.pop(key, None)
+            checkpoint.mark_failed(key, f"draft 저장 실패: {error}")
+        stats.failed += len(keys)
+    
+    limiter = RateLimiter(requests_per_minute=REQUESTS_PER_MINUTE)
+    with BatchWriter(db, batch_size=WRITE_BATCH_SIZE, on_commit=on_commit, on_error=on_error) as writer:
+        for key, result, error in run_parallel(todo, process_unit, workers=WORKERS, limiter=limiter):
+            if error is not None:
+                print(f"❌ {key} 처리 실패: {error}")
+                checkpoint.mark_failed(key, error)
+                stats.failed += 1
+                continue
+            # 원본이 바뀐 작업은 이전 draft를 덮어씀 (재실행마다 draft가 늘지 않도록)
+            previous = checkpoint.get(key) or {}
+            doc_id = previous.get('draft_id') or draft_doc_id(result, result['category'])
+            staged[key] = (hashes[key], doc_id)
+            save_to_draft(writer, result, doc_id, key)
     
     # 4. 결과 출력
     print(f"\n{'='*70}")
     print(f"📊 작업 완료!")
-    print(f"   ✅ 성공: {total_success}개")
-    print(f"   ❌ 실패: {total_fail}개")
+    print(stats.report('자동 업그레이드'))
     print(f"   📂 raw 컬렉션: 유지 (삭제 안함)")
-    print(f"   📂 draft 컬렉션: {total_success}개 추가")
+    print(f"   📂 draft 컬렉션: {stats.succeeded}개 저장")
+    if checkpoint.failed:
+        print(f"   ⚠️ 실패 {len(checkpoint.failed)}건은 다음 실행 때 다시 처리")
     print(f"{'='*70}")
 
 if __name__ == '__main__':
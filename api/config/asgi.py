@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# 웹 서버 프로세스에서만 작업 큐 워커 시작 (runserver도 이 모듈을 읽음)
+from api.apps import start_job_queue  # noqa: E402
+
+start_job_queue()
@@ -185,9 +185,11 @@ else:
 # Phase 3 & 4: AI 멀티 모델 설정 (Gemini, GPT, Claude)
 # ============================================================
 
-# Gemini 설정
-from google import genai
+# 클라이언트는 api/clients.py 레지스트리에서 생성 (연결 풀 공유, 스크립트/뷰와 같은 인스턴스)
+# 비동기 클라이언트는 이벤트 루프마다 호출 시점에 생성 (ai_service.py)
+from api import clients
 
+# Gemini 설정
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', None)
 GEMINI_INITIALIZED = False
 GEMINI_CLIENT = None
@@ -195,7 +197,7 @@ GEMINI_CLIENT = None
 if GEMINI_API_KEY:
     try:
         print(f"[JNext] Using Gemini API Key: {GEMINI_API_KEY[:20]}...")
-        GEMINI_CLIENT = genai.Client(api_key=GEMINI_API_KEY)
+        GEMINI_CLIENT = clients.get_gemini_client(GEMINI_API_KEY)
         GEMINI_INITIALIZED = True
         print(f"[JNext] Gemini AI initialized successfully (google.genai)")
     except Exception as e:
@@ -210,8 +212,7 @@ GPT_INITIALIZED = False
 
 if OPENAI_API_KEY:
     try:
-        import openai
-        GPT_CLIENT = openai.OpenAI(api_key=OPENAI_API_KEY)
+        GPT_CLIENT = clients.get_openai_client(OPENAI_API_KEY)
         GPT_INITIALIZED = True
         print(f"[JNext] GPT initialized successfully")
     except Exception as e:
@@ -226,15 +227,7 @@ CLAUDE_INITIALIZED = False
 
 if ANTHROPIC_API_KEY:
     try:
-        import anthropic
-        try:
-            CLAUDE_CLIENT = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-        except TypeError as exc:
-            print(f"[JNext] Claude modern client init failed: {exc}. Trying legacy client...")
-            if hasattr(anthropic, 'Client'):
-                CLAUDE_CLIENT = anthropic.Client(api_key=ANTHROPIC_API_KEY)
-            else:
-                raise
+        CLAUDE_CLIENT = clients.get_anthropic_client(ANTHROPIC_API_KEY)
         CLAUDE_INITIALIZED = True
         print(f"[JNext] Claude initialized successfully")
     except Exception as e:
@@ -284,6 +277,53 @@ COLLECTION_RAW = "raw"      # RAW: 원본/아이디어 (projects/{project_id}/ra
 COLLECTION_DRAFT = "draft"  # DRAFT: 정리 중 (projects/{project_id}/draft)
 COLLECTION_FINAL = "final"  # FINAL: 최종 배포 (projects/{project_id}/final)
 
+# ============================================================
+# 로컬 캐시 (서버 재시작 후에도 유지)
+# ============================================================
+LOCAL_CACHE_DIR = BASE_DIR / 'cache'
+CHUNK_CACHE_PATH = LOCAL_CACHE_DIR / 'chunks.sqlite3'  # 문서 구절 캐시 (chunk_cache.py)
+CHUNK_CACHE_MEMORY_DOCS = 2000  # 구절 캐시 메모리 LRU 문서 수 (초과분은 SQLite에서 읽음)
+EMBEDDING_CACHE_DIR = LOCAL_CACHE_DIR / 'embeddings'  # 문서 벡터 행렬 (semantic_index.py)
+RESPONSE_CACHE_PATH = LOCAL_CACHE_DIR / 'responses.sqlite3'  # AI 응답 캐시 (response_cache.py)
+RESPONSE_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 초과 시 오래 안 쓴 응답부터 삭제
+# 임베딩 모델 (semantic_index.py, 임베딩은 작업 큐에서 백그라운드로)
+# 기본: sentence-transformers CPU 로컬 모델 (pip install sentence-transformers 별도 설치)
+# Gemini 임베딩 모델 이름 (gemini-embedding-001 등) → Gemini API (GEMINI_API_KEY 필요)
+# 빈 값 / 사용 불가 → 해싱 임베딩 (글자 n-gram, 의미 검색 비활성)
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'paraphrase-multilingual-MiniLM-L12-v2')
+
+# Firestore 문서 캐시 (search_index.py 프로젝트 색인)
+FIRESTORE_CACHE_MAX_PROJECTS = 8   # LRU: 메모리에 유지할 최대 프로젝트 수
+FIRESTORE_CACHE_TTL = 30 * 60      # 미사용 프로젝트 해제 / 리스너 없을 때 재구축 주기 (초)
+# on_snapshot 리스너로 다른 프로세스의 쓰기도 실시간 반영 (끄면 TTL 재구축)
+FIRESTORE_CACHE_LISTEN = os.getenv('FIRESTORE_CACHE_LISTEN', 'True') == 'True'
+
+# chat_history 쓰기 버퍼 (chat_buffer.py): 저널 기록 후 개수/주기마다 WriteBatch 커밋
+CHAT_HISTORY_JOURNAL_PATH = LOCAL_CACHE_DIR / 'chat_history.journal'  # 실제 저널은 프로세스별 chat_history.{pid}.journal
+CHAT_HISTORY_FLUSH_SIZE = 20        # 대기 문서가 이 개수면 즉시 커밋
+CHAT_HISTORY_FLUSH_INTERVAL = 2.0   # 커밋 주기 (초)
+
+# 최근 대화 캐시 (history_cache.py): 프로젝트별 링 버퍼, 첫 조회 + 주기적으로 최근분만 Firestore
+HISTORY_CACHE_SIZE = 100          # 프로젝트별 보관 메시지 수
+HISTORY_CACHE_MAX_SCOPES = 32     # 메모리에 유지할 최대 프로젝트 수 (LRU)
+HISTORY_CACHE_REFRESH = 10        # 다른 워커가 저장한 대화 반영 주기 (초, 최근 20개만 다시 읽음)
+
+# 대화 세션 (chat_sessions.py): 마지막 대화 후 이 시간(초)이 지나면 새 세션
+CHAT_SESSION_IDLE_TIMEOUT = 6 * 60 * 60
+# 최근 세션 조회 캐시 시간(초): 다른 워커에서 이어간 세션은 이 시간 안에 반영
+CHAT_SESSION_LOOKUP_TTL = 30
+
+# 백그라운드 작업 큐 (job_queue.py)
+JOB_QUEUE_PATH = LOCAL_CACHE_DIR / 'jobs.sqlite3'
+JOB_QUEUE_WORKERS = int(os.getenv('JOB_QUEUE_WORKERS', '2'))  # 프로세스당 워커 스레드 수
+JOB_MAX_ATTEMPTS = 5  # 초과 시 dead (재시도 중단, 기록 보관)
+JOB_LEASE_SECONDS = 60  # 실행 중 작업 임대 (실행하는 동안 연장, 만료 시 다른 프로세스가 재실행)
+# 웹 서버 시작 시 워커 시작 (config/asgi.py, wsgi.py에서만, manage.py 명령은 제외)
+# 끄면 첫 작업 추가 때 시작
+JOB_QUEUE_AUTOSTART = os.getenv('JOB_QUEUE_AUTOSTART', 'True') == 'True'
+# 프로젝트 대화 자동 RAW 분석/저장 (작업 큐로 처리, 기본 비활성화)
+RAW_AUTO_ANALYSIS = os.getenv('RAW_AUTO_ANALYSIS', 'False') == 'True'
+
 # Firestore 필드 스키마 (한글 필드명)
 DOCUMENT_FIELDS = {
     # 기본 필드
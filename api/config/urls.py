@@ -66,6 +66,7 @@ urlpatterns = [
     # ============================================
     path('chat/v2/', views_v2.chat_v2_ui, name='chat_v2_ui'),
     path('api/v2/chat/', views_v2.chat_v2, name='chat_v2'),
+    path('api/v2/chat/stream/', views_v2.chat_v2_stream, name='chat_v2_stream'),
     path('api/v2/save-raw/', views_v2.save_to_raw_v2, name='save_raw_v2'),
     path('api/v2/test/', views_v2.test_context_manager, name='test_context'),
     
@@ -73,6 +74,10 @@ urlpatterns = [
     path('api/v2/projects/', views_v2.list_projects, name='list_projects'),
     path('api/v2/projects/create/', views_v2.create_project, name='create_project'),
     
+    # 대화 세션 API
+    path('api/v2/sessions/', views_v2.list_chat_sessions, name='list_chat_sessions'),
+    path('api/v2/sessions/messages/', views_v2.chat_session_messages, name='chat_session_messages'),
+    
     # 문서 관리 API
     path('documents/', views_v2.document_manager_ui, name='document_manager_ui'),
     path('api/v2/documents/search/', views_v2.search_documents, name='search_documents'),
@@ -1,13 +1,13 @@
 """
 Gemini 사용 가능한 모델 목록 확인
 """
-import os
 from dotenv import load_dotenv
-from google import genai
+
+from api.clients import get_gemini_client
 
 load_dotenv()
 
-client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
+client = get_gemini_client()
 
 print("=== 사용 가능한 Gemini 모델 목록 ===\n")
 
@@ -0,0 +1,72 @@
+"""
+문서 본문 압축 마이그레이션 (한 번 실행)
+content, 내용, final_refined, refined, organized_content, 정리본, ai_응답 ...에 같은 본문이
+여러 벌 저장된 이전 문서를 정규 스키마(api/document_schema.py)로 변환
+
+- 본문은 정규 필드(content) 하나에만, 같은 내용의 사본 필드는 삭제
+- '스키마버전' 기록 → 이후 읽기는 필드 한 번 조회
+- 내용이 다른 필드는 그대로 둠, 정규 필드와 정제본이 다른 문서는 건너뜀 (수동 확인)
+
+커서 페이지 조회 + BulkWriter + 진행 상태 파일 (api/firestore_migration.py)
+→ 중간에 끊겨도 다시 실행하면 이어서 진행
+
+환경 변수:
+    COMPACT_PROJECTS: 대상 프로젝트 (쉼표 구분, 기본 hinobalance)
+    MIGRATION_DRY_RUN=1: 쓰기 없이 문서 수 / 크기 변화만 보고
+    MIGRATION_RESTART=1: 진행 상태 무시하고 처음부터
+"""
+import firebase_admin
+from firebase_admin import credentials, firestore
+from pathlib import Path
+import os
+import sys
+
+# api 패키지 (정규 스키마, 마이그레이션 실행기) 경로
+api_path = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(api_path))
+
+from api.clients import SERVICE_ACCOUNT_PATH
+from api.document_schema import compact_document
+from api.firestore_migration import Migration, run_migration
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# Firebase 초기화
+if not firebase_admin._apps:
+    cred = credentials.Certificate(str(SERVICE_ACCOUNT_PATH))
+    firebase_admin.initialize_app(cred)
+
+db = firestore.client()
+
+PROJECTS = [p.strip() for p in os.getenv('COMPACT_PROJECTS', 'hinobalance').split(',') if p.strip()]
+STAGES = ['raw', 'draft', 'final']
+DRY_RUN = os.getenv('MIGRATION_DRY_RUN') == '1'
+RESTART = os.getenv('MIGRATION_RESTART') == '1'
+
+
+def main():
+    print("=" * 60)
+    print("문서 본문 압축 (정규 스키마)" + (" - DRY RUN" if DRY_RUN else ""))
+    print("=" * 60)
+
+    bytes_before = bytes_after = 0
+    for project_id in PROJECTS:
+        for stage in STAGES:
+            print(f"\n[projects/{project_id}/{stage}]")
+            migration = Migration(
+                f"compact_{project_id}_{stage}",
+                f"projects/{project_id}/{stage}",
+                lambda doc_id, data: compact_document(data),
+                merge=True
+            )
+            counts = run_migration(migration, db, dry_run=DRY_RUN, restart=RESTART)
+            bytes_before += counts['bytes_before']
+            bytes_after += counts['bytes_after']
+
+    saved = bytes_before - bytes_after
+    print(f"\n전체: {bytes_before / 1024:.0f}KB → {bytes_after / 1024:.0f}KB "
+          f"({saved / 1024:.0f}KB, {saved / max(bytes_before, 1) * 100:.0f}% 감소)")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,13 @@ Gemini AI에게 요청
 import sys
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
 from datetime import datetime
+from pathlib import Path
+
+# api 패키지 (공유 클라이언트) 경로
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from api.clients import get_legacy_gemini_model
 
 # .env 로드
 load_dotenv()
@@ -18,13 +23,12 @@ GOOGLE_API_KEY = os.getenv('GEMINI_API_KEY')
 if not GOOGLE_API_KEY:
     raise ValueError("GEMINI_API_KEY 환경 변수가 설정되지 않았습니다")
 
-genai.configure(api_key=GOOGLE_API_KEY)
 
 def create_summary_version(full_text):
     """요약 버전 생성 (~2,000자)"""
     print("\n📝 요약 버전 생성 중...")
     
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    model = get_legacy_gemini_model('gemini-2.0-flash-exp')
     
     prompt = f"""
 다음은 하이노밸런스 전체 이론 문서 17개를 통합한 내용입니다 (29,710자).
@@ -71,7 +75,7 @@ def create_medium_version(full_text):
     """중간 버전 생성 (~10,000자)"""
     print("\n📝 중간 버전 생성 중...")
     
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    model = get_legacy_gemini_model('gemini-2.0-flash-exp')
     
     prompt = f"""
 다음은 하이노밸런스 전체 이론 문서 17개를 통합한 내용입니다 (29,710자).
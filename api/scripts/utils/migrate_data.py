@@ -1,12 +1,27 @@
 """
 hino_raw_logs → hino_raw 데이터 마이그레이션
 기존 데이터를 새 컬렉션으로 이동하고, 원본은 보관
+
+커서 페이지 조회 + BulkWriter 쓰기 + 진행 상태 파일 (api/firestore_migration.py)
+→ 중간에 끊겨도 다시 실행하면 완료된 단계는 건너뛰고 이어서 진행
+
+환경 변수:
+    MIGRATION_DRY_RUN=1: 쓰기 없이 문서 수 / 크기만 보고
+    MIGRATION_RESTART=1: 진행 상태 무시하고 처음부터
 """
 import firebase_admin
 from firebase_admin import credentials, firestore
+from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
+# api 패키지 (마이그레이션 실행기) 경로
+api_path = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(api_path))
+
+from api.firestore_migration import DELETE, Migration, run_migration
+
 load_dotenv()
 
 # Firebase 초기화
@@ -16,40 +31,36 @@ if not firebase_admin._apps:
 
 db = firestore.client()
 
+DRY_RUN = os.getenv('MIGRATION_DRY_RUN') == '1'
+RESTART = os.getenv('MIGRATION_RESTART') == '1'
+
+
 def migrate_collection():
     """hino_raw_logs → hino_raw 마이그레이션"""
     
     # 1. 기존 hino_raw 초기화 문서 삭제
+    # (단계별 상태 파일: 복사까지 끝난 뒤 다시 실행해도 복사된 문서를 지우지 않음)
     print("=== Step 1: 기존 hino_raw 초기화 문서 삭제 ===")
-    raw_docs = db.collection('hino_raw').stream()
-    for doc in raw_docs:
-        doc.reference.delete()
-        print(f"❌ 삭제: hino_raw/{doc.id}")
+    run_migration(
+        Migration('migrate_data_clear_raw', 'hino_raw', lambda doc_id, data: DELETE),
+        db, dry_run=DRY_RUN, restart=RESTART
+    )
     
-    # 2. hino_raw_logs 데이터 복사
+    # 2. hino_raw_logs 데이터 복사 (동일 ID)
     print("\n=== Step 2: hino_raw_logs → hino_raw 복사 ===")
-    logs_docs = db.collection('hino_raw_logs').stream()
-    migrated_count = 0
-    
-    for doc in logs_docs:
-        data = doc.to_dict()
-        # 새 컬렉션에 동일 ID로 복사
-        db.collection('hino_raw').document(doc.id).set(data)
-        
-        # 요약 정보 출력
-        category = data.get('카테고리', 'N/A')
-        content_preview = data.get('내용', '')[:50]
-        print(f"✅ 복사: {doc.id} | {category} | {content_preview}...")
-        migrated_count += 1
+    counts = run_migration(
+        Migration('migrate_data_copy_logs', 'hino_raw_logs', lambda doc_id, data: data, target='hino_raw'),
+        db, dry_run=DRY_RUN, restart=RESTART
+    )
     
     print(f"\n=== 마이그레이션 완료 ===")
-    print(f"총 {migrated_count}개 문서 이동 완료")
+    print(f"총 {counts['written']}개 문서 이동 완료")
     
-    # 3. 최종 상태 확인
+    # 3. 최종 상태 확인 (집계 쿼리, 문서를 내려받지 않음)
     print("\n=== 최종 컬렉션 상태 ===")
     collections = ['hino_raw_logs', 'hino_raw', 'hino_draft', 'hino_final']
     for col in collections:
-        count = len(list(db.collection(col).stream()))
+        count = db.collection(col).count().get()[0][0].value
         print(f"{col}: {count}개 문서")
 
 if __name__ == '__main__':
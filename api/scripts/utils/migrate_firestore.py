@@ -11,11 +11,26 @@ Firestore 마이그레이션: Flat → Hierarchical (상하위 구조)
         ├─ draft/
         ├─ final/
         └─ theory/
+
+커서 페이지 조회 + BulkWriter 쓰기 + 진행 상태 파일 (api/firestore_migration.py)
+→ 중간에 끊겨도 다시 실행하면 이어서 진행 (cache/migrations/*.json)
+
+환경 변수:
+    MIGRATION_DRY_RUN=1: 쓰기 없이 문서 수 / 크기만 보고
+    MIGRATION_RESTART=1: 진행 상태 무시하고 처음부터
 """
 import firebase_admin
 from firebase_admin import credentials, firestore
 from datetime import datetime, timezone, timedelta
-import time
+from pathlib import Path
+import os
+import sys
+
+# api 패키지 (마이그레이션 실행기) 경로
+api_path = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(api_path))
+
+from api.firestore_migration import DELETE, Migration, run_migration
 
 # Firebase 초기화
 if not firebase_admin._apps:
@@ -25,12 +40,30 @@ if not firebase_admin._apps:
 db = firestore.client()
 KST = timezone(timedelta(hours=9))
 
+DRY_RUN = os.getenv('MIGRATION_DRY_RUN') == '1'
+RESTART = os.getenv('MIGRATION_RESTART') == '1'
+
+# (기존 컬렉션, 새 하위 컬렉션)
+MIGRATIONS = [
+    ('hino_raw', 'raw'),
+    ('hino_draft', 'draft'),
+    ('hino_final', 'final'),
+    ('hino_theory', 'theory')
+]
+
+
+def count_documents(collection_path):
+    """문서 수 (집계 쿼리, 문서를 내려받지 않음)"""
+    result = db.collection(collection_path).count().get()
+    return result[0][0].value
+
+
 def migrate_to_hierarchical():
     """
     Flat 구조를 Hierarchical 구조로 마이그레이션
     """
     print("=" * 80)
-    print("🔄 Firestore 마이그레이션 시작")
+    print("🔄 Firestore 마이그레이션 시작" + (" (DRY RUN)" if DRY_RUN else ""))
     print("=" * 80)
     print()
     
@@ -45,67 +78,44 @@ def migrate_to_hierarchical():
         'status': 'active'
     }
     
-    db.collection('projects').document('hinobalance').set(project_meta)
-    print("✅ projects/hinobalance 문서 생성 완료")
+    if not DRY_RUN:
+        db.collection('projects').document('hinobalance').set(project_meta)
+        print("✅ projects/hinobalance 문서 생성 완료")
     print()
     
-    # 2. 마이그레이션 작업
-    migrations = [
-        ('hino_raw', 'raw'),
-        ('hino_draft', 'draft'),
-        ('hino_final', 'final'),
-        ('hino_theory', 'theory')
-    ]
-    
+    # 2. 마이그레이션 작업 (문서 그대로 복사, 같은 ID)
     total_migrated = 0
     
-    for old_collection, new_subcollection in migrations:
+    for old_collection, new_subcollection in MIGRATIONS:
         print(f"🔄 Step 2: {old_collection} → projects/hinobalance/{new_subcollection}")
         print("-" * 80)
         
-        # 기존 컬렉션 문서 조회
-        docs = db.collection(old_collection).stream()
-        
-        count = 0
-        batch = db.batch()
-        batch_count = 0
-        
-        for doc in docs:
-            # 새 경로에 복사
-            new_ref = db.collection('projects').document('hinobalance').collection(new_subcollection).document(doc.id)
-            batch.set(new_ref, doc.to_dict())
-            
-            count += 1
-            batch_count += 1
-            
-            # Firestore 배치 제한: 500개
-            if batch_count >= 500:
-                batch.commit()
-                print(f"  📦 배치 커밋: {count}개")
-                batch = db.batch()
-                batch_count = 0
-                time.sleep(0.1)  # Rate limit 방지
-        
-        # 남은 배치 커밋
-        if batch_count > 0:
-            batch.commit()
-        
-        print(f"✅ {old_collection}: {count}개 문서 마이그레이션 완료")
+        migration = Migration(
+            f"hierarchical_{old_collection}",
+            old_collection,
+            lambda doc_id, data: data,
+            target=f"projects/hinobalance/{new_subcollection}"
+        )
+        counts = run_migration(migration, db, dry_run=DRY_RUN, restart=RESTART)
+        total_migrated += counts['written']
         print()
-        total_migrated += count
     
     print("=" * 80)
     print(f"🎉 마이그레이션 완료! 총 {total_migrated}개 문서 이동")
     print("=" * 80)
     print()
     
+    if DRY_RUN:
+        return
+    
     # 3. 검증
     print("🔍 Step 3: 마이그레이션 검증")
     print("-" * 80)
     
-    for _, subcollection in migrations:
-        new_count = len(list(db.collection('projects').document('hinobalance').collection(subcollection).stream()))
-        print(f"  projects/hinobalance/{subcollection}: {new_count}개 문서")
+    for old_collection, subcollection in MIGRATIONS:
+        old_count = count_documents(old_collection)
+        new_count = count_documents(f"projects/hinobalance/{subcollection}")
+        print(f"  projects/hinobalance/{subcollection}: {new_count}개 문서 (기존 {old_collection}: {old_count}개)")
     
     print()
     print("⚠️  주의: 기존 컬렉션(hino_*)은 아직 삭제되지 않았습니다.")
@@ -118,41 +128,21 @@ def delete_old_collections():
     기존 flat 컬렉션 삭제 (백업 후 실행)
     """
     print("=" * 80)
-    print("🗑️  기존 컬렉션 삭제 시작")
+    print("🗑️  기존 컬렉션 삭제 시작" + (" (DRY RUN)" if DRY_RUN else ""))
     print("=" * 80)
     print()
     
-    confirm = input("⚠️  정말 삭제하시겠습니까? (yes 입력): ")
-    if confirm != 'yes':
-        print("❌ 취소됨")
-        return
+    if not DRY_RUN:
+        confirm = input("⚠️  정말 삭제하시겠습니까? (yes 입력): ")
+        if confirm != 'yes':
+            print("❌ 취소됨")
+            return
     
-    old_collections = ['hino_raw', 'hino_draft', 'hino_final', 'hino_theory']
-    
-    for collection_name in old_collections:
-        print(f"🗑️  {collection_name} 삭제 중...")
-        
-        docs = db.collection(collection_name).stream()
-        batch = db.batch()
-        batch_count = 0
-        count = 0
-        
-        for doc in docs:
-            batch.delete(doc.reference)
-            count += 1
-            batch_count += 1
-            
-            if batch_count >= 500:
-                batch.commit()
-                print(f"  삭제: {count}개")
-                batch = db.batch()
-                batch_count = 0
-                time.sleep(0.1)
-        
-        if batch_count > 0:
-            batch.commit()
-        
-        print(f"✅ {collection_name}: {count}개 문서 삭제 완료")
+    for old_collection, _ in MIGRATIONS:
+        print(f"🗑️  {old_collection} 삭제 중...")
+        migration = Migration(f"delete_{old_collection}", old_collection, lambda doc_id, data: DELETE)
+        counts = run_migration(migration, db, dry_run=DRY_RUN, restart=RESTART)
+        print(f"✅ {old_collection}: {counts['deleted']}개 문서 삭제 완료")
     
     print()
     print("🎉 모든 기존 컬렉션 삭제 완료!")
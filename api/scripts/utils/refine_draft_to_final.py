@@ -4,14 +4,27 @@ J님의 출판 가이드 적용:
 - 굵게 강조 최소화 (챕터당 1~2회)
 - 선언형 문체
 - 짧은 문장, 줄바꿈, 여백
+
+동시 처리 파이프라인 (api/batch_engine.py):
+조회/선별 → 재정리 (워커 REFINE_WORKERS개, 분당 토큰 REFINE_TPM 한도) → WriteBatch 모아 저장
+- API 오류 시 원본을 저장하지 않고 실패로 기록 (cache/checkpoints/refine_draft_to_final.json)
+- 처리량 리포트 (문서/분, 토큰/분)
 """
 import firebase_admin
 from firebase_admin import credentials, firestore
 from pathlib import Path
-import google.generativeai as genai
 import os
+import sys
 from dotenv import load_dotenv
-import time
+
+# api 패키지 (응답 캐시, 배치 엔진) 경로
+api_path = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(api_path))
+
+from api.batch_engine import BatchStats, BatchWriter, Checkpoint, RateLimiter, content_hash, run_parallel
+from api.clients import get_legacy_gemini_model
+from api.core.token_budget import estimate_tokens
+from api.response_cache import get_response_cache, make_key
 
 # 환경 변수 로드
 load_dotenv()
@@ -26,8 +39,23 @@ if not firebase_admin._apps:
 db = firestore.client()
 
 # Gemini API 설정
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.0-flash-exp')
+MODEL_NAME = 'gemini-2.0-flash-exp'
+model = get_legacy_gemini_model(MODEL_NAME)
+
+# 생성 설정 (응답 캐시 키에도 포함)
+GENERATION_CONFIG = {
+    'temperature': 0.3,  # 정확성 우선
+    'top_p': 0.8,
+    'top_k': 40,
+    'max_output_tokens': 8192,
+}
+
+# 파이프라인 설정 (환경 변수로 조정)
+WORKERS = int(os.getenv('REFINE_WORKERS', '8'))                   # 동시 재정리 수
+TOKENS_PER_MINUTE = int(os.getenv('REFINE_TPM', '1000000'))       # 분당 토큰 한도 (입력 + 출력)
+REQUESTS_PER_MINUTE = int(os.getenv('REFINE_RPM', '300'))         # 분당 요청 한도
+WRITE_BATCH_SIZE = 50                                             # Firestore WriteBatch 크기
+MIN_BOLD_COUNT = 5                                                # 굵게가 이 횟수 이하면 양호 (스킵)
 
 # 출판 가이드 프롬프트
 PUBLISHING_GUIDE = """
@@ -88,104 +116,136 @@ PUBLISHING_GUIDE = """
 변환된 텍스트만 출력하시오. 설명 불필요.
 """
 
-def refine_content(content: str, category: str) -> str:
-    """Gemini API로 콘텐츠 재정리"""
+def _cache_request(content):
     prompt = f"{PUBLISHING_GUIDE}\n\n## 원본 텍스트\n\n{content}"
-    
-    try:
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                'temperature': 0.3,  # 정확성 우선
-                'top_p': 0.8,
-                'top_k': 40,
-                'max_output_tokens': 8192,
-            }
-        )
-        
-        refined = response.text.strip()
-        return refined
-        
-    except Exception as e:
-        print(f"  ⚠️  Gemini API 오류: {e}")
-        return content  # 실패 시 원본 반환
+    return {'model': MODEL_NAME, 'prompt': prompt, **GENERATION_CONFIG}
 
-def process_all_drafts():
-    """모든 draft 문서 처리"""
-    
-    print("=" * 80)
-    print("HINO_DRAFT → 출판용 문체 변환")
-    print("=" * 80)
+def _estimate_tokens(content):
+    """요청 토큰 추정 (입력 + 출력은 입력 본문과 비슷한 길이로)"""
+    return estimate_tokens(PUBLISHING_GUIDE, 'gemini-flash') + 2 * estimate_tokens(content, 'gemini-flash')
+
+def refine_content(content: str, category: str) -> str:
+    """Gemini API로 콘텐츠 재정리 (재실행 시 같은 원본은 캐시 응답 사용, 실패 시 예외)"""
+    request = _cache_request(content)
+    refined = get_response_cache().cached(
+        request,
+        lambda: model.generate_content(request['prompt'], generation_config=GENERATION_CONFIG).text.strip()
+    )
+    if not refined:
+        raise ValueError("빈 응답")
+    return refined
+
+def select_drafts(checkpoint):
+    """
+    재정리 대상 draft 조회 (content 있고 굵게 MIN_BOLD_COUNT회 초과, 이미 재정리한 내용 그대로면 제외)
     
-    # draft 문서 조회 (content 필드 있는 것만)
-    draft_ref = db.collection('hino_draft')
-    docs = draft_ref.order_by('created_at').stream()
+    Returns:
+        tuple: (대상 [(doc_id, {'ref', 'content', 'category', 'bold_count'})], 스킵 수)
+    """
+    docs = db.collection('hino_draft').order_by('created_at').stream()
     
-    processed = 0
+    targets = []
     skipped = 0
-    errors = 0
-    
     for doc in docs:
         data = doc.to_dict()
-        doc_id = doc.id
+        content = data.get('content')
         
         # content 필드 없으면 스킵
-        if 'content' not in data or not isinstance(data['content'], str):
+        if not isinstance(content, str):
             skipped += 1
-            print(f"\n⏭️  스킵: {doc_id} (content 없음)")
+            print(f"⏭️  스킵: {doc.id} (content 없음)")
             continue
         
-        content = data['content']
-        category = data.get('category', 'unknown')
-        content_type = data.get('content_type', 'unknown')
-        
-        # 굵게 사용 횟수
+        # 굵게가 적으면 스킵
         bold_count = content.count('**') // 2
-        
-        print(f"\n{'=' * 80}")
-        print(f"📄 {doc_id}")
-        print(f"   카테고리: {category}")
-        print(f"   타입: {content_type}")
-        print(f"   굵게: {bold_count}회")
-        print(f"   길이: {len(content):,}자")
-        
-        # 굵게가 적으면 스킵 (5회 이하)
-        if bold_count <= 5:
+        if bold_count <= MIN_BOLD_COUNT or checkpoint.is_done(doc.id, content_hash(content)):
             skipped += 1
-            print(f"   ✅ 양호 (굵게 {bold_count}회만 사용)")
             continue
         
-        # Gemini API로 재정리
-        print(f"   🔄 재정리 중...")
-        refined_content = refine_content(content, category)
-        
-        # 굵게 사용 횟수 비교
+        targets.append((doc.id, {
+            'ref': doc.reference,
+            'content': content,
+            'category': data.get('category', 'unknown'),
+            'bold_count': bold_count,
+        }))
+    return targets, skipped
+
+def process_all_drafts():
+    """모든 draft 문서 처리 (동시 재정리 + 모아 저장)"""
+    
+    print("=" * 80)
+    print("HINO_DRAFT → 출판용 문체 변환")
+    print("=" * 80)
+    
+    checkpoint = Checkpoint('refine_draft_to_final')
+    targets, skipped = select_drafts(checkpoint)
+    stats = BatchStats(total=len(targets) + skipped)
+    stats.skipped = skipped
+    print(f"📄 재정리 대상 {len(targets)}개 (양호/내용 없음 {skipped}개 스킵)")
+    print(f"⚙️  워커 {WORKERS}개, 분당 토큰 {TOKENS_PER_MINUTE:,}, 분당 요청 {REQUESTS_PER_MINUTE}")
+    
+    targets_by_id = dict(targets)
+    staged = {}  # 커밋 대기: doc_id → 재정리 결과 해시
+    
+    def on_commit(doc_ids):
+        checkpoint.mark_done_many([(doc_id, staged.pop(doc_id), {}) for doc_id in doc_ids])
+        stats.succeeded += len(doc_ids)
+    
+    def on_error(doc_ids, error):
+        for doc_id in doc_ids:
+            staged.pop(doc_id, None)
+            checkpoint.mark_failed(doc_id, f"저장 실패: {error}")
+        stats.failed += len(doc_ids)
+    
+    def stage(writer, doc_id, target, refined_content):
         new_bold_count = refined_content.count('**') // 2
-        print(f"   📊 굵게: {bold_count}회 → {new_bold_count}회")
-        
-        # Firestore 업데이트
-        try:
-            doc.reference.update({
-                'content': refined_content,
-                'updated_at': firestore.SERVER_TIMESTAMP,
-                'refined': True,
-                'original_bold_count': bold_count,
-                'refined_bold_count': new_bold_count
-            })
-            processed += 1
-            print(f"   ✅ 저장 완료")
-            
-        except Exception as e:
-            errors += 1
-            print(f"   ❌ 저장 실패: {e}")
+        print(f"   ✅ {doc_id} 굵게 {target['bold_count']}회 → {new_bold_count}회")
+        staged[doc_id] = content_hash(refined_content)
+        writer.set(target['ref'], {
+            'content': refined_content,
+            'updated_at': firestore.SERVER_TIMESTAMP,
+            'refined': True,
+            'original_bold_count': target['bold_count'],
+            'refined_bold_count': new_bold_count
+        }, merge=True, tag=doc_id)
+    
+    cache = get_response_cache()
+    limiter = RateLimiter(requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE)
+    with BatchWriter(db, batch_size=WRITE_BATCH_SIZE, on_commit=on_commit, on_error=on_error) as writer:
+        # 캐시된 재정리 결과는 API 한도 없이 바로 저장
+        pending = []
+        for doc_id, target in targets:
+            cached = cache.get(make_key(**_cache_request(target['content'])))
+            if cached:
+                stage(writer, doc_id, target, cached)
+            else:
+                pending.append((doc_id, target))
         
-        # API 제한 방지
-        time.sleep(1)
+        # 나머지는 동시 재정리 (완료 순서대로 저장 대기열에 추가)
+        for doc_id, refined_content, error in run_parallel(
+            pending,
+            lambda doc_id, target: refine_content(target['content'], target['category']),
+            workers=WORKERS,
+            limiter=limiter,
+            estimate_tokens=lambda target: _estimate_tokens(target['content']),
+        ):
+            if error is not None:
+                print(f"   ❌ {doc_id} 재정리 실패 (원본 유지): {error}")
+                checkpoint.mark_failed(doc_id, error)
+                stats.failed += 1
+                continue
+            target = targets_by_id[doc_id]
+            used = estimate_tokens(PUBLISHING_GUIDE + target['content'] + refined_content, 'gemini-flash')
+            limiter.consume(used - _estimate_tokens(target['content']))  # 추정과 실제 차이 보정
+            stats.tokens += used
+            stage(writer, doc_id, target, refined_content)
     
     print(f"\n{'=' * 80}")
-    print(f"✅ 처리 완료: {processed}개")
-    print(f"⏭️  스킵: {skipped}개")
-    print(f"❌ 오류: {errors}개")
+    print(stats.report('출판용 재정리'))
+    if checkpoint.failed:
+        print(f"❌ 실패 {len(checkpoint.failed)}개 (재실행 시 다시 처리):")
+        for doc_id, failure in checkpoint.failed.items():
+            print(f"   - {doc_id}: {failure['error'][:100]}")
     print(f"{'=' * 80}")
 
 if __name__ == "__main__":
@@ -4,10 +4,14 @@ J님 피드백 반영 - 하이노철봉한손 재정리
 import firebase_admin
 from firebase_admin import credentials, firestore
 from pathlib import Path
-import google.generativeai as genai
-import os
+import sys
 from dotenv import load_dotenv
 
+# api 패키지 (공유 클라이언트) 경로
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from api.clients import get_legacy_gemini_model
+
 load_dotenv()
 
 if not firebase_admin._apps:
@@ -17,8 +21,7 @@ if not firebase_admin._apps:
     firebase_admin.initialize_app(cred)
 
 db = firestore.client()
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.0-flash-exp')
+model = get_legacy_gemini_model('gemini-2.0-flash-exp')
 
 # J님 피드백
 J_FEEDBACK = """
@@ -0,0 +1,200 @@
+"""
+하이노밸런스 데이터 일괄 업로드 (노션 Export / 마크다운 / 텍스트 → projects/hinobalance/raw)
+파일 목록을 스크립트에 적어 두고 한 건씩 set() 하던 업로드 스크립트들을 대체
+
+사용법:
+    python projects/hinobalance/scripts/upload/bulk_import.py [디렉터리 또는 파일 ...]
+    (인자 생략 시 projects/hinobalance/data 전체)
+
+- 파일 파싱: 프로세스 풀 (제목 / 헤더 메타데이터 / 카테고리 추출)
+- 쓰기: Firestore BulkWriter (초당 쓰기 수를 점진적으로 늘리는 흐름 제어, 일시 오류 재시도)
+- 문서 ID = 본문 내용 해시 → 다시 실행해도 같은 내용은 같은 문서 (이미 있으면 건너뜀)
+- 종료 시 처리량 보고
+
+환경 변수:
+    IMPORT_WORKERS: 파싱 프로세스 수 (기본 CPU 수)
+    IMPORT_MAX_OPS: 초당 최대 쓰기 수 (기본 500)
+    IMPORT_DRY_RUN=1: 파싱 결과만 출력 (쓰기 없음)
+"""
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[4]
+sys.path.insert(0, str(ROOT_DIR / 'api'))
+
+from api.batch_engine import BatchStats, content_hash, open_bulk_writer
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# 기본 입력 / 저장 위치
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data'
+PROJECT_ID = 'hinobalance'
+FILE_PATTERNS = ('*.md', '*.txt')
+
+# 실행 옵션
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', '0')) or None
+IMPORT_MAX_OPS = int(os.getenv('IMPORT_MAX_OPS', '500'))
+IMPORT_DRY_RUN = os.getenv('IMPORT_DRY_RUN') == '1'
+
+# 운동 카테고리 (파일 이름 접두어로 판별)
+CATEGORIES = ['하이노워밍', '하이노골반', '하이노워킹', '하이노스케이팅', '하이노풋삽', '하이노철봉']
+THEORY_CATEGORY = '하이노이론'
+
+# 노션 Export 파일 이름 끝의 페이지 ID ("이론 251228 2d7d9ddff6ab809a8da3d508a46d0450")
+_NOTION_ID = re.compile(r'\s+[0-9a-f]{32}$')
+# 헤더 / 본문 구분선 (=====)
+_SEPARATOR = re.compile(r'^={10,}\s*$')
+_META_LINE = re.compile(r'^([^:#\n]{1,20}):\s*(.+)$')
+
+
+def collect_files(paths):
+    """입력 경로의 업로드 대상 파일 (디렉터리는 하위까지, 이름순)"""
+    files = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            for pattern in FILE_PATTERNS:
+                files.extend(path.rglob(pattern))
+        elif path.is_file():
+            files.append(path)
+        else:
+            print(f"[BulkImport] 경로 없음: {path}")
+    return sorted(set(files))
+
+
+def _split_header(lines):
+    """(제목, 메타데이터, 본문 줄) - 구분선 앞의 '키: 값' 줄을 메타데이터로"""
+    title = None
+    body_start = 0
+    for i, line in enumerate(lines):
+        if line.startswith('# '):
+            title = line[2:].strip()
+            body_start = i + 1
+            break
+        if line.strip():
+            break
+
+    meta = {}
+    for i in range(body_start, min(len(lines), body_start + 20)):
+        if _SEPARATOR.match(lines[i]):
+            for header_line in lines[body_start:i]:
+                match = _META_LINE.match(header_line.strip())
+                if match:
+                    meta[match.group(1).strip()] = match.group(2).strip()
+            body_start = i + 1
+            break
+    return title, meta, lines[body_start:]
+
+
+def _classify(stem, meta, parent):
+    """(카테고리, 운동명, 이론/실전)"""
+    if stem.startswith('exercise_'):
+        name = stem[len('exercise_'):]
+        category = meta.get('카테고리') or next((c for c in CATEGORIES if name.startswith(c)), THEORY_CATEGORY)
+        return category, name, '실전'
+    if stem.startswith('category_theory_'):
+        category = stem[len('category_theory_'):]
+        return category, f"{category}_공통이론", '이론'
+
+    category = meta.get('카테고리') or next((c for c in CATEGORIES if stem.startswith(c)), None)
+    if category is None:
+        category = parent if parent in CATEGORIES else THEORY_CATEGORY
+    return category, stem, '이론' if category == THEORY_CATEGORY else '실전'
+
+
+def parse_file(path):
+    """
+    파일 하나 파싱 (프로세스 풀 워커)
+
+    Returns:
+        dict: 문서 데이터 + 'id' (내용 해시), 본문이 비었으면 None
+    """
+    path = Path(path)
+    text = path.read_text(encoding='utf-8-sig').replace('\r\n', '\n')
+    stem = _NOTION_ID.sub('', path.stem)
+
+    title, meta, body_lines = _split_header(text.split('\n'))
+    content = '\n'.join(body_lines).strip()
+    if not content:
+        return None
+
+    category, exercise_name, doc_type = _classify(stem, meta, path.parent.name)
+    return {
+        'id': content_hash(content)[:24],
+        'title': title or stem,
+        'content': content,
+        'doc_type': doc_type,
+        'category': category,
+        'exercise_name': exercise_name,
+        'source': 'notion' if _NOTION_ID.search(path.stem) else path.suffix.lstrip('.'),
+        'source_file': path.name,
+        'source_meta': meta,
+        'status': 'raw',
+    }
+
+
+def parse_all(files):
+    """프로세스 풀로 전체 파싱 → (문서 목록, 내용 중복 수)"""
+    docs = {}
+    duplicates = 0
+    with ProcessPoolExecutor(max_workers=IMPORT_WORKERS) as executor:
+        for path, doc in zip(files, executor.map(parse_file, files, chunksize=4)):
+            if doc is None:
+                print(f"[BulkImport] 본문 없음, 제외: {path.name}")
+                continue
+            if doc['id'] in docs:
+                duplicates += 1
+                print(f"[BulkImport] 내용 중복, 제외: {path.name} (= {docs[doc['id']]['source_file']})")
+                continue
+            docs[doc['id']] = doc
+    return list(docs.values()), duplicates
+
+
+def write_all(docs, stats):
+    """BulkWriter로 생성 (이미 있는 문서는 건너뜀)"""
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+    from api.clients import SERVICE_ACCOUNT_PATH
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(str(SERVICE_ACCOUNT_PATH)))
+    db = firestore.client()
+    collection = db.collection('projects').document(PROJECT_ID).collection('raw')
+
+    bulk_writer = open_bulk_writer(db, stats, max_ops_per_second=IMPORT_MAX_OPS)
+    for doc in docs:
+        data = {key: value for key, value in doc.items() if key != 'id'}
+        data['content_hash'] = doc['id']
+        data['created_at'] = firestore.SERVER_TIMESTAMP
+        data['updated_at'] = firestore.SERVER_TIMESTAMP
+        bulk_writer.create(collection.document(doc['id']), data)
+    bulk_writer.close()  # 남은 쓰기 전송 + 재시도 완료까지 대기
+
+
+def main():
+    paths = sys.argv[1:] or [DATA_DIR]
+    files = collect_files(paths)
+    print(f"[BulkImport] 대상 파일 {len(files)}개")
+    if not files:
+        return
+
+    parse_started = time.monotonic()
+    docs, duplicates = parse_all(files)
+    print(f"[BulkImport] 파싱 {len(docs)}건 ({time.monotonic() - parse_started:.1f}s, 중복 {duplicates}건)")
+
+    if IMPORT_DRY_RUN:
+        for doc in docs:
+            print(f"  {doc['id']}  {doc['category']:<8} {doc['doc_type']}  {doc['title'][:40]}  ({doc['source_file']})")
+        return
+
+    stats = BatchStats(len(docs))
+    write_all(docs, stats)
+    print(stats.report('BulkImport'))
+
+
+if __name__ == '__main__':
+    main()